@@ -0,0 +1,453 @@
+import os
+import sys
+import json
+import queue
+import shlex
+import collections
+import shutil
+import socket
+import secrets
+import argparse
+import tempfile
+import warnings
+import subprocess
+from pathlib import Path
+from multiprocessing.managers import BaseManager
+
+from nextnanopy import commands, defaults
+from nextnanopy.utils.misc import get_filename
+
+
+class Backend(object):
+    """
+    Executes the input files of a sweep, see Sweep.execute_sweep(backend=...).
+
+    Subclasses implement run(input_files, outputdirectory, show_log, convergenceCheck,
+    convergence_check_mode, **kwargs): it executes the (saved) InputFiles with their
+    outputs in outputdirectory, sets their execute_info and returns the list of
+    execute_infos in the same order. kwargs are the parameters of InputFile.execute().
+
+    Every execute_info has 'outputdirectory', 'filename', 'logfile' and 'returncode'
+    (None if the simulation is not finished when run() returns, see BatchBackend).
+    Only LocalBackend has the 'process' of the simulation.
+    """
+
+    def run(self, input_files, outputdirectory, show_log=True, convergenceCheck=False, convergence_check_mode='pause', **kwargs):
+        raise NotImplementedError
+
+
+def get_backend(backend=None, parallel_limit=1, cores=None):
+    """Return backend if it is a Backend, or a LocalBackend if it is None or 'local'"""
+    if isinstance(backend, Backend):
+        return backend
+    elif backend is None or backend == 'local':
+        return LocalBackend(parallel_limit=parallel_limit, cores=cores)
+    raise ValueError(f"backend must be 'local' or a Backend object, not {backend}")
+
+
+def job_info(input_file, outputdirectory):
+    """Return the output folder and log file of an input file executed in outputdirectory (see commands.execute)"""
+    filename = get_filename(input_file.fullpath, ext=False)
+    folder = Path(outputdirectory) / filename
+    return {
+        'outputdirectory': folder,
+        'filename': filename,
+        'logfile': folder / f"{filename}.log",
+    }
+
+
+def remote_warning(backend, convergenceCheck):
+    if convergenceCheck:
+        warnings.warn(f'convergenceCheck is not supported by {backend}. Check the log files after the execution.')
+
+
+class LocalBackend(Backend):
+    """
+    Executes the input files on this machine, one after another or with an
+    ExecutionQueue if parallel_limit > 1 or cores is specified
+    (see Sweep.execute_sweep for the parameters).
+    """
+
+    def __init__(self, parallel_limit=1, cores=None):
+        self.parallel_limit = parallel_limit
+        self.cores = cores
+
+    def run(self, input_files, outputdirectory, show_log=True, convergenceCheck=False, convergence_check_mode='pause', **kwargs):
+        from nextnanopy.inputs import ExecutionQueue
+
+        if self.parallel_limit > 1 or self.cores is not None:
+            execution_queue = ExecutionQueue(limit_parallel=self.parallel_limit, terminate_empty=True, cores=self.cores, outputdirectory=outputdirectory, show_log=show_log, convergenceCheck=convergenceCheck, convergence_check_mode=convergence_check_mode, **kwargs)
+            execution_queue.add(*input_files)
+            if self.cores is not None:
+                plan = collections.Counter(threads for _, threads in execution_queue.plan())
+                print(f"\nThread budget of {self.cores} cores, simulations x threads: " + ', '.join(f"{n} x {threads}" for threads, n in plan.items()))
+            execution_queue.start()
+            execution_queue.join()
+        else:
+            for i, inputfile in enumerate(input_files):
+                if not show_log:
+                    print(f"\nExecuting simulations [{i+1}/{len(input_files)}]...")
+                inputfile.execute(outputdirectory=outputdirectory, show_log=show_log, convergenceCheck=convergenceCheck, convergence_check_mode=convergence_check_mode, **kwargs)
+        infos = [inputfile.execute_info for inputfile in input_files]
+        for info in infos:
+            info['returncode'] = info['process'].returncode
+        return infos
+
+
+def execute_job(job):
+    """
+    Execute a job with the nextnanopy config of this machine (exe, license, database...)
+    and return a summary of the execution (picklable and json serializable).
+
+    job is a dict with 'inputfile', 'outputdirectory' and optionally 'kwargs'
+    (parameters of commands.execute which override the config).
+    """
+    inputfile = job['inputfile']
+    product = defaults.input_file_type(inputfile)
+    kwargs = dict(defaults.NNConfig().config[product])
+    kwargs.update(job.get('kwargs', {}))
+    kwargs['outputdirectory'] = job['outputdirectory']
+    info = commands.execute(inputfile=inputfile, show_log=False, **kwargs)
+    return {
+        'inputfile': str(inputfile),
+        'outputdirectory': str(info['outputdirectory']),
+        'filename': info['filename'],
+        'logfile': str(info['logfile']),
+        'returncode': info['process'].returncode,
+        'host': socket.gethostname(),
+    }
+
+
+def input_job(input_file, outputdirectory, **kwargs):
+    """
+    Return the job of an input file with its text (see execute_input_job), so that
+    the input file does not have to exist where and when the job is executed.
+    """
+    with open(input_file.fullpath, 'r') as f:
+        text = f.read()
+    return {
+        'filename': os.path.basename(input_file.fullpath),
+        'text': text,
+        'outputdirectory': str(outputdirectory),
+        'kwargs': kwargs,
+    }
+
+
+def execute_input_job(job, folder):
+    """Save the input file of a job (see input_job) in folder and execute it (see execute_job)"""
+    inputfile = os.path.join(folder, job['filename'])
+    with open(inputfile, 'w') as f:
+        f.write(job['text'])
+    return execute_job(dict(job, inputfile=inputfile))
+
+
+def stop_workers(processes, timeout):
+    """Wait for the processes for timeout seconds (each), then kill them"""
+    for process in processes:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+_jobs, _results = queue.Queue(), queue.Queue()  # only used in the server process of a SweepManager
+
+
+def _get_jobs():
+    return _jobs
+
+
+def _get_results():
+    return _results
+
+
+class SweepManager(BaseManager):
+    pass
+
+
+SweepManager.register('jobs', callable=_get_jobs)
+SweepManager.register('results', callable=_get_results)
+
+
+class ManagerBackend(Backend):
+    """
+    Executes the input files on worker processes, on this machine or on other
+    nodes, which take the jobs from a server (multiprocessing.managers) started
+    by run().
+
+    Each worker (see serve_worker) saves the input file in its working directory
+    and executes it with the nextnanopy config of its machine (exe, license,
+    database...) and kwargs of execute_sweep. The outputs are written in the
+    output directory of the sweep, which has to be reachable from the workers
+    with the same path (e.g. a shared file system).
+
+    Parameters
+    ----------
+    workers : list of list of str, optional
+        commands starting the workers, e.g. over ssh:
+            ['ssh', 'node1', 'python', '-m', 'nextnanopy.backends', 'worker', '{address}']
+        '{address}' is replaced by host:port of the server and the authkey (hex) is
+        written to their standard input. Workers can also be started by other means
+        with the same command, until all the jobs are done.
+        (default: None)
+    address : tuple, optional
+        (host, port) of the server (default: ('127.0.0.1', 0), a free port reachable
+        only from this machine). For workers on other nodes, specify the interface,
+        e.g. ('', 0) for all of them: the server is then only protected by the authkey
+        and exchanges pickles, so use it on trusted networks only.
+    host : str, optional
+        name of this machine for the workers
+        (default: the host of address, or socket.gethostname() if it is '')
+    timeout : float, optional
+        seconds to wait for each worker to exit at the end of the sweep before it is
+        killed (default: 10). On an error (or KeyboardInterrupt), the workers are
+        killed right away.
+    authkey : bytes, optional
+        authentication key of the server (default: random)
+    """
+
+    def __init__(self, workers=None, address=('127.0.0.1', 0), host=None, authkey=None, timeout=10):
+        self.workers = workers or []
+        self.address = address
+        self.host = host
+        self.authkey = authkey or secrets.token_bytes(32)
+        self.timeout = timeout
+        self.worker_address = None
+        self.processes = []
+
+    def run(self, input_files, outputdirectory, show_log=True, convergenceCheck=False, convergence_check_mode='pause', **kwargs):
+        remote_warning('ManagerBackend', convergenceCheck)
+        manager = SweepManager(address=self.address, authkey=self.authkey)
+        manager.start()
+        self.processes = processes = []
+        finished = False
+        try:
+            jobs, results = manager.jobs(), manager.results()
+            for i, input_file in enumerate(input_files):
+                jobs.put(dict(input_job(input_file, outputdirectory, **kwargs), index=i))
+            jobs.put(None)  # end of the sweep, passed on by each worker
+
+            host = self.host or self.address[0] or socket.gethostname()
+            self.worker_address = f"{host}:{manager.address[1]}"
+            for worker in self.workers:
+                process = subprocess.Popen([arg.replace('{address}', self.worker_address) for arg in worker], stdin=subprocess.PIPE)
+                process.stdin.write(self.authkey.hex().encode() + b'\n')
+                process.stdin.close()
+                processes.append(process)
+
+            infos = [None] * len(input_files)
+            for n in range(len(input_files)):
+                while True:
+                    try:
+                        result = results.get(timeout=1)
+                        break
+                    except queue.Empty:
+                        if processes and all(process.poll() is not None for process in processes):
+                            raise RuntimeError('All the workers exited before the end of the sweep')
+                if 'error' in result:
+                    raise RuntimeError(f"{input_files[result['index']].fullpath} failed on {result['host']}: {result['error']}")
+                infos[result['index']] = result
+                if not show_log:
+                    print(f"\nFinished simulations [{n+1}/{len(input_files)}] ({result['host']})")
+            finished = True
+        finally:
+            stop_workers(processes, timeout=self.timeout if finished else 0)
+            manager.shutdown()
+
+        for input_file, info in zip(input_files, infos):
+            info['outputdirectory'] = Path(info['outputdirectory'])
+            info['logfile'] = Path(info['logfile'])
+            input_file.execute_info = info
+        return infos
+
+
+def serve_worker(address, authkey, workdir=None):
+    """
+    Execute the jobs of a ManagerBackend (see execute_job) until the end of the sweep.
+
+    Parameters
+    ----------
+    address : tuple
+        (host, port) of the server
+    authkey : bytes
+        authentication key of the server
+    workdir : str, optional
+        folder where the input files are saved (default: None, temporary folder)
+    """
+    manager = SweepManager(address=address, authkey=authkey)
+    manager.connect()
+    jobs, results = manager.jobs(), manager.results()
+    folder = workdir or tempfile.mkdtemp(prefix='nextnanopy-')
+    try:
+        while True:
+            try:
+                job = jobs.get()
+            except (EOFError, OSError):  # the server was shut down
+                break
+            if job is None:
+                jobs.put(None)  # for the other workers
+                break
+            try:
+                result = execute_input_job(job, folder)
+            except Exception as e:
+                result = {'error': repr(e), 'host': socket.gethostname()}
+            result['index'] = job['index']
+            results.put(result)
+    finally:
+        if workdir is None:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+batch_templates = {
+    'slurm': (
+        "#!/bin/sh\n"
+        "#SBATCH --job-name={name}\n"
+        "#SBATCH --array=0-{last}{limit}\n"
+        "#SBATCH --output={folder}/slurm-%A_%a.out\n"
+        "{python} -m nextnanopy.backends run {jobs} $SLURM_ARRAY_TASK_ID\n"
+    ),
+    'pbs': (
+        "#!/bin/sh\n"
+        "#PBS -N {name}\n"
+        "#PBS -J 0-{last}\n"
+        "{python} -m nextnanopy.backends run {jobs} $PBS_ARRAY_INDEX\n"
+    ),
+    'sge': (
+        "#!/bin/sh\n"
+        "#$ -N {name}\n"
+        "#$ -t 1-{count}\n"
+        "{python} -m nextnanopy.backends run {jobs} $(($SGE_TASK_ID - 1))\n"
+    ),
+    'local': (
+        "#!/bin/sh\n"
+        "i=0\n"
+        "while [ $i -le {last} ]; do\n"
+        "    {python} -m nextnanopy.backends run {jobs} $i\n"
+        "    i=$((i + 1))\n"
+        "done\n"
+    ),
+}
+
+
+class BatchBackend(Backend):
+    """
+    Writes an array job for a batch scheduler: a job file with one task per input
+    file (sweep_jobs.json) and a script (sweep_<scheduler>.sh) in the output
+    directory of the sweep, and submits the script if submit is specified.
+
+    Each task runs 'python -m nextnanopy.backends run <job file> <index>' on the
+    node of the scheduler, which saves the input file stored in the job file in a
+    temporary folder and executes it with the nextnanopy config of the node (see
+    execute_input_job). The job file and the output directory have to be reachable
+    from the nodes with the same paths; the input files do not (they can be deleted,
+    see delete_input_files of execute_sweep).
+
+    run() returns when the script is submitted, not when the simulations are
+    finished (unless the submit command waits for them, e.g. the 'local' scheduler
+    with submit=['sh'], which runs the tasks one after another on this machine):
+    the execute_infos have the 'outputdirectory' and 'logfile' of the simulations,
+    'task' (index in the job file), 'script' and 'returncode' None.
+
+    Parameters
+    ----------
+    scheduler : str, optional
+        'slurm', 'pbs', 'sge' or 'local' (see batch_templates, default: 'slurm')
+    template : str, optional
+        script template overriding the one of scheduler. The fields are {name}, {jobs}
+        (job file), {python}, {folder} (output directory), {count} (number of tasks),
+        {last} (last task index) and {limit} ('%parallel_limit' or '', slurm syntax)
+    submit : list of str, optional
+        command submitting the script (e.g. ['sbatch']), to which the script path is
+        appended (default: None, the script is only written)
+    parallel_limit : int, optional
+        maximum number of tasks running at the same time, if the template supports it
+        (default: None)
+    name : str, optional
+        name of the job (default: name of the output directory)
+    python : str, optional
+        python executable on the nodes (default: sys.executable)
+    """
+
+    def __init__(self, scheduler='slurm', template=None, submit=None, parallel_limit=None, name=None, python=None):
+        if template is None and scheduler not in batch_templates:
+            raise ValueError(f"scheduler must be one of {list(batch_templates)}, not {scheduler}")
+        self.scheduler = scheduler
+        self.template = template or batch_templates[scheduler]
+        self.submit = submit
+        self.parallel_limit = parallel_limit
+        self.name = name
+        self.python = python or sys.executable
+        self.script = None
+        self.submission = None
+
+    def run(self, input_files, outputdirectory, show_log=True, convergenceCheck=False, convergence_check_mode='pause', **kwargs):
+        remote_warning('BatchBackend', convergenceCheck)
+        folder = Path(outputdirectory)
+        jobs = [input_job(input_file, folder.resolve(), **kwargs) for input_file in input_files]
+        jobs_path = folder / 'sweep_jobs.json'
+        with open(jobs_path, 'w') as f:
+            json.dump(jobs, f, indent=4, default=str)
+
+        self.script = folder / f'sweep_{self.scheduler}.sh'
+        text = self.template.format(
+            name=self.name or folder.name,
+            jobs=shlex.quote(str(jobs_path.resolve())),
+            python=shlex.quote(self.python),
+            folder=shlex.quote(str(folder.resolve())),
+            count=len(jobs),
+            last=len(jobs) - 1,
+            limit=f'%{self.parallel_limit}' if self.parallel_limit else '',
+        )
+        with open(self.script, 'w', newline='\n') as f:
+            f.write(text)
+        os.chmod(self.script, 0o755)
+
+        if self.submit:
+            process = subprocess.run(list(self.submit) + [str(self.script)], capture_output=True, text=True, check=True)
+            self.submission = process.stdout
+            if show_log:
+                sys.stdout.write(process.stdout)
+
+        infos = []
+        for i, input_file in enumerate(input_files):
+            info = dict(job_info(input_file, outputdirectory), returncode=None, task=i, script=self.script)
+            input_file.execute_info = info
+            infos.append(info)
+        return infos
+
+
+def run_batch_job(jobs_path, index):
+    """Execute the task index of a job file written by BatchBackend and return its summary"""
+    with open(jobs_path, 'r') as f:
+        job = json.load(f)[index]
+    folder = tempfile.mkdtemp(prefix='nextnanopy-')
+    try:
+        return execute_input_job(job, folder)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m nextnanopy.backends', description='Execute the jobs of a nextnanopy sweep backend')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    worker = subparsers.add_parser('worker', help='execute the jobs of a ManagerBackend (authkey in hex from stdin)')
+    worker.add_argument('address', help='host:port of the server')
+    worker.add_argument('--workdir', default=None, help='folder where the input files are saved')
+    task = subparsers.add_parser('run', help='execute a task of a BatchBackend job file')
+    task.add_argument('jobs', help='job file')
+    task.add_argument('index', type=int, help='index of the task')
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        host, port = args.address.rsplit(':', 1)
+        authkey = bytes.fromhex(sys.stdin.readline().strip())
+        serve_worker((host, int(port)), authkey, workdir=args.workdir)
+        return 0
+    result = run_batch_job(args.jobs, args.index)
+    print(json.dumps(result))
+    return 0 if result['returncode'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,15 @@
 import sys, os
+import asyncio
 import subprocess
 from pathlib import Path
-import queue
 import threading
+import selectors
+import codecs
 import warnings
 from nextnanopy.utils.misc import get_filename, mkdir_if_not_exist
 from nextnanopy import defaults
 
-from nextnanopy.utils.formatting import generate_command
+from nextnanopy.utils.formatting import _bool
 
 
 def command(
@@ -41,69 +43,111 @@ def command(
 
 
 def send(cmd, cwd=os.getcwd()):
+    """
+    Start cmd with its stdout and stderr in pipes.
+
+    cmd is a list of arguments (see command(argv=True)), executed without a shell.
+    A string is still executed through the shell.
+    """
     PIPE = subprocess.PIPE
     return subprocess.Popen(
-        cmd, stdout=PIPE, stderr=PIPE, close_fds=True, shell=True, cwd=cwd
+        cmd, stdout=PIPE, stderr=PIPE, close_fds=True, shell=isinstance(cmd, str), cwd=cwd
     )
 
 
-def read_output(pipe, funcs):
-    for line in iter(pipe.readline, b""):
-        for func in funcs:
-            func(line)
-    pipe.close()
+def pump_log(process, filepath, show=True):
+    """
+    Write the stdout and stderr of process to the log file (and to the console
+    if show) until both pipes are closed.
 
+    On POSIX, both pipes are read in one selector loop. Pipes cannot be selected
+    on Windows, where each one is read by a thread. The output is read in chunks
+    and written line by line, so that the lines of stdout and stderr are not mixed.
+    """
+    pipes = [pipe for pipe in (process.stdout, process.stderr) if pipe is not None]
+    decoders = {pipe: codecs.getincrementaldecoder("utf-8")(errors="ignore") for pipe in pipes}
+    partial = {pipe: "" for pipe in pipes}
+    lock = threading.Lock()
 
-def write_output(get, filepath, show=True):
     with open(filepath, "w", newline="") as f:
-        for line in iter(get, None):
-            line = str(line, "utf-8", errors="ignore")
-            if show:
-                sys.stdout.write(line)
-            f.write(line)
+
+        def write(pipe, data):
+            final = not data
+            text = partial[pipe] + decoders[pipe].decode(data, final)
+            end = len(text) if final else text.rfind("\n") + 1
+            text, partial[pipe] = text[:end], text[end:]
+            if text:
+                with lock:
+                    if show:
+                        sys.stdout.write(text)
+                    f.write(text)
+
+        if os.name == "posix":
+            with selectors.DefaultSelector() as selector:
+                for pipe in pipes:
+                    selector.register(pipe, selectors.EVENT_READ)
+                while selector.get_map():
+                    for key, _ in selector.select():
+                        data = os.read(key.fd, 65536)
+                        write(key.fileobj, data)
+                        if not data:
+                            selector.unregister(key.fileobj)
+                            key.fileobj.close()
+        else:
+
+            def read(pipe):
+                for data in iter(lambda: pipe.read1(65536), b""):
+                    write(pipe, data)
+                write(pipe, b"")
+                pipe.close()
+
+            threads = [threading.Thread(target=read, args=(pipe,)) for pipe in pipes[1:]]
+            for t in threads:
+                t.start()
+            read(pipes[0])
+            for t in threads:
+                t.join()
 
 
 def start_log(process, filepath, show=True, parallel=False):
-    q = queue.Queue()
-    out, err = [], []
-    tout = threading.Thread(
-        target=read_output, args=(process.stdout, [q.put, out.append])
-    )
-    terr = threading.Thread(
-        target=read_output, args=(process.stderr, [q.put, err.append])
-    )
-    twrite = threading.Thread(target=write_output, args=(q.get, filepath, show))
-    for t in (tout, terr, twrite):
-        t.daemon = False
-        t.start()
+    """
+    Write the output of process to the log file (see pump_log).
+
+    If parallel, return the thread writing the log. Otherwise, write the log
+    in the calling thread, wait for the process and return None.
 
+    Up to nextnanopy 1.1.0, start_log returned (queue, stdout thread, stderr thread).
+    """
     if parallel:
-        return q, tout, terr
+        thread = threading.Thread(target=pump_log, args=(process, filepath, show))
+        thread.daemon = False
+        thread.start()
+        return thread
     else:
+        pump_log(process, filepath, show)
         process.wait()
-        for t in (tout, terr):
-            t.join()
-        q.put(None)
-        return q, tout, terr
+        return None
 
 
-def execute(
+def prepare_execution(
     inputfile,
     exe,
     license,
     database,
     outputdirectory,
-    show_log=True,
-    parallel=False,
+    argv=False,
     **kwargs,
 ):
+    """
+    Create the output folder of the input file and return the information
+    needed to execute it (see execute): cmd, wdir, outputdirectory, filename, logfile.
+    """
     filename = get_filename(inputfile, ext=False)
     inputfile = Path(inputfile).resolve()
     outputdirectory = Path(outputdirectory) / filename
     mkdir_if_not_exist(outputdirectory)
     logfile = outputdirectory / f"{filename}.log"
-    cmd = command(inputfile, exe, license, database, outputdirectory, **kwargs)
-    cwd = os.getcwd()
+    cmd = command(inputfile, exe, license, database, outputdirectory, argv=argv, **kwargs)
     exe = Path(exe)
     wdir, executable = exe.parent, exe.name  # nn3 assumes wdir at one folder upper than the executable
 
@@ -115,23 +159,109 @@ def execute(
         raise FileNotFoundError(
             f"Executable path is invalid: {exe}\nCheck nextnanopy.config"
         )
-    process = send(cmd, cwd=wdir)
-    queue, tout, terr = start_log(process, logfile, show_log, parallel=parallel)
-    os.chdir(cwd)
-    info = {
-        "process": process,
+    return {
         "outputdirectory": outputdirectory,
         "filename": filename,
         "logfile": logfile,
         "cmd": cmd,
         "wdir": wdir,
-        "queue": queue,
-        "tout": tout,
-        "terr": terr,
+    }
+
+
+def execute(
+    inputfile,
+    exe,
+    license,
+    database,
+    outputdirectory,
+    show_log=True,
+    parallel=False,
+    **kwargs,
+):
+    cwd = os.getcwd()
+    info = prepare_execution(inputfile, exe, license, database, outputdirectory, argv=True, **kwargs)
+    process = send(info["cmd"], cwd=info["wdir"])
+    log_thread = start_log(process, info["logfile"], show_log, parallel=parallel)
+    os.chdir(cwd)
+    info = {
+        "process": process,
+        **info,
+        "log_thread": log_thread,
+        # deprecated keys of the former log threads (see start_log)
+        "queue": None,
+        "tout": log_thread,
+        "terr": log_thread,
     }
     return info
 
 
+async def pump_log_async(stream, file, show=True):
+    """
+    Write the output of an asyncio stream to the log file (and to the console
+    if show). As in pump_log, the stream is read in chunks and written line by
+    line, so that long lines (e.g. progress bars without newline) do not hit
+    the line limit of the StreamReader.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    partial = ""
+    while True:
+        data = await stream.read(65536)
+        final = not data
+        text = partial + decoder.decode(data, final)
+        end = len(text) if final else text.rfind("\n") + 1
+        text, partial = text[:end], text[end:]
+        if text:
+            if show:
+                sys.stdout.write(text)
+            file.write(text)
+        if final:
+            break
+
+
+async def execute_async(
+    inputfile,
+    exe,
+    license,
+    database,
+    outputdirectory,
+    show_log=True,
+    timeout=None,
+    **kwargs,
+):
+    """
+    Coroutine counterpart of execute: the solver is started with
+    asyncio.create_subprocess_exec (no shell) and its stdout and stderr are
+    written to the log file from the event loop, without extra threads.
+
+    If the timeout (in seconds) expires or the task is cancelled, the process
+    is killed and asyncio.TimeoutError or asyncio.CancelledError is raised.
+
+    Returns the same information as execute, with the returncode of the process
+    instead of the logging threads.
+    """
+    info = prepare_execution(inputfile, exe, license, database, outputdirectory, argv=True, **kwargs)
+    PIPE = asyncio.subprocess.PIPE
+    process = await asyncio.create_subprocess_exec(
+        *info["cmd"], stdout=PIPE, stderr=PIPE, cwd=info["wdir"]
+    )
+    try:
+        with open(info["logfile"], "w", newline="") as f:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    pump_log_async(process.stdout, f, show_log),
+                    pump_log_async(process.stderr, f, show_log),
+                    process.wait(),
+                ),
+                timeout,
+            )
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await asyncio.shield(process.wait())
+        raise
+    return {"process": process, **info, "returncode": process.returncode}
+
+
 def run_script(script, kwargs=None, show_log=True):
     """
     The function runs a python script with given arguments. Output is stored in the file script_name.log
@@ -151,11 +281,10 @@ def run_script(script, kwargs=None, show_log=True):
     -------
     process: subprocess.POPEN
     """
-    args = [[sys.executable, script]]
+    cmd = [sys.executable, str(script)]
     if kwargs:
-        for key in kwargs.keys():
-            args.append([key, kwargs[key]])
-    cmd = generate_command(args)
+        for key, value in kwargs.items():
+            cmd += [str(key), str(value)] if _bool(value) else [str(key)]
     process = send(cmd)
     logfile = Path.cwd() / f"{Path(script).name}.log"
     start_log(process, logfile, show_log)
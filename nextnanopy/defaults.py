@@ -11,6 +11,7 @@ products = [
     "nextnanoevo",
 ]
 config_default_path = Path.home() / ".nextnanopy-config"
+cache_default_path = Path.home() / ".nextnanopy-cache"
 messages = {
     "load_input": [None, None],
     "save_input": [None, None],
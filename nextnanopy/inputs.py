@@ -1,14 +1,18 @@
 import os,sys
+import copy
 import threading
 import time
 import warnings
 import itertools
 import queue
+import collections
+import heapq
+import asyncio
 import nextnanopy
 from nextnanopy.utils.formatting import text_to_lines, lines_to_text
 from nextnanopy.utils.mycollections import DictList
 from nextnanopy.utils.misc import savetxt, get_filename, get_folder, get_file_extension, message_decorator, mkdir_even_if_exists, mkdir_if_not_exist
-from nextnanopy.commands import execute as cmd_execute
+from nextnanopy.commands import execute as cmd_execute, execute_async as cmd_execute_async
 from nextnanopy import defaults
 from collections.abc import Iterable
 from typing import Callable, Any
@@ -97,6 +101,10 @@ class InputFileTemplate(object):
         set_variable(name, value=None, comment=None)
             change the value and/or the comment of self.variable[name]
             If value or comment is None, it won't change that parameter
+
+        compile()
+            return a CompiledInputFile to render the text for new values of
+            the variables without copying and rendering all the lines again
     """
     _shared_temp_dir = None
 
@@ -316,6 +324,35 @@ class InputFileTemplate(object):
             self.check_convergence(mode= convergence_check_mode)
         return info
 
+    async def execute_async(self, show_log = True, convergenceCheck = False, convergence_check_mode = 'terminate', timeout = None, **kwargs):
+        """
+        Coroutine counterpart of execute(), to be awaited in an asyncio event loop:
+
+            info = await input_file.execute_async(timeout = 3600)
+
+        The simulation runs without a shell and its log is written by the event loop
+        (see nextnanopy.commands.execute_async), so that many simulations can be
+        supervised concurrently. If timeout (in seconds) expires or the task is
+        cancelled, the simulation is killed and asyncio.TimeoutError or
+        asyncio.CancelledError is raised.
+
+        The convergence check runs in a thread of the event loop's executor.
+        convergence_check_mode can be 'terminate' (default) or 'continue': 'pause'
+        would ask the user with input(), which blocks the event loop.
+
+        See execute() for the other parameters.
+        """
+        check_async_convergence_mode(convergenceCheck, convergence_check_mode)
+        cmd_kwargs = dict(self.default_command_args)
+        cmd_kwargs.update(kwargs)
+        cmd_kwargs['inputfile'] = self.fullpath
+        info = await cmd_execute_async(show_log=show_log, timeout=timeout, **cmd_kwargs)
+        self.execute_info = info
+        if convergenceCheck:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.check_convergence, convergence_check_mode)
+        return info
+
     def check_convergence(self, mode = 'pause'):
         if self.product == 'nextnano.MSB':
             raise NotImplementedError('Convergence check has not yet implemented for nextnano.MSB!')
@@ -444,6 +481,13 @@ class InputFileTemplate(object):
             var.unit  = unit
         return var
 
+    def compile(self):
+        """
+        Return a CompiledInputFile of the current text, to render or save the
+        input file for new values of the variables.
+        """
+        return CompiledInputFile(self)
+
     def __getitem__(self, item):
         return self.variables[item]
 
@@ -464,16 +508,118 @@ class InputFileTemplate(object):
         return out
 
     def __iter__(self):
-        self._iter_index = 0
-        return self
+        return iter(self.variables.values())
 
-    def __next__(self):
-        try:
-            result = self.variables.__getitem__(self._iter_index)
-        except (IndexError, KeyError):
-            raise StopIteration
-        self._iter_index += 1
-        return result
+
+class CompiledInputFile(object):
+    """
+        Input file parsed once to render its text for new values of its
+        variables (e.g. the input files of a sweep).
+        The lines without variables are joined once: rendering a text only
+        formats the lines of the changed variables and splices them in.
+        Input files whose variables are not defined on their own lines (XML
+        input files of nextnano.NEGF classic) are rendered completely.
+
+        ...
+
+        Parameters
+        ----------
+        inputfile : InputFile
+            loaded input file. Its current text (.lines) is the template.
+            Later changes of inputfile are not taken into account.
+
+        Attributes
+        ----------
+        inputfile : InputFile
+        variables : DictList
+            input variables of the template
+
+        Methods
+        -------
+        render(values=None, comment=None)
+            return the text of the input file with values {name: value}
+
+        save(fullpath, values=None, comment=None, overwrite=False, automkdir=True)
+            save the rendered text into a file
+
+        input_file(values=None, fullpath=None, comment=None)
+            return a copy of inputfile with the values (without parsing again)
+    """
+    def __init__(self, inputfile):
+        self.inputfile = inputfile
+        self.variables = inputfile.variables
+        self._parts = None
+        if not all('line_idx' in var.metadata for var in self.variables.values()):
+            return
+        lines = inputfile.lines
+        idxs = sorted(var.metadata['line_idx'] for var in self.variables.values())
+        positions = {idx: position for position, idx in enumerate(idxs)}
+        self._positions = {name: positions[var.metadata['line_idx']] for name, var in self.variables.items()}
+        # [text before the 1st variable, 1st variable line, text between 1st and 2nd variables, ...]
+        self._parts = []
+        self._newlines = []
+        start = 0
+        for idx in idxs:
+            self._parts.append(''.join(f'{line}\n' for line in lines[start:idx]))
+            newline = '\n' if idx < len(lines) - 1 else ''
+            self._newlines.append(newline)
+            self._parts.append(lines[idx] + newline)
+            start = idx + 1
+        self._parts.append(lines_to_text(*lines[start:]))
+
+    def variable_line(self, name, value, comment=None):
+        """Return the line of the variable name with the value (and comment if not None)"""
+        if name not in self.variables.keys():
+            raise KeyError(f'{name} is not a valid variable.')
+        var = copy.copy(self.variables[name])
+        var.value = value
+        if comment is not None:
+            var.comment = comment
+        return var.text
+
+    def render(self, values=None, comment=None):
+        """
+        Return the text of the input file with the variables {name: value}
+        (and their comment if not None). The other variables are unchanged.
+        """
+        if self._parts is None:
+            return self.input_file(values, comment=comment).text
+        parts = list(self._parts)
+        for name, value in (values or {}).items():
+            position = self._positions.get(name)
+            line = self.variable_line(name, value, comment)
+            parts[2 * position + 1] = line + self._newlines[position]
+        return ''.join(parts)
+
+    def save(self, fullpath, values=None, comment=None, overwrite=False, automkdir=True):
+        """
+        Save the text rendered with the values (see render) into a file.
+        Return the fullpath (see InputFileTemplate.save for overwrite and automkdir)
+        """
+        return savetxt(fullpath=fullpath, text=self.render(values, comment), overwrite=overwrite, automkdir=automkdir)
+
+    def input_file(self, values=None, fullpath=None, comment=None):
+        """
+        Return a copy of the input file with the variables {name: value}
+        (and their comment if not None), without loading and parsing it again.
+        The copy shares the config and raw lines of the template.
+        """
+        for name in (values or {}):
+            if name not in self.variables.keys():
+                raise KeyError(f'{name} is not a valid variable.')
+        inputfile = copy.copy(self.inputfile)
+        inputfile.execute_info = {}
+        inputfile.variables = DictList()
+        for name, var in self.variables.items():
+            var = copy.copy(var)
+            if values and name in values:
+                var.value = values[name]
+                if comment is not None:
+                    var.comment = comment
+            inputfile.variables[name] = var
+        if fullpath is not None:
+            inputfile.fullpath = fullpath
+        return inputfile
 
 
 # def decor(func):
@@ -583,6 +729,57 @@ class InputFile(InputFileTemplate):
     #     file.raw_lines = self.raw_lines
     #     return file.lines
 
+def check_async_convergence_mode(convergenceCheck, convergence_check_mode):
+    """Raise a ValueError for convergence_check_mode 'pause' (input() would block the event loop)"""
+    if convergenceCheck and convergence_check_mode == 'pause':
+        raise ValueError("convergence_check_mode 'pause' is not supported by the asyncio API, use 'terminate' or 'continue'")
+
+
+def allocate_threads(free_cores, free_slots, remaining, threads=0):
+    """
+    Return the number of threads of the next job started with a thread budget.
+
+    The free cores are shared equally between the jobs which can still start:
+    the free slots, or the remaining jobs when fewer are left, so that the last
+    jobs of a draining queue get more threads. Each job gets at least
+    threads (or 1 if threads is 0, i.e. solver default).
+    """
+    jobs = max(1, min(free_slots, remaining))
+    return max(threads, 1, free_cores // jobs)
+
+
+def thread_plan(threads, limit_parallel, cores):
+    """
+    Return the number of threads of each job executed by a queue with a
+    budget of cores, assuming that all jobs take the same time.
+
+    Parameters
+    ----------
+    threads : list of int
+        minimum number of threads of each job, in the order of execution
+        (0 means no minimum)
+    limit_parallel : int
+        maximum number of jobs executed in parallel
+    cores : int
+        total number of threads of the running jobs
+    """
+    now, plan, running = 0, [], []  # heap of (end, index, threads)
+    for i, minimum in enumerate(threads):
+        minimum = max(minimum, 1)
+        if minimum > cores:
+            raise ValueError(f'A job needs {minimum} threads, more than the {cores} cores available')
+        while running and (len(running) >= limit_parallel or cores - sum(job[2] for job in running) < minimum):
+            now = running[0][0]  # wait for the next jobs to end
+            while running and running[0][0] <= now:
+                heapq.heappop(running)
+        free_cores = cores - sum(job[2] for job in running)
+        free_slots = min(limit_parallel - len(running), free_cores // minimum)
+        n = allocate_threads(free_cores, free_slots, len(threads) - i, minimum)
+        heapq.heappush(running, (now + 1, i, n))
+        plan.append(n)
+    return plan
+
+
 class ExecutionQueue(threading.Thread):
     """
         This class take InputFiles and add them in the execution queue.
@@ -599,6 +796,13 @@ class ExecutionQueue(threading.Thread):
             Then the ExecutionQueue has to be stopped manually later (ExecutionQueue.stop())
         convergenceCheck: bool
             see convergenceCheck in InputFile
+        cores: int, optional
+            thread budget of the queue, e.g. os.cpu_count() (default: None, no budget)
+            If specified, each InputFile is executed with a 'threads' value such that
+            the threads of the running simulations never exceed cores. The threads of
+            the config (or of execution_kwargs), if not 0, are the minimum per simulation.
+            The free cores are shared by the simulations which can still start, so the
+            last simulations get more threads as the queue drains (see allocate_threads).
 
         **execution_kwargs: parameters to be taken by InputFile.execute()
 
@@ -615,6 +819,9 @@ class ExecutionQueue(threading.Thread):
         finished: list
             list of simulation_infos for finished simulations
 
+        events: queue.Queue
+            wakes up the execution thread when InputFiles are added, a simulation finishes or stop() is called
+
         stop_when_empty: bool
             see terminate_empty parameter
         daemon: bool
@@ -633,30 +840,42 @@ class ExecutionQueue(threading.Thread):
             stop the thread (once all added files are executed)
             only necessary if termanate_empty = True
 
+        metrics()
+            return throughput metrics of the queue (see ExecutionQueue.metrics)
+
+        plan()
+            return the number of threads planned for the InputFiles in the queue
+
 
         -------internal (or for advanced users)
         all_done()
             return True if all execution and logging are finished
 
         add_execution()
-            pop an InputFile from self.waiting_queue, execute and add to self.started
+            pop InputFiles from self.waiting_queue, execute and add them to self.started until it is full
 
         log_finished()
             finish logging for finished execution in self.started
 
         run()
             commands to be run upon start():
-                pop simulation from queue and execute
-                log the simulation if some are finished from self.started
+                log the simulations which are finished in self.started
+                pop simulations from queue and execute
+                wait (without polling) for the next event in self.events
             see threading.Thread.run()
 
     """
-    def __init__(self, limit_parallel : int = 1 , maxsize : int = 0, terminate_empty : bool = True, convergenceCheck = False, **execution_kwargs):
+    def __init__(self, limit_parallel : int = 1 , maxsize : int = 0, terminate_empty : bool = True, convergenceCheck = False, cores : int = None, **execution_kwargs):
         super(ExecutionQueue, self).__init__()
         self.waiting_queue = queue.Queue()#should be queue of InputFile objects
         self.started = []#should be list of execution_infos
         self.finished = []#should be list of execution_infos
+        self.events = queue.Queue()
+        self.queued_times = collections.deque()#time of add() for each InputFile in waiting_queue
+        self.start_time = None
+        self.end_time = None
         self.limit_parallel = limit_parallel
+        self.cores = cores
         self.execution_kwargs = execution_kwargs
         self.convergenceCheck = convergenceCheck
         self.stop_when_empty = terminate_empty
@@ -666,37 +885,88 @@ class ExecutionQueue(threading.Thread):
 
     def add(self,*input_files: InputFileTemplate):
         for input_file in input_files:
+            if self.cores is not None and max(self.min_threads(input_file), 1) > self.cores:
+                raise ValueError(f'{input_file.fullpath} needs more threads than the {self.cores} cores of the queue')
+            self.queued_times.append(time.perf_counter())
             self.waiting_queue.put(input_file)
+        self.events.put(None)
 
     def stop(self):
         self.stop_when_empty = True
+        self.events.put(None)
+
+    def min_threads(self, input_file):
+        """Return the minimum number of threads of an InputFile (threads of execution_kwargs or of its config)"""
+        if 'threads' in self.execution_kwargs:
+            return int(self.execution_kwargs['threads'])
+        return int(input_file.default_command_args.get('threads', 0))
 
+    @property
+    def free_cores(self):
+        return self.cores - sum(info['threads'] for info, _ in self.started)
+
+    def plan(self):
+        """
+        Return a list of (InputFile, threads) for the InputFiles in the waiting queue,
+        assuming that they are executed from an empty pool and take the same time.
+        threads is None if the queue has no thread budget (see cores).
+        """
+        input_files = list(self.waiting_queue.queue)
+        if self.cores is None:
+            return [(input_file, None) for input_file in input_files]
+        threads = [self.min_threads(input_file) for input_file in input_files]
+        return list(zip(input_files, thread_plan(threads, self.limit_parallel, self.cores)))
+
+    def next_threads(self):
+        """Return the threads of the next InputFile in the waiting queue, or None if it cannot start yet"""
+        minimum = max(self.min_threads(self.waiting_queue.queue[0]), 1)
+        free_cores = self.free_cores
+        if free_cores < minimum:
+            return None
+        free_slots = min(self.limit_parallel - len(self.started), free_cores // minimum)
+        return allocate_threads(free_cores, free_slots, self.waiting_queue.qsize(), minimum)
+
+    def wait_process(self, info):
+        """Wait for the process of a started simulation and wake up the execution thread"""
+        info['process'].wait()
+        info['end_time'] = time.perf_counter()
+        self.events.put(info)
 
     def add_execution(self):
-        if (len(self.started) < self.limit_parallel) and not self.waiting_queue.empty():
+        while (len(self.started) < self.limit_parallel) and not self.waiting_queue.empty():
+            execution_kwargs = self.execution_kwargs
+            if self.cores is not None:
+                threads = self.next_threads()
+                if threads is None:
+                    break
+                execution_kwargs = dict(execution_kwargs, threads=threads)
             input_f = self.waiting_queue.get()
+            queued_time = self.queued_times.popleft() if self.queued_times else None
             if self.limit_parallel>1:
                 input_f.__parallel__ = True
             if 'show_log' in self.execution_kwargs and not self.execution_kwargs['show_log']:
                 print(f"\nRemaining simulations in the queue: ", self.waiting_queue.qsize())
-            info = input_f.execute(**self.execution_kwargs)
+            start_time = time.perf_counter()
+            info = input_f.execute(**execution_kwargs)
+            info['threads'] = execution_kwargs.get('threads')
+            info['queued_time'] = queued_time
+            info['start_time'] = start_time
             self.started.append((info,input_f))
+            waiter = threading.Thread(target=self.wait_process, args=(info,))
+            waiter.daemon = True
+            waiter.start()
 
     def log_finished(self):
+        # 'end_time' is set by wait_process once the process has exited
         if self.limit_parallel>1:
             i = 0
             while i < len(self.started):
-                poll = self.started[i][0]['process'].poll()
-                if poll is None:
+                if 'end_time' not in self.started[i][0]:
                     i+=1
                 else:
-                    #TODO check once again del
-                    self.started[i][0]['process'].wait()
-                    tout = self.started[i][0]['tout']
-                    terr = self.started[i][0]['terr']
-                    for t in (tout, terr):
-                        t.join()
-                    self.started[i][0]['queue'].put(None)
+                    log_thread = self.started[i][0]['log_thread']
+                    if log_thread is not None:
+                        log_thread.join()
                     if self.convergenceCheck:
                         if 'convergence_check_mode' in self.execution_kwargs:
                             convergence_check_mode = self.execution_kwargs['convergence_check_mode']
@@ -710,26 +980,61 @@ class ExecutionQueue(threading.Thread):
         else:
             i = 0
             while i < len(self.started):
-                poll = self.started[i][0]['process'].poll()
-                if poll is None:
+                if 'end_time' not in self.started[i][0]:
                     i+=1
                 else:
                     self.finished.append(self.started[i][0])
                     del self.started[i]
 
     def run(self):
+        self.start_time = time.perf_counter()
+        idle = False
         while True:
-            self.add_execution()
             self.log_finished()
+            self.add_execution()
             if self.all_done():
-                print('\nWaiting queue is empty, all execution and logging are finished')
-
+                if not idle:
+                    print('\nWaiting queue is empty, all execution and logging are finished')
+                idle = True
                 if self.stop_when_empty:
                     break
-                while self.all_done() and not self.stop_when_empty:
-                    time.sleep(0.1) #to ensure switch to main thread
-                    pass
+            else:
+                idle = False
+            self.events.get()# blocks until add(), stop() or the end of a simulation
+        self.end_time = time.perf_counter()
 
+    def metrics(self):
+        """
+        Return throughput metrics of the queue as a dictionary (times in seconds):
+
+            finished, running, waiting: number of simulations
+            elapsed: time since start() (until the end of the queue, if ended)
+            throughput: finished simulations per second
+            mean_runtime: mean execution time of the finished simulations
+            mean_wait: mean time spent in the waiting queue by the started simulations
+            utilization: fraction of the time the parallel slots were busy
+        """
+        now = time.perf_counter()
+        if self.start_time is None:
+            elapsed = 0.
+        else:
+            elapsed = (self.end_time or now) - self.start_time
+        started = list(self.started)
+        finished = list(self.finished)
+        runtimes = [info['end_time'] - info['start_time'] for info in finished]
+        busy = sum(runtimes) + sum(info.get('end_time', now) - info['start_time'] for info, _ in started)
+        waits = [info['start_time'] - info['queued_time'] for info in finished + [info for info, _ in started]
+                 if info.get('queued_time') is not None]
+        return {
+            'finished': len(finished),
+            'running': len(started),
+            'waiting': self.waiting_queue.qsize(),
+            'elapsed': elapsed,
+            'throughput': len(finished) / elapsed if elapsed > 0 else 0.,
+            'mean_runtime': sum(runtimes) / len(runtimes) if runtimes else None,
+            'mean_wait': sum(waits) / len(waits) if waits else None,
+            'utilization': busy / (self.limit_parallel * elapsed) if elapsed > 0 else 0.,
+        }
 
 
 class Sweep(InputFileTemplate):
@@ -755,6 +1060,8 @@ class Sweep(InputFileTemplate):
             creates input files for all combinations of sweep variables
         execute_sweep():
             execute created input files and saves information to output folder
+        stack_sweep(file, variable, **kwargs):
+            load a variable of a data file at all the points of the executed sweep in one array
 
     """
     def __init__(self,variables_to_sweep,fullpath=None, configpath=None):
@@ -813,26 +1120,28 @@ class Sweep(InputFileTemplate):
             iteration_combinations = self._screen_variables_comb(iteration_combinations, variables_comb_screen_fn)
 
         filename_path, filename_extension = os.path.splitext(input_file_path)
+        # the input file is loaded and parsed once, only the lines of the swept variables change
+        template = InputFile(fullpath=input_file_path, configpath=self.configpath).compile()
+        comment = 'THIS VARIABLE IS UNDER SWEEP'
         for combination in iteration_combinations:
             filename_end = '__'
-            inputfile = InputFile(fullpath=input_file_path, configpath=self.configpath)
-            for var_name, var_value in zip(self.var_sweep.keys(), combination):
-                inputfile.set_variable(var_name, var_value, comment='THIS VARIABLE IS UNDER SWEEP')
+            variable_combination = dict(zip(self.var_sweep.keys(), combination))
+            for var_name, var_value in variable_combination.items():
                 if isinstance(var_value,str):
                     var_value_string = var_value
                 else:
                     var_value_string = round(var_value, round_decimal)
                 filename_end += '{}_{}_'.format(var_name, var_value_string)
             if integer_only_in_name:
-                inputfile.save(overwrite = False)
+                fullpath = template.save(input_file_path, variable_combination, comment, overwrite = False)
             else:
-                inputfile.save(filename_path + filename_end + filename_extension, overwrite = True)
-            variable_combination =  dict(zip(self.var_sweep.keys(), combination))
+                fullpath = template.save(filename_path + filename_end + filename_extension, variable_combination, comment, overwrite = True)
+            inputfile = template.input_file(variable_combination, fullpath, comment)
             self.input_files.append(inputfile)
             self.sweep_infodict[inputfile.fullpath] = variable_combination
 
 
-    def execute_sweep(self, delete_input_files = False, overwrite = False, show_log = True, convergenceCheck = False, convergence_check_mode = 'pause', parallel_limit = 1, separate_sweep_dir = True, **kwargs):
+    def execute_sweep(self, delete_input_files = False, overwrite = False, show_log = True, convergenceCheck = False, convergence_check_mode = 'pause', parallel_limit = 1, separate_sweep_dir = True, cores = None, backend = None, **kwargs):
         """
         Execute created input files and saves information to output folder.
 
@@ -856,13 +1165,87 @@ class Sweep(InputFileTemplate):
             number of simulation to run simultaniously. Espicially usefull for simple simulations which migh be more efficiently rn in parallel. Be aware that
             some nextnano solvers parallelize computations internally in threads (controlled by --threads in nextnanopy config). To avoid unexpected behaviour and
             not desirable decrease of simulation speed use the rule: parallel_limit*threads<= number of physical cores of the mahcine
+            or specify cores.
             default 1
+        cores: int, optional
+            thread budget of the sweep, e.g. the number of physical cores of the machine. If specified, each simulation is
+            executed with a number of threads such that the threads of the simulations running in parallel never exceed cores.
+            The threads in nextnanopy config (if not 0) are the minimum per simulation. The planned threads are printed before
+            the execution (see ExecutionQueue.plan()).
+            default None
+        backend: nextnanopy.backends.Backend or str, optional
+            executes the input files. None or 'local' executes them on this machine with parallel_limit and cores.
+            Other backends (see nextnanopy.backends) execute them on worker processes on other nodes (ManagerBackend)
+            or write and submit an array job for a batch scheduler (BatchBackend). The execute_info of each input file has
+            'outputdirectory', 'logfile' and 'returncode'; only the local backend has 'process'. BatchBackend returns once
+            the job is submitted: its returncodes are None and the simulations may still be pending (the job file keeps the
+            input texts, so delete_input_files is safe).
+            default None
         separate_sweep_dir: bool, optional
             if True, creates separate directory to store subdirectories of the sweep simulation. If False, stores all directories without separate directory.
             default True
         **kwargs:
             see **kwargs of InputFile.execute()
         """
+        output_directory = self._sweep_output_directory(overwrite, separate_sweep_dir, kwargs)
+        if not self.input_files:
+            warnings.warn('Nothing was executed in sweep! Input files to execute were not created.')
+            return
+
+        from nextnanopy.backends import get_backend
+
+        backend = get_backend(backend, parallel_limit = parallel_limit, cores = cores)
+        backend.run(self.input_files, output_directory, show_log = show_log, convergenceCheck = convergenceCheck, convergence_check_mode = convergence_check_mode, **kwargs)
+        self._finish_sweep(delete_input_files)
+
+    async def execute_sweep_async(self, delete_input_files = False, overwrite = False, show_log = True, convergenceCheck = False, convergence_check_mode = 'terminate', parallel_limit = 1, separate_sweep_dir = True, timeout = None, **kwargs):
+        """
+        Asynchronous generator executing the created input files in an asyncio event loop,
+        at most parallel_limit at a time, and yielding (InputFile, execution info) as
+        each simulation finishes:
+
+            from contextlib import aclosing
+
+            async with aclosing(sweep.execute_sweep_async(parallel_limit = 8)) as runs:
+                async for inputfile, info in runs:
+                    print(inputfile.fullpath, info['returncode'])
+
+        Each simulation runs with InputFile.execute_async(). If one of them fails or times out
+        (timeout in seconds, per simulation), the exception is raised in the loop and the
+        remaining simulations are cancelled. If the loop is left early (break, or an
+        exception in its body), they are cancelled only when the generator is closed:
+        by aclosing() as above, by await runs.aclose(), or else whenever it is garbage
+        collected.
+        The information of the sweep is stored once all simulations are finished.
+
+        convergence_check_mode can be 'terminate' (default) or 'continue' (see
+        InputFile.execute_async). See execute_sweep() for the other parameters.
+        """
+        check_async_convergence_mode(convergenceCheck, convergence_check_mode)
+        output_directory = self._sweep_output_directory(overwrite, separate_sweep_dir, kwargs)
+        if not self.input_files:
+            warnings.warn('Nothing was executed in sweep! Input files to execute were not created.')
+            return
+
+        semaphore = asyncio.Semaphore(parallel_limit)
+
+        async def execute(inputfile):
+            async with semaphore:
+                info = await inputfile.execute_async(outputdirectory = output_directory, show_log = show_log, convergenceCheck = convergenceCheck, convergence_check_mode = convergence_check_mode, timeout = timeout, **kwargs)
+            return inputfile, info
+
+        tasks = [asyncio.ensure_future(execute(inputfile)) for inputfile in self.input_files]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions = True)
+        self._finish_sweep(delete_input_files)
+
+    def _sweep_output_directory(self, overwrite, separate_sweep_dir, kwargs):
+        """Return the output directory of the sweep (popping 'outputdirectory' from kwargs) and create it"""
         try:
             output_directory = kwargs['outputdirectory']
             del kwargs['outputdirectory']
@@ -873,23 +1256,9 @@ class Sweep(InputFileTemplate):
             output_directory = self.sweep_output_directory
         else:
             self.sweep_output_directory = output_directory
+        return output_directory
 
-        if not self.input_files:
-            warnings.warn('Nothing was executed in sweep! Input files to execute were not created.')
-            return
-
-        #TODO: delete if statement (use execution_queue for both cases)
-        if parallel_limit>1:
-            execution_queue = ExecutionQueue(limit_parallel=parallel_limit, terminate_empty=True, outputdirectory = output_directory, show_log = show_log, convergenceCheck = convergenceCheck, convergence_check_mode = convergence_check_mode, **kwargs)
-            execution_queue.add(*self.input_files)
-            execution_queue.start()
-
-            execution_queue.join()
-        else:
-            for i, inputfile in enumerate(self.input_files):
-                if not show_log:
-                    print(f"\nExecuting simulations [{i+1}/{len(self.input_files)}]...")
-                info = inputfile.execute(outputdirectory = output_directory, show_log = show_log, convergenceCheck = convergenceCheck, convergence_check_mode = convergence_check_mode,**kwargs)
+    def _finish_sweep(self, delete_input_files):
         if delete_input_files:
             for inputfile in self.input_files:
                 inputfile.remove()
@@ -902,6 +1271,20 @@ class Sweep(InputFileTemplate):
             # self.create_infodict_files()
             self.create_infodict_json()
 
+    def stack_sweep(self, file, variable, **kwargs):
+        """
+        Load a variable of a data file at all the points of the executed sweep
+        and stack it in one array (sweep axes x data file axes).
+
+        See nextnanopy.outputs.DataFolder.stack_sweep for the parameters.
+        """
+        from nextnanopy.outputs import DataFolder
+
+        if self.sweep_output_directory is None:
+            raise ValueError('The sweep was not executed. Use execute_sweep() first')
+        kwargs.setdefault('product', self.product)
+        return DataFolder(self.sweep_output_directory).stack_sweep(file, variable, **kwargs)
+
     def create_infodict_files(self):
         """
         Creates files with variables under sweep in output directories
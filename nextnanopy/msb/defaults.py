@@ -32,6 +32,7 @@ def command_msb(
         database,
         outputdirectory,
         threads=0,
+        argv=False,
         **kwargs,
 ):
     kwargs = OrderedDict(
@@ -45,7 +46,7 @@ def command_msb(
         no_file_options=[kwargs['no_file_options'], ''] if 'no_file_options' in kwargs else ['', ''],
         inputfile=[_path(inputfile), ''],
     )
-    return generate_command(kwargs.values())
+    return generate_command(kwargs.values(), argv=argv)
 
 
 def is_msb_variable(text):
@@ -1,14 +1,13 @@
 import numpy as np
 from nextnanopy.utils.mycollections import DictList
-from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat
+from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat, dat_loader
 from nextnanopy.utils.datasets import Variable, Coord
 import re
 
 
 class DataFile(DataFileTemplate):
     def __init__(self, fullpath, **loader_kwargs):
-        super().__init__(fullpath, product="nextnano.MSB")
-        self.load()
+        super().__init__(fullpath, product="nextnano.MSB", **loader_kwargs)
 
     def get_loader(self):
         if self.extension in [".v", ".fld", ".coord"]:
@@ -20,7 +19,7 @@ class DataFile(DataFileTemplate):
                 f"Loading nextnano.MSB datafiles with extension.txt is not implemented yet"
             )
         elif self.extension == ".dat":
-            loader = Dat
+            loader = dat_loader(self.fullpath)
         else:
             raise NotImplementedError(
                 f"Loading datafile with extension {self.extension} is not implemented yet"
@@ -47,6 +47,7 @@ def command_negf_classic(
     database,
     outputdirectory,
     threads=0,
+    argv=False,
     **kwargs,
 ):
     kwargs = OrderedDict(
@@ -57,7 +58,7 @@ def command_negf_classic(
         license=[_path(license), ""],
         threads=["-threads", threads],
     )
-    return generate_command(kwargs.values())
+    return generate_command(kwargs.values(), argv=argv)
 
 
 def command_negf(
@@ -68,6 +69,7 @@ def command_negf(
     outputdirectory,
     threads=0,
     debug_ouptut_specifications=None,
+    argv=False,
     **kwargs,
 ):
     kwargs = OrderedDict(
@@ -81,7 +83,7 @@ def command_negf(
     if debug_ouptut_specifications is not None:
         kwargs["debug"] = ["--debug", debug_ouptut_specifications]
         kwargs.move_to_end("debug")
-    return generate_command(kwargs.values())
+    return generate_command(kwargs.values(), argv=argv)
 
 
 def is_negf_variable(text):
@@ -118,6 +120,7 @@ def is_negf_input_text(text):
 
 
 class InputVariable_NEGF(InputVariable):
+    __slots__ = ()
     var_char = fmt_classic["var_char"]
 
     @property
@@ -1,6 +1,6 @@
 import numpy as np
 from nextnanopy.utils.mycollections import DictList
-from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat
+from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat, dat_loader
 from nextnanopy.utils.datasets import Variable, Coord
 import re
 import os
@@ -8,8 +8,7 @@ import os
 
 class DataFile(DataFileTemplate):
     def __init__(self, fullpath, **loader_kwargs):
-        super().__init__(fullpath, product="nextnano.NEGF")
-        self.load(**loader_kwargs)
+        super().__init__(fullpath, product="nextnano.NEGF", **loader_kwargs)
 
     def get_loader(self):
         if self.extension in [".v", ".fld", ".coord"]:
@@ -21,7 +20,7 @@ class DataFile(DataFileTemplate):
                 f"Loading nextnano.NEGF datafiles with extension.txt is not implemented yet"
             )
         elif self.extension == ".dat":
-            loader = Dat
+            loader = dat_loader(self.fullpath)
         else:
             raise NotImplementedError(
                 f"Loading datafile with extension {self.extension} is not implemented yet"
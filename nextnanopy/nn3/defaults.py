@@ -52,6 +52,7 @@ def command_nn3(
         cancel=-1,
         softkill=-1,
         #system='default',          # pending change
+        argv=False,
         **kwargs,
 ):
     kwargs = OrderedDict(
@@ -67,7 +68,7 @@ def command_nn3(
         #system=['-system', system],        # pending change
         no_file_options=[kwargs['no_file_options'], ''] if 'no_file_options' in kwargs else ['', ''],
     )
-    return generate_command(kwargs.values())
+    return generate_command(kwargs.values(), argv=argv)
 
 
 def is_nn3_variable(text):
@@ -87,5 +88,6 @@ def is_nn3_input_text(text):
 
 
 class InputVariable_nn3(InputVariable):
+    __slots__ = ()
     var_char = fmt['var_char']
     com_char = fmt['com_char']
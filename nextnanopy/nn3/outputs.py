@@ -1,6 +1,6 @@
 import numpy as np
 from nextnanopy.utils.mycollections import DictList
-from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat
+from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat, dat_loader
 from nextnanopy.nn3.defaults import (
     parse_nn3_variable,
     is_nn3_variable,
@@ -8,12 +8,12 @@ from nextnanopy.nn3.defaults import (
 )
 from nextnanopy.utils.datasets import Variable, Coord
 from nextnanopy.utils.formatting import best_str_to_name_unit
+from nextnanopy.utils.misc import get_filename
 
 
 class DataFile(DataFileTemplate):
     def __init__(self, fullpath, **loader_kwargs):
-        super().__init__(fullpath, product="nextnano3")
-        self.load(**loader_kwargs)
+        super().__init__(fullpath, product="nextnano3", **loader_kwargs)
 
     def get_loader(self):
         if self.extension in [".v", ".fld", ".coord"]:
@@ -23,7 +23,7 @@ class DataFile(DataFileTemplate):
         elif self.extension == ".txt":
             loader = self._find_txt_loader()
         elif self.extension == ".dat":
-            loader = Dat
+            loader = dat_loader(self.fullpath)
         else:
             raise NotImplementedError(
                 f"Loading datafile with extension {self.extension} is not implemented yet"
@@ -42,8 +42,17 @@ class DataFile(DataFileTemplate):
         return loader
 
 
+def is_nn3_variables_header(fullpath, header):
+    if get_filename(fullpath, ext=False) not in ["variables_input", "variables_database"]:
+        return False
+    lines = header.decode("ascii", errors="ignore").splitlines()
+    if lines and lines[0].startswith("!"):
+        return True
+    return any(is_nn3_variable(line) for line in lines)
+
+
 class InputVariables(Output):
-    def __init__(self, fullpath):
+    def __init__(self, fullpath, **loader_kwargs):
         super().__init__(fullpath)
         self.load()
 
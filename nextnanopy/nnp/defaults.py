@@ -33,6 +33,7 @@ def command_nnp(
         database,
         outputdirectory,
         threads=0,
+        argv=False,
         **kwargs,
 ):
     kwargs = OrderedDict(
@@ -46,7 +47,7 @@ def command_nnp(
         no_file_options=[kwargs['no_file_options'], ''] if 'no_file_options' in kwargs else ['', ''],
         inputfile=[_path(inputfile), ''],
     )
-    return generate_command(kwargs.values())
+    return generate_command(kwargs.values(), argv=argv)
 
 
 def is_nnp_variable(text):
@@ -65,5 +66,6 @@ def is_nnp_input_text(text):
     return pattern_in_text(text, fmt['input_pattern'])
 
 class InputVariable_nnp(InputVariable):
+    __slots__ = ()
     var_char = fmt['var_char']
     com_char = fmt['com_char']
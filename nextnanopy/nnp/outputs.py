@@ -1,6 +1,6 @@
 import numpy as np
 from nextnanopy.utils.mycollections import DictList
-from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat
+from nextnanopy.outputs import Output, AvsAscii, Vtk, DataFileTemplate, Dat, is_column_header, dat_loader
 from nextnanopy.nnp.defaults import (
     parse_nnp_variable,
     is_nnp_variable,
@@ -8,13 +8,13 @@ from nextnanopy.nnp.defaults import (
 )
 from nextnanopy.utils.datasets import Variable, Coord
 from nextnanopy.utils.formatting import best_str_to_name_unit
+from nextnanopy.utils.misc import get_filename
 from functools import partial
 
 
 class DataFile(DataFileTemplate):
     def __init__(self, fullpath, **loader_kwargs):
-        super().__init__(fullpath, product="nextnano++")
-        self.load(**loader_kwargs)
+        super().__init__(fullpath, product="nextnano++", **loader_kwargs)
 
     def get_loader(self):
         if self.extension in [".v", ".fld", ".coord"]:
@@ -24,7 +24,7 @@ class DataFile(DataFileTemplate):
         elif self.extension == ".txt":
             loader = self._find_txt_loader()
         elif self.extension == ".dat":
-            loader = Dat
+            loader = dat_loader(self.fullpath)
         else:
             raise NotImplementedError(
                 f"Loading datafile with extension {self.extension} is not implemented yet"
@@ -43,6 +43,21 @@ class DataFile(DataFileTemplate):
         return loader
 
 
+def is_nnp_variables_header(fullpath, header):
+    return get_filename(fullpath, ext=False) in ["variables_input", "variables_database"]
+
+
+def is_total_charges_header(fullpath, header):
+    return get_filename(fullpath, ext=False) == "total_charges"
+
+
+def is_txt_columns_header(fullpath, header):
+    special_files = ["variables_input", "variables_database", "total_charges", "materials"]
+    if get_filename(fullpath, ext=False) in special_files:
+        return False
+    return is_column_header(fullpath, header)
+
+
 class InputVariables(Output):
     def __init__(self, fullpath, **loader_kwargs):
         super().__init__(fullpath)
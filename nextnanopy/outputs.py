@@ -1,10 +1,21 @@
 import json
 import os
-from itertools import islice
+import contextlib
+import base64
+import zlib
+import lzma
+import xml.etree.ElementTree as ET
+import shutil
+import hashlib
+import time
 import numpy as np
-import struct
 import warnings
 import re
+import fnmatch
+import concurrent.futures
+from functools import partial
+from itertools import islice
+from pathlib import Path
 
 from nextnanopy.utils.datasets import Variable, Coord
 from nextnanopy.utils.mycollections import DictList
@@ -12,8 +23,6 @@ from nextnanopy.utils.formatting import best_str_to_name_unit
 from nextnanopy.utils.misc import get_filename, message_decorator, start_with_choice
 from nextnanopy import defaults
 
-import pyvista as pv
-
 
 _msgs = defaults.messages["load_output"]
 load_message = lambda method: message_decorator(
@@ -37,6 +46,99 @@ def displayname(data):
         return os.path.basename(data)
 
 
+class FileIndex(object):
+    """
+    Index of file paths by basename, extension and name tokens.
+
+    A query is evaluated once per distinct basename (in a sweep output tree,
+    the same names are repeated in every folder) and its result is cached, so
+    that repeating a query costs O(matches).
+
+    Parameters
+    ----------
+    files : list of str
+        paths to the files, in the order of the results
+
+    Attributes
+    ----------
+    files : list of str
+    names : dict
+        basename: positions in files
+    extensions : dict
+        extension (with the dot): basenames
+    tokens : dict
+        token (see tokenize): basenames
+
+    Methods
+    -------
+    find(template, match='substring')
+        return the files which basename matches template
+        match: 'substring', 'exact', 'extension', 'token', 'glob' or 'regex'
+        (a compiled regular expression is always matched as 'regex')
+    find_multiple(templates, match='substring')
+        return the files which basename matches all templates
+    """
+
+    matches = ("substring", "exact", "extension", "token", "glob", "regex")
+
+    def __init__(self, files):
+        self.files = list(files)
+        self.names = {}
+        self.extensions = {}
+        self.tokens = {}
+        for i, file in enumerate(self.files):
+            self.names.setdefault(os.path.basename(file), []).append(i)
+        for name in self.names:
+            self.extensions.setdefault(os.path.splitext(name)[-1], []).append(name)
+            for token in set(self.tokenize(name)):
+                self.tokens.setdefault(token, []).append(name)
+        self._cache = {}
+
+    @staticmethod
+    def tokenize(name):
+        """Split a filename into words and numbers: 'bandedges_2d.fld' -> ['bandedges', '2d', 'fld']"""
+        return [token for token in re.split(r"[^0-9a-zA-Z]+", name) if token]
+
+    def match_names(self, template, match="substring"):
+        """Return the indexed basenames matching template"""
+        if isinstance(template, re.Pattern):
+            match = "regex"
+        key = (match, template)
+        if key not in self._cache:
+            self._cache[key] = self._match_names(template, match)
+        return self._cache[key]
+
+    def _match_names(self, template, match):
+        if match == "substring":
+            return [name for name in self.names if template in name]
+        elif match == "exact":
+            return [template] if template in self.names else []
+        elif match == "extension":
+            return self.extensions.get(template, [])
+        elif match == "token":
+            return self.tokens.get(template, [])
+        elif match == "glob":
+            return fnmatch.filter(self.names, template)
+        elif match == "regex":
+            pattern = re.compile(template)
+            return [name for name in self.names if pattern.search(name)]
+        else:
+            raise ValueError(f"match must be one of {self.matches}, not {match}")
+
+    def find(self, template, match="substring"):
+        return self.find_multiple([template], match=match)
+
+    def find_multiple(self, templates, match="substring"):
+        names = None
+        for template in templates:
+            matched = set(self.match_names(template, match=match))
+            names = matched if names is None else names & matched
+        if names is None:
+            return list(self.files)
+        positions = sorted(i for name in names for i in self.names[name])
+        return [self.files[i] for i in positions]
+
+
 class DataFolder(object):
     """
     This class stores information about output directory.
@@ -72,11 +174,22 @@ class DataFolder(object):
     files: list
         paths to files in folder
 
+    entries: DictList
+        os.DirEntry objects of the files and subfolders (their stat() is cached)
+
+    loaded: bool
+        False until the folder is listed.
+        Only the folder given at initialization is listed immediately, subfolders
+        are listed on first access (files, folders, navigation, find(deep=True), ...)
+
 
     Methods:
     --------------
     load():
-        load a DataFolder
+        list the folder (os.scandir)
+
+    refresh():
+        list the folder again. Subfolders will be listed again on first access
 
     create_navigation:
         creates attributes for navigation like DataFolder.subfolder1.subfolder2.subfolder3
@@ -84,13 +197,20 @@ class DataFolder(object):
         if name of subfolder constis spaces, dots or specials charecters, attribute will be created, but navigation
         to whis subfolder will not work  - attribute error.
 
-    find(template, deep = False):
+    find(template, deep = False, match = 'substring'):
         searches for a files which names contain template.
         template shoud be string.
         if deep = True, searches in subfolders as well.
+        match = 'exact', 'extension', 'token', 'glob' or 'regex' changes how
+        template is matched (see FileIndex).
+        The names are indexed on the first search and the index is reused
+        until refresh() is called.
 
         return: list of files
 
+    index(deep = False):
+        return the FileIndex of the files (including subfolders if deep = True)
+
     go_to(*args):
         goes to the location
         DataFolder_path\\arg1\\arg2\\arg3...
@@ -102,30 +222,108 @@ class DataFolder(object):
 
     filenames()
         return filenames of files in folder
+
+    load_all(template='', product=None, workers=None, backend='thread', deep=True, **loader_kwargs):
+        loads the files which names contain template (see find) concurrently.
+
+        return: DictList {filepath: DataFile}
+        the files which could not be loaded are stored in .load_errors
+        {filepath: exception}
+
+    stack_sweep(file, variable, product=None, workers=None, backend='thread', xarray=False, **loader_kwargs):
+        loads a variable of a data file at all the points of a sweep output
+        folder concurrently and returns it stacked in one array
+        (sweep axes x data file axes), see SweepVariable.
+
+    to_hdf5(filepath, product=None, compress=True, **loader_kwargs):
+    to_zarr(filepath, product=None, compress=True, **loader_kwargs):
+        stores the whole folder (data files, other files like
+        sweep_infodict.json, subfolders) in one HDF5 or Zarr archive.
+        DataFolder(filepath) lists the archive (see ArchiveFolder).
     """
 
+    def __new__(cls, fullpath=None, *args, **kwargs):
+        if cls is DataFolder and fullpath is not None and split_archive_path(fullpath)[0]:
+            cls = ArchiveFolder
+        return super().__new__(cls)
+
     def __init__(self, fullpath):
         if not os.path.isdir(fullpath):
             raise ValueError(f"{fullpath} is not a directory")
+        self._init_attributes(fullpath)
+        self.load()
+
+    def _init_attributes(self, fullpath):
         self.fullpath = fullpath
-        self.files = []
-        self.folders = DictList()
+        self.load_errors = {}
+        self.entries = DictList()
+        self._files = []
+        self._folders = DictList()
+        self._navigation = []
+        self._indexes = {}
+        self.loaded = False
+
+    @classmethod
+    def _subfolder(cls, fullpath):
+        """Return the DataFolder of an existing directory without listing it"""
+        folder = cls.__new__(cls)
+        folder._init_attributes(fullpath)
+        return folder
+
+    @property
+    def files(self):
+        if not self.loaded:
+            self.load()
+        return self._files
+
+    @files.setter
+    def files(self, files):
+        self._files = files
+
+    @property
+    def folders(self):
+        if not self.loaded:
+            self.load()
+        return self._folders
+
+    @folders.setter
+    def folders(self, folders):
+        self._folders = folders
+
+    def __getattr__(self, name):
+        # the navigation attributes of a subfolder are created when it is listed
+        if name.startswith("_") or self.__dict__.get("loaded", True):
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute '{name}'"
+            )
         self.load()
-        self.create_navigation()
+        return getattr(self, name)
 
     def load(self):
-        list_of_nodes = sorted(os.listdir(self.fullpath))
-        for node in list_of_nodes:
-            node_path = os.path.join(self.fullpath, node)
-            if os.path.isdir(node_path):
-                new_folder = DataFolder(node_path)
-                self.folders[node] = new_folder
+        with os.scandir(self.fullpath) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        self.entries = DictList()
+        self._files = []
+        self._folders = DictList()
+        self._indexes = {}
+        for entry in entries:
+            self.entries[entry.name] = entry
+            if entry.is_dir():
+                self._folders[entry.name] = self._subfolder(entry.path)
             else:
-                self.files.append(node_path)
+                self._files.append(entry.path)
+        self.loaded = True
+        self.create_navigation()
+
+    def refresh(self):
+        for key in self._navigation:
+            self.__dict__.pop(key, None)
+        self._navigation = []
+        self.load()
 
     def create_navigation(self):
-        check_list = dir(self)
-        for key, folder in self.folders.items():
+        check_list = set(dir(type(self))) | set(self.__dict__)
+        for key, folder in self._folders.items():
             if key in check_list:
                 warnings.warn(
                     f"foldername '{key}' is not availabel for attribute navigation."
@@ -133,35 +331,31 @@ class DataFolder(object):
                 )
             else:
                 setattr(self, key, folder)
+                self._navigation.append(key)
 
-    def find(self, template, deep=False):
-        list_of_files = [
-            file for file in self.files if template in os.path.basename(file)
-        ]
-        if not deep:
-            return list_of_files
-        if not self.folders:
-            return list_of_files
-        else:
-            for folder in self.folders:
-                list_of_files += folder.find(template=template, deep=deep)
-            return list_of_files
-
-    def find_multiple(self, templates, deep=False):
-        list_of_files = []
+    def index(self, deep=False):
+        deep = bool(deep)
+        if deep not in self._indexes:
+            files = self._deep_files() if deep else self.files
+            self._indexes[deep] = FileIndex(files)
+        return self._indexes[deep]
 
-        for file in self.files:
-            if all(keyword in os.path.basename(file) for keyword in templates):
-                list_of_files.append(file)
+    def _deep_files(self):
+        files = list(self.files)
+        for folder in self.folders.values():
+            files += folder._deep_files()
+        return files
 
-        if deep and self.folders:
-            for folder in self.folders:
-                list_of_files += folder.find_multiple(templates=templates, deep=deep)
+    def find(self, template, deep=False, match="substring"):
+        return self.index(deep=deep).find(template, match=match)
 
-        return list_of_files
+    def find_multiple(self, templates, deep=False, match="substring"):
+        return self.index(deep=deep).find_multiple(templates, match=match)
 
     def file(self, filename):
-        matched_files = self.find(template=filename, deep=False)
+        matched_files = self.index().find(filename, match="exact")
+        if not matched_files:
+            matched_files = self.find(template=filename, deep=False)
         if not matched_files:
             raise ValueError(
                 f"No file with filename {filename} in directory {self.fullpath}"
@@ -174,7 +368,220 @@ class DataFolder(object):
             )
             return matched_files[0]
 
+    def load_all(
+        self,
+        template="",
+        product=None,
+        workers=None,
+        backend="thread",
+        deep=True,
+        **loader_kwargs,
+    ):
+        """
+        Load the files which names contain template concurrently.
+
+        Parameters
+        ----------
+        template : str or list of str
+            see find (find_multiple for a list)
+        product : str
+            passed to DataFile (default: None, the format is autodetected)
+        workers : int
+            maximum number of threads or processes (default: None, see
+            concurrent.futures)
+        backend : str
+            'thread' or 'process'. With 'process', the DataFiles are loaded in
+            separate processes and sent back, which bypasses the GIL for the
+            parsing of ascii files.
+        deep : bool
+            search in subfolders as well (default: True)
+        **loader_kwargs
+            passed to DataFile
+
+        Returns
+        -------
+        DictList {filepath: DataFile}
+            in the same order as the files found. A file which can not be
+            loaded does not abort the others, its exception is stored in
+            .load_errors {filepath: exception}
+        """
+        executor = make_executor(backend, workers)
+        if isinstance(template, str):
+            files = self.find(template, deep=deep)
+        else:
+            files = self.find_multiple(template, deep=deep)
+
+        datafiles = DictList()
+        self.load_errors = {}
+        with executor:
+            futures = [
+                executor.submit(_load_datafile, file, product, loader_kwargs)
+                for file in files
+            ]
+            for file, future in zip(files, futures):
+                error = future.exception()
+                if error is None:
+                    datafiles[file] = future.result()
+                else:
+                    self.load_errors[file] = error
+        if self.load_errors:
+            warnings.warn(
+                f"{len(self.load_errors)} of {len(files)} files could not be loaded. See DataFolder.load_errors"
+            )
+        return datafiles
+
+    def stack_sweep(
+        self,
+        file,
+        variable,
+        product=None,
+        workers=None,
+        backend="thread",
+        xarray=False,
+        **loader_kwargs,
+    ):
+        """
+        Load a variable of a data file at all the points of a sweep output
+        folder (see read_sweep_infodict) concurrently and stack it in one array.
+
+        Parameters
+        ----------
+        file : str
+            path of the data file relative to the folder of each sweep point,
+            e.g. 'bandedges.dat' or 'bias_00000/bandedges.dat'
+        variable : str
+            name of the variable
+        product : str
+            passed to DataFile (default: None, the format is autodetected)
+        workers : int
+            maximum number of threads or processes (default: None)
+        backend : str
+            'thread' or 'process' (see load_all)
+        xarray : bool
+            return a xarray.DataArray instead (xarray is required, default: False)
+        **loader_kwargs
+            passed to DataFile. lazy is True by default: only the variable is read
+
+        Returns
+        -------
+        SweepVariable (or xarray.DataArray)
+            the variable of shape (sweep axes..., data file axes...), with the
+            sweep variables and the coordinates of the data file as coordinates.
+            The points which are not in the sweep or could not be loaded are
+            NaN, their exceptions are stored in .load_errors {filepath: exception}
+        """
+        infodict = self.read_sweep_infodict()
+        names, axes, indexes = sweep_grid(infodict)
+        loader_kwargs.setdefault("lazy", True)
+        shape = tuple(len(values) for values in axes)
+        folders = np.full(shape, None, dtype=object)
+        for key, index in indexes.items():
+            # the output folders in sweep_infodict.json are absolute paths
+            name = key.replace("\\", "/").rstrip("/").split("/")[-1]
+            folders[index] = os.path.join(self.fullpath, name) if name in self.folders.keys() else key
+
+        self.load_errors = {}
+        points = [(os.path.join(folders[index], file), index) for index in indexes.values()]
+        datafile = None
+        while points and datafile is None:  # the first point gives the coordinates
+            fullpath, index = points.pop(0)
+            try:
+                datafile = DataFile(fullpath, product=product, **loader_kwargs)
+                value = np.asarray(datafile.variables[variable].value)
+            except Exception as error:
+                datafile = None
+                self.load_errors[fullpath] = error
+        if datafile is None:
+            raise ValueError(f"{variable} of {file} could not be loaded at any sweep point")
+
+        stacked = SweepVariable(self.fullpath, variable, names)
+        stacked.metadata = {"file": file, "folders": folders}
+        for dim, (name, values) in enumerate(zip(names, axes)):
+            stacked.coords[name] = Coord(name=name, value=values, dim=dim)
+        for coord in datafile.coords.values():
+            stacked.coords[coord.name] = Coord(
+                name=coord.name, value=coord.value, dim=len(names) + coord.dim, unit=coord.unit
+            )
+        var = datafile.variables[variable]
+        result = np.full(shape + value.shape, np.nan, dtype=np.result_type(value.dtype, float))
+        result[index] = value
+        stacked.variables[variable] = Variable(name=var.name, value=result, unit=var.unit)
+        del datafile
+
+        with make_executor(backend, workers) as executor:
+            futures = {
+                executor.submit(_load_variable, fullpath, variable, product, loader_kwargs): (fullpath, index)
+                for fullpath, index in points
+            }
+            for future in concurrent.futures.as_completed(futures):
+                fullpath, index = futures[future]
+                try:
+                    result[index] = future.result()
+                except Exception as error:
+                    self.load_errors[fullpath] = error
+        if self.load_errors:
+            warnings.warn(
+                f"{len(self.load_errors)} of {len(indexes)} sweep points could not be loaded. See DataFolder.load_errors"
+            )
+        if xarray:
+            return stacked.to_xarray()
+        return stacked
+
+    def to_hdf5(self, filepath, product=None, compress=True, **loader_kwargs):
+        """
+        Store the folder and its subfolders in an HDF5 archive (h5py is
+        required). See to_archive.
+        """
+        return self.to_archive(filepath, "hdf5", product, compress, **loader_kwargs)
+
+    def to_zarr(self, filepath, product=None, compress=True, **loader_kwargs):
+        """
+        Store the folder and its subfolders in a Zarr archive (zarr is
+        required). See to_archive.
+        """
+        return self.to_archive(filepath, "zarr", product, compress, **loader_kwargs)
+
+    def to_archive(self, filepath, format=None, product=None, compress=True, **loader_kwargs):
+        """
+        Store the folder and its subfolders in one HDF5 or Zarr archive.
+
+        Parameters
+        ----------
+        filepath : str
+            path to the archive (.h5, .hdf5 or .zarr)
+        format : str
+            'hdf5' or 'zarr' (default: None, from the extension of filepath)
+        product : str
+            passed to DataFile to load the data files (default: None)
+        compress : bool
+            compress the datasets (default: True)
+        **loader_kwargs
+            passed to DataFile
+
+        Returns
+        -------
+        ArchiveFolder of the archive.
+        The data files are stored with their coordinates and variables (one
+        dataset each) and the other files as they are. The errors of the files
+        which could not be loaded are stored in .load_errors {filepath: exception}
+        """
+        self.load_errors = write_archive(
+            self, filepath, format=format, product=product, compress=compress, **loader_kwargs
+        )
+        if self.load_errors:
+            warnings.warn(
+                f"{len(self.load_errors)} files could not be loaded and are stored as they are. See DataFolder.load_errors"
+            )
+        return ArchiveFolder(filepath)
+
     def go_to(self, *args):
+        folder = self
+        for arg in args:
+            if arg not in folder.folders.keys():
+                break
+            folder = folder.folders[arg]
+        else:
+            return folder  # already listed subfolder
         path = os.path.join(self.fullpath, *args)
         if os.path.isdir(path):
             data = DataFolder(path)
@@ -239,6 +646,20 @@ class DataFolder(object):
         return infodict
 
 
+def make_executor(backend="thread", workers=None):
+    """Return a ThreadPoolExecutor ('thread') or ProcessPoolExecutor ('process')"""
+    if backend == "thread":
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    elif backend == "process":
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"backend must be 'thread' or 'process', not {backend}")
+
+
+def _load_datafile(fullpath, product, loader_kwargs):
+    """Worker of DataFolder.load_all (has to be picklable for processes)"""
+    return DataFile(fullpath, product=product, **loader_kwargs)
+
+
 class Output(object):
 
     def __init__(self, fullpath, **loader_kwargs):
@@ -263,6 +684,10 @@ class Output(object):
     def extension(self):
         return os.path.splitext(self.fullpath)[-1]
 
+    def source_files(self):
+        """Return the paths of the files the data is read from"""
+        return [str(self.fullpath)]
+
     @property
     def data(self):
         dl = DictList()
@@ -309,16 +734,7 @@ class Output(object):
         return out
 
     def __iter__(self):
-        self._iter_index = 0
-        return self
-
-    def __next__(self):
-        try:
-            result = self.data.__getitem__(self._iter_index)
-        except (IndexError, KeyError):
-            raise StopIteration
-        self._iter_index += 1
-        return result
+        return iter(self.data.values())
 
 
 class DataFileTemplate(Output):
@@ -337,6 +753,29 @@ class DataFileTemplate(Output):
     ----------
     fullpath : str
         path to the file.
+    **loader_kwargs
+        passed to the loader. For example:
+        lazy : bool
+            if True, only the headers are read and the values of each coordinate
+            and variable are read on first access (AVS and .dat files)
+        on_load : method
+            on_load(dataset) is called each time a lazy value is read.
+            It can be used to evict other values with .unload()
+        mmap : bool
+            memory-map binary AVS data (default: True)
+        layout : str
+            memory layout of the variables of AVS, VTK and archive files: 'C'
+            or 'F' (Fortran) contiguous, copied at most once. None keeps the
+            layout of the file without copy (default: None)
+    instrument : bool
+        if True, .load_info is also stored in .metadata['load_info'] (default: False)
+    cache : bool or str
+        if True (or the path to a cache folder), the parsed data is stored on
+        disk and loaded from there (memory-mapped) next time, as long as the
+        size and modification time of the files did not change.
+        The values of a lazy DataFile are all read to be stored.
+        True uses defaults.cache_default_path. None uses outputs.default_cache
+        (default: None, which is False)
 
 
     Attributes
@@ -361,6 +800,11 @@ class DataFileTemplate(Output):
         folder of the fullpath
     product : str
         flag about nextnano product to help to find the best loading routine
+    load_info : dict
+        information about the last load: name of the loader ('loader'),
+        files the data is read from ('files'), their size in bytes ('nbytes')
+        and the loading time in seconds ('time').
+        With cache, 'cache' is True if the data was loaded from the cache
 
 
     Methods
@@ -374,11 +818,19 @@ class DataFileTemplate(Output):
     get_variable(name)
         equivalent to self.variables[name]
 
+    unload()
+        free the values of lazy coordinates and variables
+
     """
 
-    def __init__(self, fullpath, product=None, **loader_kwargs):
+    def __init__(
+        self, fullpath, product=None, instrument=False, cache=None, **loader_kwargs
+    ):
         super().__init__(fullpath)
         self.product = product
+        self.instrument = instrument
+        self.cache = cache
+        self.load_info = {}
         self.load(**loader_kwargs)
 
     @load_message
@@ -387,9 +839,44 @@ class DataFileTemplate(Output):
         Find the loader and update the stored information with the loaded data
         """
         loader = self.get_loader()
+        start = time.perf_counter()
+        folder = cache_folder(self.cache)
+        if loader is Archive:
+            folder = None  # already binary, no need to cache
+        if folder is not None:
+            key = cache_key(self.fullpath, loader, self.product, **loader_kwargs)
+            cached = load_cache(folder, key)
+            if cached is not None:
+                self.metadata = cached["metadata"]
+                self.coords = cached["coords"]
+                self.variables = cached["variables"]
+                self._set_load_info(cached["loader"], cached["files"], start, cache=True)
+                return
         df = loader(self.fullpath, **loader_kwargs)
         self.update_with_datafile(df)
+        if isinstance(df, DataFileTemplate):
+            self.load_info = dict(df.load_info)
+            self.load_info["time"] = time.perf_counter() - start
+            if self.instrument:
+                self.metadata["load_info"] = self.load_info
+        else:
+            self._set_load_info(loader, df.source_files(), start)
         del df
+        if folder is not None and not hasattr(self, "vtk"):  # .vtk can not be cached
+            self.load_info["cache"] = False
+            if not save_cache(folder, key, self, files=self.load_info["files"]):
+                warnings.warn(f"The data of {self.filename} can not be cached")
+
+    def _set_load_info(self, loader, files, start, **info):
+        self.load_info = {
+            "loader": loader_name(loader),
+            "files": files,
+            "nbytes": sum(os.path.getsize(file) for file in files),
+            **info,
+            "time": time.perf_counter() - start,
+        }
+        if self.instrument:
+            self.metadata["load_info"] = self.load_info
 
     def update_with_datafile(self, datafile):
         """
@@ -410,6 +897,17 @@ class DataFileTemplate(Output):
     def get_loader(self):
         pass
 
+    def source_files(self):
+        return list(self.load_info.get("files", super().source_files()))
+
+    def unload(self):
+        """
+        Free the values of the lazy coordinates and variables.
+        They will be read again on next access.
+        """
+        for data in self.data.values():
+            data.unload()
+
     def export(self, filename, format):
         raise NotImplementedError("Exporters are not implemented yet")
 
@@ -421,6 +919,8 @@ class DataFile(DataFileTemplate):
         )  # **loader_kwargs) #, FirstVarIsCoordFlag = False
 
     def get_loader(self):
+        if split_archive_path(self.fullpath)[0] is not None:
+            return Archive
         if self.product:
             loader = defaults.get_DataFile(self.product)
         else:
@@ -434,23 +934,11 @@ class DataFile(DataFileTemplate):
         return loader
 
     def find_loader(self):
-        from nextnanopy.nnp.outputs import DataFile as DataFile_nnp
-        from nextnanopy.nn3.outputs import DataFile as DataFile_nn3
-        from nextnanopy.negf.outputs import DataFile as DataFile_negf
-        from nextnanopy.msb.outputs import DataFile as DataFile_msb
-
-        Dats = [DataFile_nn3, DataFile_nnp, DataFile_negf, DataFile_msb]
-        for Dati in Dats:
-            try:
-                df = Dati(self.fullpath)
-                if "" in df.variables.keys():
-                    continue
-                else:
-                    break
-            except:
-                pass
-        loader = Dati
-        return loader
+        """
+        Return the registered loader matching the extension and the header of
+        the file (see register_loader and sniff_loader)
+        """
+        return sniff_loader(self.fullpath)
 
     def plot(self, legend=False, y_axis_name="", subplots=False):
         import matplotlib.pyplot as plt
@@ -534,7 +1022,7 @@ class DataFile(DataFileTemplate):
             )
         return fig, ax
 
-    def save(self, filepath, format="dat"):
+    def save(self, filepath, format="dat", compress=False, encoding="raw"):
         """
         Save the data from the DataFile instance to a specified file in various formats.
 
@@ -545,6 +1033,18 @@ class DataFile(DataFileTemplate):
                 - 'dat' (for 1D files): Data is saved in a plain text format (.dat) with whitespace-separated values.
                 - 'VTKAscii' (for 2D/3D files): Data is saved in VTK ASCII format (.vtk) suitable for visualization tools.
                 - 'AvsAscii_one_file' (for 2D/3D files): Data is saved in AVS/Express ASCII format (.fld) for AVS/Express software.
+                - 'AvsBinary' (for 1D/2D/3D files): Data is saved in AVS/Express format: header (.fld), raw binary
+                  values (.v) and ascii coordinates (.coord) with the same name.
+                - 'AvsBinary_one_file' (for 2D/3D files): Data is saved in a single AVS/Express file (.fld) with
+                  ascii coordinates and raw binary values, like nextnano outputs.
+                - 'VTKBinary' (for 1D/2D/3D files): Data is saved in VTK XML format (.vtr) with inline base64 binary arrays.
+                - 'VTKAppended' (for 1D/2D/3D files): Data is saved in VTK XML format (.vtr) with the binary arrays
+                  appended at the end of the file (the smallest and fastest format).
+                - 'hdf5' / 'zarr' (for any file): Data is saved in an HDF5 (.h5) or Zarr (.zarr) archive with one
+                  chunked dataset per coordinate and variable (h5py or zarr is required). It can be loaded with DataFile.
+            compress (bool, optional): For 'VTKBinary' and 'VTKAppended', compress the arrays with zlib.
+                For 'hdf5' and 'zarr', compress the datasets. Default is False.
+            encoding (str, optional): For 'VTKAppended', 'raw' (default) or 'base64' encoding of the appended data.
 
         Raises:
             NotImplementedError: If the provided 'format' is not supported for saving.
@@ -553,15 +1053,28 @@ class DataFile(DataFileTemplate):
             - For the 'dat' format, the DataFile instance should be one-dimensional (ndim=1).
             - The 'VTKAscii' format requires 'nextnanopy.utils.formatting' module for creating the VTK header.
             - The 'AvsAscii_one_file' format requires the 'write_avsascii_one_file' function.
+            - The 'AvsBinary' format requires the 'write_avsbinary' function.
 
         Example:
             # Assuming `data_file` is an instance of the `DataFile` class
             data_file.save('data_file.dat', format='dat')  # Save data in .dat format
             data_file.save('data_file.vtk', format='VTKAscii')  # Save data in VTK ASCII format
             data_file.save('data_file.fld', format='AvsAscii_one_file')  # Save data in AVS/Express ASCII format
+            data_file.save('data_file.vtr', format='VTKAppended', compress=True)  # Save data in compressed binary VTK format
+            data_file.save('data_file.fld', format='AvsBinary')  # Save data in AVS/Express binary format
+            data_file.save('data_file.h5', format='hdf5', compress=True)  # Save data in a compressed HDF5 archive
         """
-        # TODO  and AvsBinary (.fld)
-        accepted_format = ["dat", "VTKAscii", "AvsAscii_one_file"]
+        accepted_format = [
+            "dat",
+            "VTKAscii",
+            "VTKBinary",
+            "VTKAppended",
+            "AvsAscii_one_file",
+            "AvsBinary",
+            "AvsBinary_one_file",
+            "hdf5",
+            "zarr",
+        ]
         if format not in accepted_format:
             raise NotImplementedError(f"{format} format is not supported for saving")
         if format == "dat":
@@ -629,16 +1142,133 @@ class DataFile(DataFileTemplate):
                             </RectilinearGrid>
                             </VTKFile>"""
                 file.write(footer)
+        elif format in ["VTKBinary", "VTKAppended"]:
+            write_vtk_binary(
+                coordinates=list(self.coords.values()),
+                variables=list(self.variables.values()),
+                filename=filepath,
+                appended=format == "VTKAppended",
+                encoding=encoding,
+                compress=compress,
+            )
         elif format == "AvsAscii_one_file":
             write_avsascii_one_file(
                 coordinates=self.coords, variables=self.variables, filename=filepath
             )
+        elif format == "AvsBinary_one_file":
+            write_avsascii_one_file(
+                coordinates=self.coords,
+                variables=self.variables,
+                filename=filepath,
+                binary=True,
+            )
+        elif format == "AvsBinary":
+            write_avsbinary(
+                coordinates=self.coords, variables=self.variables, filename=filepath
+            )
+        elif format in ["hdf5", "zarr"]:
+            with open_archive(filepath, mode="w", format=format) as root:
+                write_archive_datafile(root, self, compress=compress)
         self.filepath = filepath
 
 
+class SweepVariable(Output):
+    """
+    A variable of a data file stacked across the points of a sweep, see
+    DataFolder.stack_sweep.
+
+    Attributes
+    ----------
+    coords : DictList
+        the sweep variables (dim 0 to n-1, in the order of the sweep) followed
+        by the coordinates of the data file (dim n, n+1, ...)
+    variables : DictList
+        the stacked Variable, of shape (sweep axes..., data file axes...).
+        The values of the points which could not be loaded are NaN.
+    metadata : dict
+        'file': path of the data file relative to the point folders,
+        'folders': folder of each sweep point (None if not in the sweep),
+        as an array of the shape of the sweep axes
+    sweep_variables : list
+        names of the sweep variables
+
+    Methods
+    -------
+    to_xarray()
+        return the variable as xarray.DataArray (xarray is required)
+    """
+
+    def __init__(self, fullpath, variable, sweep_variables, **kwargs):
+        super().__init__(fullpath)
+        self.variable = variable
+        self.sweep_variables = sweep_variables
+
+    def to_xarray(self):
+        import xarray  # optional dependency
+
+        variable = self.variables[self.variable]
+        coords = sorted(self.coords.values(), key=lambda coord: coord.dim)
+        dims = [coord.name for coord in coords]
+        return xarray.DataArray(
+            variable.value,
+            coords={coord.name: (coord.name, coord.value, {"unit": coord.unit}) for coord in coords},
+            dims=dims,
+            name=variable.name,
+            attrs={"unit": variable.unit},
+        )
+
+
+def sweep_grid(infodict):
+    """
+    Return the names of the sweep variables, their values (in order of first
+    appearance) and the index of each point of infodict
+    {point folder: {sweep variable: value}} in the grid of these values.
+    """
+    names = []
+    for combination in infodict.values():
+        names += [name for name in combination.keys() if name not in names]
+    axes = {name: [] for name in names}
+    for combination in infodict.values():
+        for name, value in combination.items():
+            if value not in axes[name]:
+                axes[name].append(value)
+    indexes = {
+        folder: tuple(axes[name].index(combination[name]) for name in names)
+        for folder, combination in infodict.items()
+    }
+    return names, [axes[name] for name in names], indexes
+
+
+def _load_variable(fullpath, variable, product, loader_kwargs):
+    """Worker of DataFolder.stack_sweep (has to be picklable for processes)"""
+    datafile = DataFile(fullpath, product=product, **loader_kwargs)
+    return np.asarray(datafile.variables[variable].value)
+
+
 class AvsAscii(Output):
-    def __init__(self, fullpath, **loader_kwargs):
+    """
+    Loader for AVS field files (.fld) with ascii and/or binary data.
+
+    If mmap is True (default), binary data is memory-mapped and the values
+    are views of the file instead of copies. See load_values.
+
+    If lazy is True, only the header is read and the values of each variable
+    and coordinate are read on first access (see Data.loader). on_load is
+    passed to the datasets (see Data.on_load).
+
+    layout is the memory layout of the variables: 'C' or 'F' (Fortran)
+    contiguous, or None (default) to keep the layout of the file without copy
+    (Fortran contiguous, unless the values are interleaved). See reshape_values.
+    """
+
+    def __init__(
+        self, fullpath, mmap=True, lazy=False, on_load=None, layout=None, **loader_kwargs
+    ):
         super().__init__(fullpath)
+        self.mmap = mmap
+        self.lazy = lazy
+        self.on_load = on_load
+        self.layout = layout
         self.load()
 
     @property
@@ -646,13 +1276,23 @@ class AvsAscii(Output):
         filename = self.filename_only + ".fld"
         return os.path.join(self.folder, filename)
 
+    def source_files(self):
+        files = [self.fld]
+        for vmeta in self.metadata["variables"] + self.metadata["coords"]:
+            if vmeta["file"] not in files:
+                files.append(vmeta["file"])
+        return files
+
     def load(self):
-        self.load_raw_metadata()
-        self.load_metadata()
-        self.load_variables()
-        self.load_coords()
+        buffers = {}  # each file is opened, read and parsed only once
+        try:
+            self.load_metadata(buffers=buffers)
+            self.load_variables(buffers=buffers)
+            self.load_coords(buffers=buffers)
+        finally:
+            close_buffers(buffers)
 
-    def load_raw_metadata(self):
+    def load_raw_metadata(self, buffers=None):
         possible_keys = [
             "ndim",
             "dim",
@@ -665,40 +1305,33 @@ class AvsAscii(Output):
             "coord",
         ]
         info = []
-        try:
-            with open(self.fld, "r") as f:
-                for line in f:
-                    line = line.replace("\n", "")
-                    line = line.strip()
-                    try:
-                        float(line)
-                        break
-                    except:
-                        if line == "":
-                            continue
-                        # if line[0] != '#':
-                        #     info.append(line)
-                        if start_with_choice(line, *possible_keys):
-                            info.append(line)
-        except UnicodeDecodeError:
-            with open(self.fld, "rb") as f:
-                for line in f:
-                    try:
-                        line = line.decode("ascii")
-                    except:
-                        break
-                    line = line.replace("\n", "")
-                    line = line.strip()
-                    if line == "":
-                        continue
-                    # if line[0] != '#':
-                    #     info.append(line)
-                    if start_with_choice(line, *possible_keys):
-                        info.append(line)
+        if buffers is None:
+            buffer = AsciiBuffer(self.fld)
+        else:
+            buffer = get_buffer(buffers, self.fld, "ascii")
+        for line in buffer.iter_lines():
+            try:
+                line = line.decode("utf-8")  # labels may have non-ascii units (e.g. µeV)
+            except UnicodeDecodeError:
+                break  # beginning of binary data
+            line = line.replace("\n", "")
+            line = line.strip()
+            try:
+                float(line)
+                break
+            except:
+                if line == "":
+                    continue
+                # if line[0] != '#':
+                #     info.append(line)
+                if start_with_choice(line, *possible_keys):
+                    info.append(line)
+        if buffers is None:
+            buffer.close()
         return info
 
-    def load_metadata(self):
-        info = self.load_raw_metadata()
+    def load_metadata(self, buffers=None):
+        info = self.load_raw_metadata(buffers=buffers)
         key_int = ["ndim", "dim1", "dim2", "dim3", "nspace", "veclen"]
         key_str = ["data", "field"]
         metadata = {}
@@ -744,59 +1377,160 @@ class AvsAscii(Output):
         self.metadata = metadata
         return metadata
 
-    def load_variables(self):
+    def load_variables(self, mmap=None, buffers=None):
+        if mmap is None:
+            mmap = self.mmap
         meta = self.metadata
         variables = DictList()
         for vmeta, label, unit in zip(meta["variables"], meta["labels"], meta["units"]):
-            values = load_values(
-                file=vmeta["file"],
-                filetype=vmeta["filetype"],
+            loader = partial(
+                load_avs_values,
+                vmeta,
                 datatype=meta["data"],
-                skip=vmeta["skip"],
-                offset=vmeta["offset"],
-                stride=vmeta["stride"],
-                size=vmeta["size"],
+                dims=meta["dims"],
+                mmap=mmap,
+                layout=self.layout,
             )
-            values = reshape_values(values, *meta["dims"])
-            var = Variable(name=label, value=values, unit=unit, metadata=vmeta)
+            if self.lazy:
+                var = Variable(
+                    name=label,
+                    value=None,
+                    unit=unit,
+                    metadata=vmeta,
+                    loader=loader,
+                    on_load=self.on_load,
+                )
+            else:
+                values = loader(buffers=buffers)
+                var = Variable(name=label, value=values, unit=unit, metadata=vmeta)
             variables[var.name] = var
         self.variables = variables
         return variables
 
-    def load_coords(self):
+    def load_coords(self, mmap=None, buffers=None):
+        if mmap is None:
+            mmap = self.mmap
         meta = self.metadata
         coords = DictList()
         for vmeta in meta["coords"]:
-            values = load_values(
-                file=vmeta["file"],
-                filetype=vmeta["filetype"],
-                datatype=meta["data"],
-                skip=vmeta["skip"],
-                offset=vmeta["offset"],
-                stride=vmeta["stride"],
-                size=vmeta["size"],
-            )
+            loader = partial(load_avs_values, vmeta, datatype=meta["data"], mmap=mmap)
             ax = coord_axis(vmeta["num"])
             unit = "nm"
-            var = Coord(
-                name=ax, value=values, unit=unit, dim=vmeta["num"] - 1, metadata=vmeta
-            )
+            if self.lazy:
+                var = Coord(
+                    name=ax,
+                    value=None,
+                    unit=unit,
+                    dim=vmeta["num"] - 1,
+                    metadata=vmeta,
+                    loader=loader,
+                    on_load=self.on_load,
+                )
+            else:
+                values = loader(buffers=buffers)
+                var = Coord(
+                    name=ax, value=values, unit=unit, dim=vmeta["num"] - 1, metadata=vmeta
+                )
             coords[var.name] = var
         self.coords = coords
         return coords
 
 
 class Vtk(Output):
-    def __init__(self, fullpath, **loader_kwargs):
+    """
+    Loader for VTK XML RectilinearGrid files (.vtr).
+
+    The file is parsed directly: ascii, binary (base64) and appended (raw or
+    base64) data arrays are supported, uncompressed or compressed with zlib or
+    lzma. Uncompressed appended raw data is not copied when it is read.
+
+    If pyvista is True, the file is read with pyvista instead and the mesh is
+    stored in .vtk (pyvista has to be installed).
+
+    layout is the memory layout of the variables: 'C' or 'F' (Fortran)
+    contiguous, or None (default) to keep the layout of the file without copy.
+    See reshape_values.
+    """
+
+    def __init__(self, fullpath, pyvista=False, layout=None, **loader_kwargs):
         super().__init__(fullpath)
+        self.pyvista = pyvista
+        self.layout = layout
         self.load()
 
     def load(self):
-        self.vtk = pv.read(self.fullpath)
-        self.load_coords()
-        self.load_variables()
+        if self.pyvista:
+            return self.load_pyvista()
+        with open(self.fullpath, "rb") as f:
+            content = f.read()
+        self.appended, self.appended_encoding = None, None
+        start = content.find(b"<AppendedData")
+        if start >= 0:
+            # the appended data is not valid xml: parse only what is before
+            end = content.index(b">", start)
+            match = re.search(rb'encoding\s*=\s*"(\w+)"', content[start:end])
+            self.appended_encoding = match.group(1).decode() if match else "raw"
+            self.appended = memoryview(content)[content.index(b"_", end) + 1 :]
+            content = content[:start] + b"</VTKFile>"
+        root = ET.fromstring(content)
+        self.byte_order = root.get("byte_order", "LittleEndian")
+        self.header_type = root.get("header_type", "UInt32")
+        self.compressor = root.get("compressor")
+        piece = root.find("RectilinearGrid/Piece")
+        self.load_coords(piece)
+        self.load_variables(piece)
+
+    def read_array(self, element):
+        """Return the flat values of a DataArray element"""
+        dtype = vtk_dtype(element.get("type"), self.byte_order)
+        data_format = element.get("format", "ascii")
+        if data_format == "ascii":
+            return np.array(element.text.split(), dtype=dtype)
+        header_dtype = vtk_dtype(self.header_type, self.byte_order)
+        compressor = self.compressor
+        if data_format == "binary":
+            data = "".join(element.text.split()).encode()
+            return read_vtk_binary(data, dtype, header_dtype, compressor, encoded=True)
+        elif data_format == "appended":
+            data = self.appended[int(element.get("offset", 0)) :]
+            encoded = self.appended_encoding == "base64"
+            return read_vtk_binary(data, dtype, header_dtype, compressor, encoded=encoded)
+        raise NotImplementedError(f"VTK data format {data_format} is not supported")
+
+    def load_coords(self, piece):
+        arrays = piece.find("Coordinates").findall("DataArray")
+        self.dims = []
+        for i, (coord, element) in enumerate(zip(["x", "y", "z"], arrays)):
+            value = self.read_array(element)
+            self.dims.append(value.size)
+            if value.size == 1:
+                continue
+            self.coords[coord] = Coord(name=coord, value=value, unit=None, dim=i)
 
-    def load_coords(self):
+    def load_variables(self, piece):
+        dims = tuple(self.dims)
+        cell_dims = tuple(max(dim - 1, 1) for dim in dims)
+        for section, shape in [("PointData", dims), ("CellData", cell_dims)]:
+            element = piece.find(section)
+            if element is None:
+                continue
+            for array in element.findall("DataArray"):
+                name, unit = best_str_to_name_unit(array.get("Name"), default_unit=None)
+                components = int(array.get("NumberOfComponents", 1))
+                value = self.read_array(array)
+                if components == 1:
+                    # the size 1 dimensions (e.g. z of 2D data) are dropped
+                    dims = [dim for dim in shape if dim > 1]
+                    value = reshape_values(value, *dims, layout=self.layout)
+                else:
+                    value = reshape_values(value, components, *shape)
+                    value = as_layout(np.moveaxis(value, 0, -1).squeeze(), self.layout)
+                self.variables[name] = Variable(name=name, value=value, unit=unit)
+
+    def load_pyvista(self):
+        import pyvista as pv  # heavy import (VTK), only if requested
+
+        self.vtk = pv.read(self.fullpath)
         for i, coord in enumerate(["x", "y", "z"]):
             if not hasattr(self.vtk, coord):
                 continue
@@ -804,39 +1538,167 @@ class Vtk(Output):
             if value.size == 1:
                 continue
             self.coords[coord] = Coord(name=coord, value=value, unit=None, dim=i)
-
-    def load_variables(self):
         for _name in self.vtk.array_names:
             name, unit = best_str_to_name_unit(_name, default_unit=None)
-            value = (
-                np.array(self.vtk[_name])
-                .reshape(self.vtk.dimensions, order="F")
-                .squeeze()
-            )
+            value = reshape_values(
+                np.asarray(self.vtk[_name]), *self.vtk.dimensions, layout=self.layout
+            ).squeeze()
             self.variables[name] = Variable(name=name, value=value, unit=unit)
 
 
+_vtk_types = {
+    "Int8": "i1",
+    "UInt8": "u1",
+    "Int16": "i2",
+    "UInt16": "u2",
+    "Int32": "i4",
+    "UInt32": "u4",
+    "Int64": "i8",
+    "UInt64": "u8",
+    "Float32": "f4",
+    "Float64": "f8",
+}
+_vtk_decompressors = {
+    "vtkZLibDataCompressor": zlib.decompress,
+    "vtkLZMADataCompressor": lzma.decompress,
+}
+
+
+def vtk_dtype(vtk_type, byte_order="LittleEndian"):
+    """Return the numpy dtype of a VTK type (e.g. 'Float64')"""
+    if vtk_type not in _vtk_types:
+        raise ValueError(f"Unknown VTK data type: {vtk_type}")
+    order = ">" if byte_order == "BigEndian" else "<"
+    return np.dtype(order + _vtk_types[vtk_type])
+
+
+def read_vtk_binary(data, dtype, header_dtype, compressor=None, encoded=True):
+    """
+    Decode a binary VTK data array (header followed by the data).
+
+    Parameters
+    ----------
+    data : bytes or memoryview
+        base64 text if encoded, raw bytes otherwise, starting at the header of
+        the array (it can continue after the array)
+    dtype : np.dtype
+        type of the values
+    header_dtype : np.dtype
+        type of the header integers (VTKFile header_type)
+    compressor : str, optional
+        VTKFile compressor, e.g. 'vtkZLibDataCompressor' (default: None)
+    encoded : bool
+        base64 encoded (default: True)
+
+    Returns
+    -------
+    np.ndarray (flat)
+    """
+    position = 0
+
+    def read(nbytes, stream_start=True):
+        # an encoded stream has to be decoded from its beginning
+        nonlocal position
+        if encoded:
+            nchars = -(-nbytes // 3) * 4
+            chunk = base64.b64decode(bytes(data[position : position + nchars]))[:nbytes]
+        else:
+            nchars = nbytes
+            chunk = data[position : position + nbytes]
+        if stream_start:
+            position += nchars
+        return chunk
+
+    hsize = header_dtype.itemsize
+    if compressor is None:
+        nbytes = int(np.frombuffer(read(hsize, stream_start=False), dtype=header_dtype)[0])
+        # the header and the data are a single stream
+        values = read(hsize + nbytes)[hsize:]
+        return np.frombuffer(values, dtype=dtype)
+
+    if compressor not in _vtk_decompressors:
+        raise NotImplementedError(f"VTK compressor {compressor} is not supported")
+    decompress = _vtk_decompressors[compressor]
+    nblocks = int(np.frombuffer(read(3 * hsize, stream_start=False), dtype=header_dtype)[0])
+    header = np.frombuffer(read((3 + nblocks) * hsize), dtype=header_dtype)
+    sizes = header[3:].astype(int)
+    blocks = read(int(sizes.sum()))
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    values = b"".join(
+        decompress(bytes(blocks[start:end])) for start, end in zip(starts[:-1], starts[1:])
+    )
+    return np.frombuffer(values, dtype=dtype)
+
+
 class Dat(Output):
-    def __init__(self, fullpath, **loader_kwargs):
+    """
+    Loader for column data files (.dat, .txt) with a header line.
+
+    If lazy is True, only the header is read and the columns are parsed on the
+    first access to one of them (see Data.loader). on_load is passed to the
+    datasets (see Data.on_load). mmap and pyvista are ignored (there is no
+    binary data or mesh).
+
+    layout is the memory layout of the variables: 'C' or 'F' (Fortran)
+    contiguous, or None (default). The columns are 1D, so they are contiguous
+    in both layouts and are not copied.
+
+    The data is parsed in blocks of chunk_size rows directly into one array per
+    column, preallocated from the size of the file. For files too large to be
+    loaded, iter_chunks() yields the columns block by block, e.g.
+        dat = Dat(fullpath, lazy=True)  # reads the header only
+        total = sum(block['DOS'].sum() for block in dat.iter_chunks())
+    """
+
+    chunk_size = 2**16
+
+    def __init__(
+        self, fullpath, lazy=False, on_load=None, mmap=None, pyvista=None, layout=None, **loader_kwargs
+    ):
         super().__init__(fullpath)
+        self.lazy = lazy
+        self.on_load = on_load
+        self.layout = layout
+        self._lazy_columns = {}
         self.load(**loader_kwargs)
 
     def load(self, **loader_kwargs):
-        self.load_metadata(**loader_kwargs)
-        self.load_data()
+        with open(self.fullpath, "r") as f:  # the file is opened only once
+            self.load_metadata(file=f, **loader_kwargs)
+            self.load_data(file=f)
 
-    def _get_headers(self):
+    def _get_headers(self, file=None):
+        """
+        Return the header lines. If file (opened file) is specified, it is
+        read from its current position and left at the first data line.
+        """
+        if file is None:
+            with open(self.fullpath, "r") as f:
+                return self._get_headers(file=f)
         headers = []
-        with open(self.fullpath, "r") as f:
-            for line in f:
-                try:
-                    float(line.split()[0])
-                    break
-                except:
-                    headers.append(line)
+        while True:
+            position = file.tell()
+            line = file.readline()
+            if not line:
+                break
+            try:
+                float(line.split()[0])
+                file.seek(position)
+                break
+            except:
+                headers.append(line)
         return headers
 
-    def _get_nb_columns(self):
+    def _get_nb_columns(self, file=None):
+        """
+        Return the number of columns. If file (opened file) is specified, its
+        current position has to be the first data line and it is left there.
+        """
+        if file is not None:
+            position = file.tell()
+            line = file.readline()
+            file.seek(position)
+            return len(line.split())
         meta = self.metadata
         with open(self.fullpath, "r") as f:
             for i, line in enumerate(f):
@@ -847,11 +1709,11 @@ class Dat(Output):
                 break
         return arr.size
 
-    def load_metadata(self, FirstVarIsCoordFlag=True):
-        headers = self._get_headers()
+    def load_metadata(self, FirstVarIsCoordFlag=True, file=None):
+        headers = self._get_headers(file=file)
         self.metadata["headers"] = headers
         self.metadata["skip_rows"] = len(headers)
-        nb = self._get_nb_columns()
+        nb = self._get_nb_columns(file=file)
         self.metadata["nb_columns"] = nb
 
         if len(headers) == 0:
@@ -886,18 +1748,19 @@ class Dat(Output):
         self.metadata["dkeys"] = dkeys
         return self.metadata
 
-    def load_data(self):
-        data = []
+    def load_data(self, file=None):
+        """
+        Load the coordinates and variables. If file (opened file) is specified,
+        the data is read from its current position.
+        """
+        if self.lazy:
+            return self.load_lazy_data()
+        if file is None:
+            with open(self.fullpath, "r") as f:
+                self._get_headers(file=f)
+                return self.load_data(file=f)
         meta = self.metadata
-        # with open(self.fullpath, 'r') as f:
-        #     for i, line in enumerate(f):
-        #         if i < meta['skip_rows']:
-        #             continue
-        #         line = line.replace('\n', '').strip().split()
-        #         if line:
-        #             data.append(line)
-        data = np.loadtxt(self.fullpath, skiprows=meta["skip_rows"])
-        data = np.array(data, dtype=float).T  # columns 1st index
+        data = self._read_columns(file)
         coords, variables = DictList(), DictList()
         dims = []
         for i, values in enumerate(data):
@@ -910,12 +1773,113 @@ class Dat(Output):
             else:
                 if dims:
                     values = values.reshape(*dims)
+                values = as_layout(values, self.layout)
                 var = Variable(name=vm["name"], unit=vm["unit"], value=values)
                 variables[var.name] = var
         self.coords = coords
         self.variables = variables
         return coords, variables
 
+    def iter_chunks(self, chunk_size=None):
+        """
+        Iterate over the data in blocks of chunk_size rows (default:
+        Dat.chunk_size) without loading the whole file.
+
+        Each block is a DictList {column name: values} with the columns in the
+        order of the file. Only one block is kept in memory at a time.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        names = [self.metadata[i]["name"] for i in range(self.metadata["nb_columns"])]
+        with open(self.fullpath, "r") as f:
+            self._get_headers(file=f)
+            while True:
+                rows = self._read_rows(f, chunk_size)
+                if rows.shape[0] == 0:
+                    break
+                block = DictList()
+                for name, values in zip(names, np.ascontiguousarray(rows.T)):
+                    block[name] = values
+                yield block
+
+    def _read_rows(self, file, nrows):
+        """
+        Parse the next nrows data lines of file (opened file), skipping the
+        blank lines. Return an array of shape (rows read, nb_columns).
+
+        Raises ValueError if a line does not have nb_columns values.
+        """
+        nb = self.metadata["nb_columns"]
+        rows = [line.split("#", 1)[0].split() for line in islice(file, nrows)]
+        rows = [row for row in rows if row]
+        if any(len(row) != nb for row in rows):
+            raise ValueError(
+                f"Can not load the datafile {self.fullpath}. The number of columns is not consistent"
+            )
+        return np.array(rows, dtype=float).reshape(-1, nb)
+
+    def _read_columns(self, file):
+        """
+        Parse the data lines of file (opened file at the first data line) into
+        one array per column, allocated once for the estimated number of rows.
+        """
+        nb = self.metadata["nb_columns"]
+        position = file.tell()
+        line_size = max(len(file.readline()), 1)
+        file.seek(position)
+        size = os.fstat(file.fileno()).st_size - position
+        capacity = size // line_size + 1
+        columns = [np.empty(capacity, dtype=float) for _ in range(nb)]
+        nrows = 0
+        while True:
+            rows = self._read_rows(file, self.chunk_size)
+            n = rows.shape[0]
+            if n == 0:
+                break
+            if nrows + n > capacity:
+                capacity = max(2 * capacity, nrows + n)
+                for values in columns:
+                    values.resize(capacity, refcheck=False)
+            for j, values in enumerate(columns):
+                values[nrows : nrows + n] = rows[:, j]
+            nrows += n
+        for values in columns:
+            values.resize(nrows, refcheck=False)
+        return columns
+
+    def _load_lazy_column(self, i):
+        """
+        Return the values of the column i (lazy loading). The first call parses
+        all the columns at once, which are kept until they are accessed.
+        """
+        if i not in self._lazy_columns.keys():
+            with open(self.fullpath, "r") as f:
+                self._get_headers(file=f)
+                self._lazy_columns = dict(enumerate(self._read_columns(f)))
+        return as_layout(self._lazy_columns.pop(i), self.layout)
+
+    def load_lazy_data(self):
+        meta = self.metadata
+        coords, variables = DictList(), DictList()
+        for i in range(meta["nb_columns"]):
+            vm = meta[i]
+            loader = partial(self._load_lazy_column, i)
+            kwargs = dict(
+                name=vm["name"],
+                unit=vm["unit"],
+                value=None,
+                loader=loader,
+                on_load=self.on_load,
+            )
+            if i in meta["dkeys"]:
+                var = Coord(dim=i, **kwargs)
+                coords[var.name] = var
+            else:
+                var = Variable(**kwargs)
+                variables[var.name] = var
+        self.coords = coords
+        self.variables = variables
+        return coords, variables
+
     @staticmethod
     def _split_into_columns(header, expected_num_columns):
         # First try to split by any number of spaces
@@ -946,6 +1910,639 @@ class Dat(Output):
         return name, unit
 
 
+# Loaders used by DataFile to autodetect the format when the product is not
+# specified: list of (loader, extensions, sniff), see register_loader
+registered_loaders = []
+_default_loaders_registered = False
+sniff_header_size = 4096
+
+
+def register_loader(loader, extensions=None, sniff=None):
+    """
+    Register a loader for the autodetection of the file format in DataFile
+    (when the nextnano product is not specified).
+
+    Loaders registered later have precedence over the ones registered before
+    (and over the default ones).
+
+    Parameters
+    ----------
+    loader : class or method
+        loader(fullpath, **loader_kwargs) returns an object with .metadata,
+        .coords and .variables (e.g. a subclass of Output)
+    extensions : list of str, optional
+        file extensions (e.g. ['.fld']) supported by the loader.
+        If None, any extension is accepted (default: None)
+    sniff : method, optional
+        sniff(fullpath, header) returns True if the loader supports the file,
+        where header is the first sniff_header_size bytes of the file.
+        If None, only the extension is checked (default: None)
+
+    Returns
+    -------
+    loader
+    """
+    registered_loaders.append((loader, extensions, sniff))
+    return loader
+
+
+def unregister_loader(loader):
+    """Remove a loader registered with register_loader"""
+    registered_loaders[:] = [entry for entry in registered_loaders if entry[0] is not loader]
+
+
+def sniff_loader(fullpath, header_size=None):
+    """
+    Return the registered loader supporting the file. Only the extension and
+    the first header_size bytes of the file are read (default: sniff_header_size).
+
+    Raises
+    ------
+    NotImplementedError
+        If no registered loader supports the file
+    """
+    register_default_loaders()
+    if header_size is None:
+        header_size = sniff_header_size
+    extension = os.path.splitext(str(fullpath))[-1].lower()
+    header = None
+    for loader, extensions, sniff in reversed(registered_loaders):
+        if extensions is not None and extension not in extensions:
+            continue
+        if sniff is None:
+            return loader
+        if header is None:
+            with open(fullpath, "rb") as f:
+                header = f.read(header_size)
+        if sniff(fullpath, header):
+            return loader
+    raise NotImplementedError(
+        f"Loading datafile {get_filename(fullpath)} is not implemented yet"
+    )
+
+
+def is_avs_header(fullpath, header):
+    if os.path.splitext(str(fullpath))[-1].lower() != ".fld":
+        return True  # .v or .coord file: the header is in the .fld file
+    return header.startswith(b"# AVS") or b"ndim" in header
+
+
+def is_avs_data_file(fullpath, header):
+    """Return True if the file is the data file of an AVS field file with the same name"""
+    return os.path.isfile(os.path.splitext(str(fullpath))[0] + ".fld")
+
+
+def dat_loader(fullpath):
+    """
+    Return the loader of a .dat file for the product DataFiles: AvsAscii for the
+    data file of an AVS field file (see is_avs_data_file), Dat otherwise
+    """
+    return AvsAscii if is_avs_data_file(fullpath, None) else Dat
+
+
+def is_vtk_header(fullpath, header):
+    return b"<VTKFile" in header
+
+
+def is_column_header(fullpath, header):
+    """Return True if the first line is a header (not numbers) as needed by Dat"""
+    lines = header.splitlines()
+    if not lines or not lines[0].split():
+        return False
+    try:
+        float(lines[0].split()[0])
+    except ValueError:
+        return True
+    return False
+
+
+def register_default_loaders():
+    """Register the built-in loaders (only once, with the lowest precedence)"""
+    global _default_loaders_registered
+    if _default_loaders_registered:
+        return
+    from nextnanopy.nnp.outputs import (
+        InputVariables as InputVariables_nnp,
+        TotalCharges,
+        is_nnp_variables_header,
+        is_total_charges_header,
+        is_txt_columns_header,
+    )
+    from nextnanopy.nn3.outputs import (
+        InputVariables as InputVariables_nn3,
+        is_nn3_variables_header,
+    )
+
+    default_loaders = [
+        (Dat, [".dat"], is_column_header),
+        (AvsAscii, [".dat"], is_avs_data_file),
+        (AvsAscii, [".fld", ".v", ".coord"], is_avs_header),
+        (Vtk, [".vtr"], is_vtk_header),
+        (partial(Dat, FirstVarIsCoordFlag=False), [".txt"], is_txt_columns_header),
+        (TotalCharges, [".txt"], is_total_charges_header),
+        (InputVariables_nnp, [".txt"], is_nnp_variables_header),
+        (InputVariables_nn3, [".txt"], is_nn3_variables_header),
+    ]
+    registered_loaders[:0] = default_loaders
+    _default_loaders_registered = True
+
+
+def loader_name(loader):
+    """Return the name of a loader class or function (also for functools.partial)"""
+    if isinstance(loader, partial):
+        loader = loader.func
+    return getattr(loader, "__name__", str(loader))
+
+
+# Cache of the parsed data files (see DataFileTemplate, cache parameter)
+cache_version = 3
+default_cache = False
+_cache_ignored_kwargs = ("lazy", "on_load", "mmap")
+
+
+def cache_folder(cache):
+    """Return the cache folder for the cache parameter of DataFile (None if disabled)"""
+    if cache is None:
+        cache = default_cache
+    if cache is True:
+        return str(defaults.cache_default_path)
+    if not cache:
+        return None
+    return str(cache)
+
+
+def file_signature(file):
+    """Return [absolute path, size, modification time in ns] of a file"""
+    stat = os.stat(file)
+    return [os.path.abspath(str(file)), stat.st_size, stat.st_mtime_ns]
+
+
+def cache_key(fullpath, loader, product=None, **loader_kwargs):
+    """
+    Return the name of the cache entry of a file: a hash of its path, size,
+    modification time, the loader (and cache_version) and the loader kwargs
+    changing the loaded values.
+    """
+    if isinstance(loader, partial):
+        loader_kwargs = {**loader.keywords, **loader_kwargs}
+        loader = loader.func
+    kwargs = {
+        key: repr(value)
+        for key, value in loader_kwargs.items()
+        if key not in _cache_ignored_kwargs
+    }
+    key = [
+        file_signature(fullpath),
+        getattr(loader, "__module__", ""),
+        loader_name(loader),
+        product,
+        cache_version,
+        sorted(kwargs.items()),
+    ]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+def encode_metadata(value, default=None):
+    """
+    Return metadata as json-compatible data, restored by decode_metadata.
+
+    The dicts are stored as lists of [key, value] pairs and the tuples and numpy
+    arrays are tagged, so that non-str keys (e.g. the column numbers of Dat),
+    tuples and arrays are restored as they were. Numpy scalars are stored as
+    python numbers and paths as str. Other values are converted with
+    default(value), or raise TypeError if default is None.
+    """
+    if isinstance(value, dict):
+        items = value.items()
+        return {"dict": [[encode_metadata(k, default), encode_metadata(v, default)] for k, v in items]}
+    if isinstance(value, tuple):
+        return {"tuple": [encode_metadata(v, default) for v in value]}
+    if isinstance(value, list):
+        return [encode_metadata(v, default) for v in value]
+    if isinstance(value, np.ndarray):
+        return {"ndarray": value.tolist(), "dtype": value.dtype.str}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if default is None:
+        raise TypeError(f"{type(value).__name__} can not be stored in json")
+    return default(value)
+
+
+def decode_metadata(data):
+    """Return the metadata stored with encode_metadata"""
+    if isinstance(data, list):
+        return [decode_metadata(v) for v in data]
+    if not isinstance(data, dict):
+        return data
+    if "dict" in data.keys():
+        return {decode_metadata(k): decode_metadata(v) for k, v in data["dict"]}
+    if "tuple" in data.keys():
+        return tuple(decode_metadata(v) for v in data["tuple"])
+    return np.array(data["ndarray"], dtype=data["dtype"])
+
+
+def save_cache(folder, key, datafile, files):
+    """
+    Store .metadata, .coords and .variables of datafile in folder/key: one .npy
+    file per dataset and the rest in index.json (no pickle, so that loading a
+    shared cache can not execute code).
+    files are the source files of datafile, checked again by load_cache.
+
+    Return False if the data can not be stored (only Coord and Variable with
+    numeric values are supported).
+    """
+    entry = os.path.join(folder, key)
+    tmp = f"{entry}.{os.getpid()}.tmp"
+    datasets = []
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        for kind, collection in [("coord", datafile.coords), ("variable", datafile.variables)]:
+            for name, data in collection.items():
+                value = np.asarray(data.value)
+                if type(data) not in (Coord, Variable) or value.dtype.kind not in "biufc":
+                    raise TypeError(f"{name} can not be cached")
+                file = f"{len(datasets)}.npy"
+                np.save(os.path.join(tmp, file), value, allow_pickle=False)
+                datasets.append(
+                    {
+                        "kind": kind,
+                        "key": name,
+                        "name": data.name,
+                        "unit": data.unit,
+                        "dim": getattr(data, "dim", None),
+                        "metadata": encode_metadata(data.metadata),
+                        "file": file,
+                    }
+                )
+        index = {
+            "version": cache_version,
+            "loader": getattr(datafile, "load_info", {}).get("loader"),
+            "files": [str(file) for file in files],
+            "signatures": [file_signature(file) for file in files],
+            "metadata": encode_metadata(datafile.metadata),
+            "datasets": datasets,
+        }
+        with open(os.path.join(tmp, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry)  # stale entry of a modified source file
+        os.replace(tmp, entry)
+    except (ValueError, TypeError, AttributeError, OSError):
+        shutil.rmtree(tmp, ignore_errors=True)
+        return False
+    return True
+
+
+def load_cache(folder, key):
+    """
+    Return the cache entry folder/key as a dict with 'loader', 'metadata',
+    'coords', 'variables' and 'files', or None if there is no valid entry (missing or
+    one of the source files was modified).
+
+    The values are memory-mapped (copy-on-write).
+    """
+    entry = os.path.join(folder, key)
+    try:
+        with open(os.path.join(entry, "index.json"), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index["version"] != cache_version:
+            return None
+        if any(file_signature(sign[0]) != sign for sign in index["signatures"]):
+            return None
+    except (OSError, KeyError, TypeError, ValueError):
+        return None
+    coords, variables = DictList(), DictList()
+    for dataset in index["datasets"]:
+        file = os.path.join(entry, dataset["file"])
+        try:
+            value = np.load(file, mmap_mode="c", allow_pickle=False)
+        except ValueError:  # empty arrays can not be memory-mapped
+            value = np.load(file, allow_pickle=False)
+        kwargs = dict(
+            name=dataset["name"],
+            unit=dataset["unit"],
+            metadata=decode_metadata(dataset["metadata"]),
+            value=value,
+        )
+        if dataset["kind"] == "coord":
+            coords[dataset["key"]] = Coord(dim=dataset["dim"], **kwargs)
+        else:
+            variables[dataset["key"]] = Variable(**kwargs)
+    return {
+        "loader": index["loader"],
+        "metadata": decode_metadata(index["metadata"]),
+        "coords": coords,
+        "variables": variables,
+        "files": index["files"],
+    }
+
+
+def clear_cache(cache=True):
+    """Remove the cache folder (see cache_folder)"""
+    folder = cache_folder(cache)
+    if folder is not None and os.path.isdir(folder):
+        shutil.rmtree(folder)
+
+
+# Archives of data files in HDF5 or Zarr containers (see DataFile.save and
+# DataFolder.to_hdf5/to_zarr). Each data file is a group with the subgroups
+# 'coords' and 'variables' (one dataset per Coord/Variable), each folder is a
+# group and the other files (sweep_infodict.json, logs, ...) are stored as
+# bytes (uint8 datasets). The metadata is stored as json (see encode_metadata,
+# plain json.dumps in version 1).
+archive_version = 2
+archive_extensions = {".h5": "hdf5", ".hdf5": "hdf5", ".zarr": "zarr"}
+
+
+def archive_format(filepath, format=None):
+    """Return 'hdf5' or 'zarr' for format or the extension of filepath"""
+    if format is None:
+        format = archive_extensions.get(os.path.splitext(str(filepath))[-1].lower())
+    if format not in ("hdf5", "zarr"):
+        raise ValueError(f"Archive format must be 'hdf5' or 'zarr', not {format}")
+    return format
+
+
+def split_archive_path(fullpath):
+    """
+    Return (archive, path in the archive) if fullpath is an existing HDF5/Zarr
+    archive (.h5, .hdf5, .zarr) or a path inside one, e.g.
+    'results.h5/sweep_1/bandedges.fld'. Otherwise, return (None, None).
+    """
+    parts = Path(fullpath).parts
+    for i, part in enumerate(parts):
+        format = archive_extensions.get(os.path.splitext(part)[-1].lower())
+        if format is None:
+            continue
+        archive = os.path.join(*parts[: i + 1])
+        if os.path.isfile(archive) or (format == "zarr" and os.path.isdir(archive)):
+            return archive, "/".join(parts[i + 1 :])
+    return None, None
+
+
+def open_archive(filepath, mode="r", format=None):
+    """
+    Return the root group of an HDF5 (h5py) or Zarr (zarr) archive, to be
+    used as a context manager.
+    """
+    format = archive_format(filepath, format)
+    if format == "hdf5":
+        import h5py  # optional dependency
+
+        return h5py.File(filepath, mode)
+    import zarr  # optional dependency
+
+    return contextlib.nullcontext(zarr.open_group(str(filepath), mode=mode))
+
+
+def create_archive_dataset(group, name, value, compress=True):
+    """Store the array value in group[name] (chunked and compressed if compress and not a scalar)"""
+    value = np.asarray(value)
+    if hasattr(group, "create_array"):  # zarr >= 3
+        kwargs = {} if compress else {"compressors": None}
+        return group.create_array(name, data=value, **kwargs)
+    if group.__class__.__module__.startswith("zarr"):
+        kwargs = {} if compress else {"compressor": None}
+        return group.create_dataset(name, data=value, **kwargs)
+    kwargs = {}
+    if compress and value.ndim and value.size:
+        kwargs = dict(chunks=True, compression="gzip", shuffle=True)
+    return group.create_dataset(name, data=value, **kwargs)
+
+
+def write_archive_datafile(group, datafile, compress=True):
+    """
+    Store .metadata, .coords and .variables of datafile in group.
+
+    Raises
+    ------
+    TypeError
+        If a dataset is not a Coord or Variable with numeric values
+    """
+    group.attrs["nextnanopy"] = "DataFile"
+    group.attrs["version"] = archive_version
+    group.attrs["loader"] = str(getattr(datafile, "load_info", {}).get("loader", ""))
+    group.attrs["metadata"] = json.dumps(encode_metadata(datafile.metadata, default=str))
+    for kind, collection in [("coords", datafile.coords), ("variables", datafile.variables)]:
+        subgroup = group.create_group(kind)
+        for i, (key, data) in enumerate(collection.items()):
+            value = np.asarray(data.value)
+            if type(data) not in (Coord, Variable) or value.dtype.kind not in "biufc":
+                raise TypeError(f"{key} can not be archived")
+            dataset = create_archive_dataset(subgroup, str(i), value, compress=compress)
+            dataset.attrs["key"] = str(key)
+            dataset.attrs["name"] = data.name
+            dataset.attrs["unit"] = data.unit
+            dataset.attrs["dim"] = -1 if getattr(data, "dim", None) is None else int(data.dim)
+            dataset.attrs["metadata"] = json.dumps(encode_metadata(data.metadata, default=str))
+
+
+def write_archive_file(group, name, filepath, compress=True):
+    """Store the bytes of the file filepath in group[name]"""
+    with open(filepath, "rb") as f:
+        content = np.frombuffer(f.read(), dtype=np.uint8)
+    dataset = create_archive_dataset(group, name, content, compress=compress)
+    dataset.attrs["nextnanopy"] = "file"
+
+
+def write_archive(folder, filepath, format=None, product=None, compress=True, **loader_kwargs):
+    """
+    Store all the files of a DataFolder or folder path (and its subfolders) in
+    one HDF5 or Zarr archive. The data files are loaded one after the other with
+    DataFile(file, product, **loader_kwargs) and stored as coordinates and
+    variables. The files which are not data files (or can not be loaded) are
+    stored as they are. The .v and .coord files of an AVS field are stored
+    with their .fld file.
+
+    Return the errors of the files which could not be loaded {filepath: exception},
+    except NotImplementedError (no loader for the file).
+    """
+    if not isinstance(folder, DataFolder):
+        folder = DataFolder(folder)
+    errors = {}
+    with open_archive(filepath, mode="w", format=format) as root:
+        root.attrs["nextnanopy"] = "DataFolder"
+        root.attrs["version"] = archive_version
+        root.attrs["source"] = str(folder.fullpath)
+        _write_archive_folder(root, folder, product, compress, errors, loader_kwargs)
+    return errors
+
+
+def _write_archive_folder(group, folder, product, compress, errors, loader_kwargs):
+    stored = set()  # source files of the data files already stored
+    # .fld first: their .v and .coord files are then skipped
+    files = sorted(folder.files, key=lambda file: os.path.splitext(file)[-1].lower() != ".fld")
+    for file in files:
+        if os.path.abspath(file) in stored:
+            continue
+        name = os.path.basename(file)
+        try:
+            datafile = DataFile(file, product=product, **loader_kwargs)
+            write_archive_datafile(group.create_group(name), datafile, compress=compress)
+            stored.update(os.path.abspath(source) for source in datafile.source_files())
+        except Exception as error:
+            if name in group:
+                del group[name]
+            if not isinstance(error, NotImplementedError):
+                errors[file] = error
+            write_archive_file(group, name, file, compress=compress)
+        finally:
+            datafile = None
+    for name, subfolder in folder.folders.items():
+        subgroup = group.create_group(name)
+        subgroup.attrs["nextnanopy"] = "DataFolder"
+        _write_archive_folder(subgroup, subfolder, product, compress, errors, loader_kwargs)
+
+
+def read_archive_metadata(text):
+    """Return the metadata stored as json in an archive (see encode_metadata)"""
+    return decode_metadata(json.loads(text))
+
+
+def read_archive_dataset(archive, path, layout=None):
+    """Return the values of the dataset path of an archive (used by lazy Archive datasets)"""
+    with open_archive(archive) as root:
+        return as_layout(root[path][...], layout)
+
+
+def read_archive_file(fullpath):
+    """Return the bytes of a file stored in an archive, e.g. 'results.h5/sweep_infodict.json'"""
+    archive, path = split_archive_path(fullpath)
+    if archive is None:
+        raise FileNotFoundError(f"{fullpath} is not in an archive")
+    with open_archive(archive) as root:
+        if not path or path not in root or root[path].attrs.get("nextnanopy") != "file":
+            raise FileNotFoundError(f"No file {path} in archive {archive}")
+        return root[path][...].tobytes()
+
+
+class Archive(Output):
+    """
+    Loader for the data files stored in HDF5 or Zarr archives: fullpath is the
+    archive of a single DataFile (DataFile.save(format='hdf5' or 'zarr')) or
+    the path of a data file inside an archive of a DataFolder, e.g.
+    'results.h5/sweep_1/bandedges.fld' (see DataFolder.to_hdf5).
+
+    Only the datasets of this data file are read. If lazy is True, each
+    coordinate and variable is read on first access (see Data.loader).
+    layout is the memory layout of the variables: 'C' or 'F' (Fortran)
+    contiguous, or None (default, C contiguous as read from the archive).
+    """
+
+    def __init__(self, fullpath, lazy=False, on_load=None, layout=None, **loader_kwargs):
+        super().__init__(fullpath)
+        self.lazy = lazy
+        self.on_load = on_load
+        self.layout = layout
+        self.archive, self.path = split_archive_path(fullpath)
+        if self.archive is None:
+            raise FileNotFoundError(f"{fullpath} is not in an archive")
+        self.load()
+
+    def source_files(self):
+        return [self.archive]
+
+    def load(self):
+        with open_archive(self.archive) as root:
+            group = root[self.path] if self.path else root
+            if group.attrs.get("nextnanopy") != "DataFile":
+                raise NotImplementedError(f"{self.fullpath} is not a data file of the archive")
+            read_metadata = read_archive_metadata if group.attrs["version"] > 1 else json.loads
+            self.metadata = read_metadata(group.attrs["metadata"])
+            for kind, collection in [("coords", self.coords), ("variables", self.variables)]:
+                subgroup = group[kind]
+                for name in sorted(subgroup.keys(), key=int):
+                    dataset = subgroup[name]
+                    attrs = dict(dataset.attrs)
+                    kwargs = dict(
+                        name=attrs["name"],
+                        unit=attrs["unit"],
+                        metadata=read_metadata(attrs["metadata"]),
+                        value=None,
+                    )
+                    if self.lazy:
+                        path = "/".join(part for part in (self.path, kind, name) if part)
+                        kwargs.update(
+                            loader=partial(read_archive_dataset, self.archive, path, self.layout),
+                            on_load=self.on_load,
+                        )
+                    else:
+                        kwargs["value"] = as_layout(dataset[...], self.layout)
+                    if kind == "coords":
+                        dim = None if attrs["dim"] < 0 else int(attrs["dim"])
+                        collection[attrs["key"]] = Coord(dim=dim, **kwargs)
+                    else:
+                        collection[attrs["key"]] = Variable(**kwargs)
+
+
+class ArchiveFolder(DataFolder):
+    """
+    DataFolder of an HDF5 or Zarr archive written by DataFolder.to_hdf5 or
+    DataFolder.to_zarr. fullpath is the archive or a folder inside it, e.g.
+    'results.h5/sweep_1'. DataFolder(fullpath) returns an ArchiveFolder for
+    such paths.
+
+    The files are paths inside the archive, which can be loaded with DataFile
+    (see Archive). The other files can be read with read_archive_file.
+    entries are the kinds of the files and folders: 'DataFile', 'file' or
+    'DataFolder'.
+    """
+
+    def __init__(self, fullpath):
+        if split_archive_path(fullpath)[0] is None:
+            raise ValueError(f"{fullpath} is not an archive")
+        self._init_attributes(str(fullpath))
+        self.load()
+
+    def load(self):
+        archive, path = split_archive_path(self.fullpath)
+        with open_archive(archive) as root:
+            group = root[path] if path else root
+            if group.attrs.get("nextnanopy") != "DataFolder":
+                raise ValueError(f"{self.fullpath} is not a folder of the archive")
+            entries = {
+                name: group[name].attrs.get("nextnanopy", "DataFolder")
+                for name in sorted(group.keys())
+            }
+        self.entries = DictList()
+        self._files = []
+        self._folders = DictList()
+        self._indexes = {}
+        for name, kind in entries.items():
+            self.entries[name] = kind
+            fullpath = os.path.join(self.fullpath, name)
+            if kind == "DataFolder":
+                self._folders[name] = self._subfolder(fullpath)
+            else:
+                self._files.append(fullpath)
+        self.loaded = True
+        self.create_navigation()
+
+    def go_to(self, *args):
+        folder = self
+        for i, arg in enumerate(args):
+            if arg in folder.folders.keys():
+                folder = folder.folders[arg]
+            elif i == len(args) - 1 and arg in folder.entries.keys():
+                return os.path.join(folder.fullpath, arg)
+            else:
+                raise ValueError(f"No such file or directory {os.path.join(self.fullpath, *args)}")
+        return folder
+
+    def read_sweep_infodict(self):
+        try:
+            content = read_archive_file(os.path.join(self.fullpath, "sweep_infodict.json"))
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                "Sweep infodict file not found. Make sure that the chosen folder is a sweep output folder."
+            )
+        return json.loads(content)
+
+
 def coord_axis(dim):
     dim = str(dim)
     axes = {"1": "x", "2": "y", "3": "z"}
@@ -974,119 +2571,515 @@ def values_metadata(line):
     return metadata
 
 
+_avs_datatypes = {
+    "byte": "u1",
+    "short": "i2",
+    "int": "i4",
+    "integer": "i4",
+    "float": "f4",
+    "double": "f8",
+}
+
+
+def avs_dtype(datatype="double"):
+    """
+    Return the numpy dtype of an AVS binary datatype.
+
+    The xdr_ prefix (e.g. xdr_float) denotes big-endian data, otherwise the
+    native byte order is assumed.
+    """
+    datatype = datatype.strip().lower()
+    byteorder = "="
+    if datatype.startswith("xdr_"):
+        datatype = datatype[4:]
+        byteorder = ">"
+    if datatype not in _avs_datatypes.keys():
+        raise ValueError(f"AVS datatype {datatype} is not recognized or implemented")
+    return np.dtype(byteorder + _avs_datatypes[datatype])
+
+
+class AsciiBuffer(object):
+    """
+    Lines of an ascii file, read once and parsed into numeric blocks on demand.
+
+    The file is opened once and the lines are read lazily up to the last line
+    requested, so that the ascii part at the beginning of a file with binary
+    data is not read entirely. Parsed blocks are cached, which allows to slice
+    several variables (different offsets) from the same block without parsing
+    it again.
+
+    The file is kept open until close() is called (it can be used as a
+    context manager).
+
+    Parameters
+    ----------
+    file : str
+        path to the ascii file
+    """
+
+    chunk_size = 2**20
+
+    def __init__(self, file):
+        self.file = file
+        self.lines = []
+        self._f = None
+        self._eof = False
+        self._blocks = {}
+
+    def read_lines(self, stop=None):
+        """Read and store the lines of the file up to stop (all if None)"""
+        while not self._eof and (stop is None or len(self.lines) < stop):
+            if self._f is None:
+                self._f = open(self.file, "rb")
+            lines = self._f.readlines(self.chunk_size)
+            if not lines:
+                self._eof = True
+                self.close()
+            self.lines.extend(lines)
+        return self.lines
+
+    def iter_lines(self):
+        """Iterate over the lines of the file, reading them when needed"""
+        i = 0
+        while i < len(self.read_lines(i + 1)):
+            yield self.lines[i]
+            i += 1
+
+    def read_bytes(self, mmap=False):
+        """
+        Return the flat writable array of bytes of the whole file (memory-mapped
+        copy-on-write if mmap is True), without opening the file again.
+        """
+        if self._eof:
+            return np.frombuffer(bytearray(b"".join(self.lines)), dtype=np.uint8)
+        if self._f is None:
+            self._f = open(self.file, "rb")
+        position = self._f.tell()
+        self._f.seek(0)
+        if mmap:
+            data = np.memmap(self._f, dtype=np.uint8, mode="c")
+        else:
+            data = np.fromfile(self._f, dtype=np.uint8)
+        self._f.seek(position)
+        return data
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_block(self, skip=0, nrows=None):
+        """Return the flat array of the numbers in nrows lines after skip lines"""
+        stop = skip + nrows if nrows is not None else None
+        key = (skip, stop)
+        if key not in self._blocks.keys():
+            lines = self.read_lines(stop)[skip:stop]
+            self._blocks[key] = np.array(b" ".join(lines).split(), dtype=float)
+        return self._blocks[key]
+
+    def get_values(self, skip=0, offset=0, stride=1, size=None):
+        """
+        Return the flat array of values, as a view of the parsed block.
+
+        The numbers after skip lines are read as a stream: the values start at
+        the offset-th number and are separated by stride numbers
+        (e.g. offset = column and stride = number of columns).
+        """
+        if size is None:
+            block = self.get_block(skip)
+        else:
+            first_line = self.read_lines(skip + 1)[skip : skip + 1]
+            ncols = max(len(b" ".join(first_line).split()), 1)
+            count = offset + (size - 1) * stride + 1
+            block = self.get_block(skip, -(-count // ncols))
+        values = block[offset::stride]
+        if size is not None:
+            values = values[:size]
+        return values
+
+
+def get_buffer(buffers, file, filetype="ascii", mmap=False):
+    """
+    Return the buffer of file stored in buffers (dict), create it if needed.
+
+    For ascii files, the buffer is an AsciiBuffer. For binary files, it is the
+    flat array of bytes of the whole file (memory-mapped if mmap is True).
+    """
+    key = (filetype, str(file))
+    ascii_key = ("ascii", str(file))
+    if key not in buffers.keys():
+        if filetype == "ascii":
+            buffers[key] = AsciiBuffer(file)
+        elif ascii_key in buffers.keys():  # file with ascii and binary data
+            buffers[key] = buffers[ascii_key].read_bytes(mmap=mmap)
+        elif mmap:
+            buffers[key] = np.memmap(file, dtype=np.uint8, mode="c")
+        else:
+            buffers[key] = np.fromfile(file, dtype=np.uint8)
+    return buffers[key]
+
+
+def close_buffers(buffers):
+    """Close the files kept open by the buffers (see get_buffer)"""
+    for buffer in buffers.values():
+        if isinstance(buffer, AsciiBuffer):
+            buffer.close()
+
+
 def load_values(
-    file, filetype="ascii", datatype="double", skip=0, offset=0, stride=1, size=None
+    file,
+    filetype="ascii",
+    datatype="double",
+    skip=0,
+    offset=0,
+    stride=1,
+    size=None,
+    mmap=False,
+    buffers=None,
 ):
-    """Return flat array of floating values"""
-    if filetype == "ascii":
+    """
+    Return flat array of values
 
-        stop = skip + size if size != None else None
-        with open(file, "rb") as f:
-            lines = islice(f, skip, stop, 1)
-            values = [line.decode("ascii").replace("\n", "").strip().split()[offset] for line in lines]
-    elif filetype == "binary":
-        datatypes = {"double": "d"}
-        datatype_sizes = {"double": 8}
-        datatype_size = datatype_sizes[datatype]
-        with open(file, "rb") as datafile:
-            datafile.seek(skip)
-            data = datafile.read(size * datatype_size)
-            values = []
-            iteration = struct.iter_unpack(datatypes[datatype], data)
-            for i in iteration:
-                values.append(i[0])
+    For ascii files, skip is the number of lines to skip and the values are
+    taken every stride numbers starting at the offset-th number
+    (see AsciiBuffer.get_values). For binary files, skip is the number of
+    bytes to skip and offset/stride are given in number of elements.
+
+    If mmap is True, binary values are returned as a strided view of a
+    copy-on-write numpy.memmap with the dtype given by datatype.
+    Otherwise, an array of floats is returned. Binary doubles are not copied:
+    the values are a view of the bytes read from the file.
 
+    buffers is an optional dict shared between calls (see get_buffer),
+    so that each file is opened, read and parsed only once for all its values.
+    The caller is responsible for closing them with close_buffers.
+    """
+    if filetype == "ascii":
+        if buffers is None:
+            with AsciiBuffer(file) as buffer:
+                return buffer.get_values(
+                    skip=skip, offset=offset, stride=stride, size=size
+                )
+        buffer = get_buffer(buffers, file, filetype)
+        return buffer.get_values(skip=skip, offset=offset, stride=stride, size=size)
+    elif filetype == "binary":
+        dtype = avs_dtype(datatype)
+        count = -1 if size is None else offset + (size - 1) * stride + 1
+        if buffers is not None:
+            raw = get_buffer(buffers, file, filetype, mmap=mmap)[skip:]
+            if count == -1:
+                count = raw.size // dtype.itemsize
+            data = raw[: count * dtype.itemsize].view(dtype)
+            if mmap:
+                return data[offset::stride]
+        elif mmap:
+            shape = None if size is None else (count,)
+            data = np.memmap(file, dtype=dtype, mode="c", offset=skip, shape=shape)
+            return data[offset::stride]
+        else:
+            with open(file, "rb") as datafile:
+                datafile.seek(skip)
+                data = np.fromfile(datafile, dtype=dtype, count=count)
+        values = data[offset::stride]
     else:
         raise ValueError("filetype is not recognized or implemented")
-    return np.array(values, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if not values.flags.writeable:
+        values = values.copy()
+    return values
+
+
+def load_avs_values(
+    vmeta, datatype="double", dims=None, mmap=False, buffers=None, layout=None
+):
+    """
+    Return the values described by a variable or coord line of an AVS header
+    (see values_metadata), reshaped to dims if specified (see reshape_values
+    for layout)
+    """
+    values = load_values(
+        file=vmeta["file"],
+        filetype=vmeta["filetype"],
+        datatype=datatype,
+        skip=vmeta["skip"],
+        offset=vmeta["offset"],
+        stride=vmeta["stride"],
+        size=vmeta["size"],
+        mmap=mmap,
+        buffers=buffers,
+    )
+    if dims is not None:
+        values = reshape_values(values, *dims, layout=layout)
+    return values
+
+
+def reshape_values(values, *dims, layout=None):
+    """
+    Return the flat values (first dimension varying fastest, as in AVS and VTK
+    files) reshaped to dims.
 
+    layout is the memory layout of the result: 'C' or 'F' (Fortran)
+    contiguous, copied at most once and only if needed, or None (default) for
+    a view without copy (Fortran contiguous if values is contiguous).
+    """
+    values = np.reshape(values, tuple(int(dim) for dim in dims), order="F")
+    return as_layout(values, layout)
 
-def reshape_values(values, *dims):
-    dims = np.flip(dims)
-    shape = tuple([dim for dim in dims])
-    values = np.reshape(values, shape)
-    return np.transpose(values)
+
+def as_layout(values, layout=None):
+    """
+    Return values as a 'C' or 'F' (Fortran) contiguous array, copied only if
+    it is not already. If layout is None, values is returned as it is.
+    """
+    if layout is None:
+        return values
+    if layout not in ("C", "F"):
+        raise ValueError(f"layout must be 'C', 'F' or None, not {layout}")
+    return np.require(values, requirements=layout)
+
+
+vtk_block_size = 2**20  # bytes, uncompressed size of the compressed blocks
+
+
+def vtk_data_streams(value, compress=False, header_dtype=np.dtype("<u8")):
+    """
+    Return the binary VTK data array of value (flat, little-endian) as a list
+    of streams, each a list of bytes-like objects. Each stream is base64
+    encoded separately: [[header, data]] or, if compress (zlib),
+    [[header], compressed blocks].
+    """
+    data = memoryview(np.ascontiguousarray(value)).cast("B")
+    if not compress:
+        return [[np.array([data.nbytes], dtype=header_dtype).tobytes(), data]]
+    with concurrent.futures.ThreadPoolExecutor() as executor:  # zlib releases the GIL
+        blocks = list(
+            executor.map(
+                zlib.compress,
+                (data[start : start + vtk_block_size] for start in range(0, data.nbytes, vtk_block_size)),
+            )
+        )
+    last_size = data.nbytes - (len(blocks) - 1) * vtk_block_size if blocks else 0
+    sizes = [len(blocks), vtk_block_size, last_size] + [len(block) for block in blocks]
+    return [[np.array(sizes, dtype=header_dtype).tobytes()], blocks]
+
+
+def write_vtk_binary(coordinates, variables, filename, appended=False, encoding="raw", compress=False):
+    """
+    Write a VTK XML RectilinearGrid file (.vtr) with binary data.
+
+    The arrays are written from memory without text formatting: inline base64
+    (appended=False) or in an appended data section (appended=True) encoded
+    with encoding 'raw' or 'base64'. If compress is True, the arrays are
+    compressed with zlib in blocks of vtk_block_size bytes (in parallel).
+    Compression is much slower than writing and floating point data usually
+    shrinks by 5-30 % only.
+
+    Parameters
+    ----------
+    coordinates : list of Coord
+        1 to 3 coordinates (x, y, z)
+    variables : list of Variable
+        values of shape (len(x), len(y), len(z)) (squeezed dimensions are allowed)
+    """
+    if len(coordinates) < 1 or len(coordinates) > 3:
+        raise ValueError("Coordinates array must have 1, 2 or 3 objects.")
+    if encoding not in ["raw", "base64"]:
+        raise ValueError(f"encoding must be 'raw' or 'base64', not {encoding}")
+    if not appended:
+        encoding = "base64"
+    vtk_types = {np.dtype(dtype).str[1:]: name for name, dtype in _vtk_types.items()}
+    axes = ["X", "Y", "Z"]
+    coords = [(f"{coord.name.upper()}_COORDINATES", coord.value) for coord in coordinates]
+    coords += [(f"{axes[i]}_COORDINATES", [0.0]) for i in range(len(coords), 3)]
+    dims = [np.size(value) for _, value in coords]
+
+    sections = {"Coordinates": [], "PointData": []}  # (name, vtk type, streams)
+    for name, value in coords:
+        value = np.asarray(value, dtype="<f8").ravel()
+        sections["Coordinates"].append((name, "Float64", vtk_data_streams(value, compress)))
+    for variable in variables:
+        name = f"{variable.name}[{variable.unit}]" if variable.unit else variable.name
+        value = np.asarray(variable.value)
+        if value.dtype.str[1:] not in vtk_types:
+            value = value.astype(float)
+        value = value.astype(value.dtype.newbyteorder("<"), copy=False)
+        if value.size != np.prod(dims):
+            raise ValueError(f"The size of {variable.name} does not match the coordinates")
+        streams = vtk_data_streams(np.ravel(value, order="F"), compress)
+        sections["PointData"].append((name, vtk_types[value.dtype.str[1:]], streams))
+
+    def encoded_size(stream):
+        nbytes = sum(memoryview(chunk).nbytes for chunk in stream)
+        return -(-nbytes // 3) * 4 if encoding == "base64" else nbytes
+
+    def write_streams(file, streams):
+        for stream in streams:
+            if encoding == "base64":
+                file.write(base64.b64encode(b"".join(stream)))
+            else:
+                for chunk in stream:
+                    file.write(chunk)
+
+    extent = " ".join(f"0 {dim - 1}" for dim in dims)
+    compressor = ' compressor="vtkZLibDataCompressor"' if compress else ""
+    offset = 0
+    with open(filename, "wb") as file:
+        file.write(
+            f'<?xml version="1.0"?>\n<VTKFile type="RectilinearGrid" version="1.0" '
+            f'byte_order="LittleEndian" header_type="UInt64"{compressor}>\n'
+            f'<RectilinearGrid WholeExtent="{extent}">\n<Piece Extent="{extent}">\n'.encode()
+        )
+        for section, arrays in sections.items():
+            file.write(f"<{section}>\n".encode())
+            for name, vtk_type, streams in arrays:
+                attributes = f'type="{vtk_type}" Name="{name}" NumberOfComponents="1"'
+                if appended:
+                    file.write(f'<DataArray {attributes} format="appended" offset="{offset}"/>\n'.encode())
+                    offset += sum(encoded_size(stream) for stream in streams)
+                else:
+                    file.write(f'<DataArray {attributes} format="binary">\n'.encode())
+                    write_streams(file, streams)
+                    file.write(b"\n</DataArray>\n")
+            file.write(f"</{section}>\n".encode())
+        file.write(b"</Piece>\n</RectilinearGrid>\n")
+        if appended:
+            file.write(f'<AppendedData encoding="{encoding}">\n_'.encode())
+            for arrays in sections.values():
+                for name, vtk_type, streams in arrays:
+                    write_streams(file, streams)
+            file.write(b"\n</AppendedData>\n")
+        file.write(b"</VTKFile>\n")
+
+
+def avs_field_header(coordinates, variables, values_lines):
+    """
+    Return the header of an AVS field file (.fld) for rectilinear double data.
+
+    Parameters
+    ----------
+    coordinates : list of Coord
+    variables : list of Variable
+    values_lines : list of str
+        'variable ...' and 'coord ...' lines (see values_metadata)
+    """
+    lines = ["# AVS/Express field file", "#", f"ndim = {len(coordinates)}"]
+    lines += [f"dim{i + 1} = {coord.value.size}" for i, coord in enumerate(coordinates)]
+    lines += [
+        f"nspace = {len(coordinates)}",
+        f"veclen = {len(variables)}",
+        "data = double",
+        "field = rectilinear",
+    ]
+    lines += [f"label = {var.name}[{var.unit}]" for var in variables]
+    lines += [""] + list(values_lines) + [""]
+    return "\n".join(lines) + "\n"
+
+
+def avs_coords_text(coordinates):
+    """Return the ascii values of the coordinates, each followed by an empty line"""
+    text = []
+    for coord in coordinates:
+        values = np.asarray(coord.value, dtype=float).flatten("F")
+        text.append("".join(f"{value:.8f}\n" for value in values) + "\n")
+    return "".join(text)
+
+
+def avs_coords_lines(coordinates, filename, skip=0):
+    """Return the 'coord ...' lines of the ascii coordinates written by avs_coords_text"""
+    lines = []
+    for i, coord in enumerate(coordinates):
+        lines.append(
+            f"coord {i + 1} file={filename} filetype=ascii skip={skip} offset=0 stride=1"
+        )
+        skip += coord.value.size + 1  # 1 for empty line after each coord
+    return lines
+
+
+def avs_binary_values(variable):
+    """Return the values of variable as flat (Fortran order) doubles, as stored in binary AVS files"""
+    return np.ravel(np.asarray(variable.value, dtype=float), order="F")
 
 
 def write_avsascii_one_file(coordinates, variables, filename, binary=False):
-    if binary:
-        filetype = "binary"
-        numpy_encoding = "bytes"
-    else:
-        filetype = "ascii"
-        numpy_encoding = "bytes"
+    """
+    Write an AVS field file (.fld) with the coordinates and the variables in
+    the same file, after the header.
+
+    The coordinates are written as ascii (skip in lines). If binary is True,
+    the variables are written as raw doubles after the coordinates (skip in
+    bytes), like the binary/ascii mixed outputs of nextnano. Otherwise they are
+    written as ascii as well (skip in lines).
+    """
     # Validate input
     if len(coordinates) < 2 or len(coordinates) > 3:
         raise ValueError("Coordinates array must have exactly 2 or 3 objects.")
 
-    num_coords = len(coordinates)
-    num_variables = len(variables)
-
-    # Calculate skip values
-    # TODO calculate skip values (in bytes?) for binary output
-    header_up_to_first_label = 9
-    header_lines = (
-        header_up_to_first_label + num_variables + 1 + num_variables + num_coords + 1
-    )  # each 1 is skipped line
-    coord_skip_values = [header_lines]
-    for i in range(num_coords - 1):
-        coord_skip_values.append(
-            coord_skip_values[-1] + coordinates[i].value.size + 1
-        )  # 1 for empty line after each coord
-
-    data_skip = coord_skip_values[-1] + coordinates[-1].value.size + 1
-
-    # Calculate the number of lines each variable takes
-    number_of_lines_for_var = np.prod([coord.value.size for coord in coordinates])
-
-    # Open file for writing
-    with open(filename, "w") as file:
-        # Write header
-        file.write("# AVS/Express field file\n")
-        file.write("#\n")
-        file.write(f"ndim = {num_coords}\n")
-
-        for i in range(num_coords):
-            file.write(f"dim{i+1} = {coordinates[i].value.size}\n")
-
-        file.write("nspace = {}\n".format(num_coords))
-        file.write(f"veclen = {num_variables}\n")
-        file.write("data = double\n")
-        file.write("field = rectilinear\n")
-
-        # Write variable labels and units
-        for i in range(num_variables):
-            file.write(f"label = {variables[i].name}[{variables[i].unit}]\n")
-
-        # Write an empty line after the last label
-        file.write("\n")
-
-        # Write variable file paths
-        for i, var in enumerate(variables):
-            file.write(
-                f"variable {i + 1} file={filename} filetype={filetype} skip={data_skip + i * number_of_lines_for_var} offset=0 stride=1\n"
-            )
-
-        # Write coordinate file paths
-        for coord, skip_value, i in zip(
-            coordinates, coord_skip_values, range(num_coords)
-        ):
-            file.write(
-                f"coord {i+1} file={filename} filetype={filetype} skip={skip_value} offset=0 stride=1\n"
-            )
+    name = os.path.basename(filename)  # paths are relative to the .fld file
+    filetype = "binary" if binary else "ascii"
+    coords_text = avs_coords_text(coordinates)
+    number_of_values = int(np.prod([coord.value.size for coord in coordinates]))
 
-        # Write an empty line after the last coord line
-        file.write("\n")
+    def header(variable_skips):
+        values_lines = [
+            f"variable {i + 1} file={name} filetype={filetype} skip={skip} offset=0 stride=1"
+            for i, skip in enumerate(variable_skips)
+        ]
+        values_lines += avs_coords_lines(coordinates, name)
+        header_lines = len(avs_field_header(coordinates, variables, values_lines).splitlines())
+        values_lines[len(variable_skips) :] = avs_coords_lines(coordinates, name, skip=header_lines)
+        return avs_field_header(coordinates, variables, values_lines)
+
+    # the skips are written in the header, so the header size depends on them
+    skips = [0] * len(variables)
+    while True:
+        if binary:
+            data_skip = len(header(skips).encode()) + len(coords_text.encode())  # bytes
+            step = number_of_values * np.dtype(float).itemsize
+        else:
+            data_skip = len(header(skips).splitlines()) + len(coords_text.splitlines())
+            step = number_of_values
+        new_skips = [data_skip + i * step for i in range(len(variables))]
+        if new_skips == skips:
+            break
+        skips = new_skips
+
+    with open(filename, "wb") as file:
+        file.write(header(skips).encode())
+        file.write(coords_text.encode())
+        for var in variables:
+            if binary:
+                avs_binary_values(var).tofile(file)
+            else:
+                np.savetxt(file, var.value.flatten("F"), fmt="%.8f")
 
-        # Write data for coordinates
-        for coord in coordinates:
-            np.savetxt(
-                file, coord.value.flatten("F"), fmt="%.8f", encoding=numpy_encoding
-            )
-            file.write("\n")
 
-        # Write data for variables
+def write_avsbinary(coordinates, variables, filename):
+    """
+    Write an AVS field file (.fld) with the variables as raw doubles in a .v
+    file (skip in bytes) and the coordinates as ascii in a .coord file, both
+    with the same name as the .fld file.
+    """
+    if len(coordinates) < 1 or len(coordinates) > 3:
+        raise ValueError("Coordinates array must have 1, 2 or 3 objects.")
+    base = os.path.splitext(filename)[0]
+    values_file, coords_file = base + ".v", base + ".coord"
+    nbytes = int(np.prod([coord.value.size for coord in coordinates])) * np.dtype(float).itemsize
+    values_lines = [
+        f"variable {i + 1} file={os.path.basename(values_file)} filetype=binary skip={i * nbytes} offset=0 stride=1"
+        for i in range(len(variables))
+    ]
+    values_lines += avs_coords_lines(coordinates, os.path.basename(coords_file))
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(avs_field_header(coordinates, variables, values_lines))
+    with open(coords_file, "w") as file:
+        file.write(avs_coords_text(coordinates))
+    with open(values_file, "wb") as file:
         for var in variables:
-            np.savetxt(
-                file, var.value.flatten("F"), fmt="%.8f", encoding=numpy_encoding
-            )
+            avs_binary_values(var).tofile(file)
+
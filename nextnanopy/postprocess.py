@@ -3,8 +3,6 @@ from nextnanopy.utils.misc import combinations
 from collections.abc import Iterable
 import os
 import numpy as np
-from scipy.optimize import minimize as sp_minimize
-from scipy.optimize import fsolve
 
 elementary_charge = 1.60217662e-19
 
@@ -35,6 +33,7 @@ def minimize(input_file, variables_names, x0, target_filepath, target_variable,
     if isinstance(variables_names, Iterable):
         if len(variables_names) != len(x0):
             raise ValueError('variables and x0 should be of the same length')
+    from scipy.optimize import minimize as sp_minimize
     result = sp_minimize(minimization_function, x0, args = (input_file, variables_names, target_filepath, target_variable, number, overwrite), tol = 1e-5)
     return result
 
@@ -44,6 +43,7 @@ def optimize(input_file, variables_names, x0, target_filepath, target_variable,
     if isinstance(variables_names,Iterable):
         if len(variables_names) != len(x0):
             raise ValueError('variables and x0 should be of the same length')
+    from scipy.optimize import fsolve
     result = fsolve(optimization_function, x0, args = (input_file, variables_names, target_filepath, target_variable, target_value, number, overwrite), xtol = 1e-5,factor=1)
     input_file.save(overwrite = True)
     return result
@@ -1,10 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from cycler import cycler
-import gdspy
 import warnings
 from itertools import chain
-import shapely
+
+# gdspy, shapely and matplotlib are imported on first use (slow imports)
 
 units_factor = {
     'nm': 1e-9,
@@ -79,6 +77,8 @@ class GdsPolygonsRaw(object):
         else:
             by_spec = False
 
+        import gdspy
+
         gds_lib = gdspy.GdsLibrary(infile=self.fullpath)
         xys = []
         if cells is not None:
@@ -102,6 +102,9 @@ class GdsPolygonsRaw(object):
 
     # -- Useful show methods
     def _prepare_ax(self, ax=None, cmap='nipy_spectral'):
+        import matplotlib.pyplot as plt
+        from cycler import cycler
+
         plt.ion()
         if not ax:
             fig, ax = plt.subplots(1)
@@ -173,6 +176,8 @@ class GdsPolygonsRaw(object):
         ----------
             clip_box: tuple (minx, miny, maxx, maxy)
         """
+        import shapely.geometry
+
         minx, miny, maxx, maxy = clip_box
         clip_box = shapely.geometry.box(minx=minx, miny=miny, maxx=maxx, maxy=maxy)
         clipped_polygons = []
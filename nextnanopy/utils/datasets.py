@@ -4,6 +4,11 @@ import numpy as np
 default_unit = ""
 
 
+def default_label_fmt(name, unit):
+    # module-level function (not a lambda) so that datasets can be pickled
+    return f'{name} ({unit})'
+
+
 class Data(object):
     """
     This class stores any kind of information from nextnano files (input files, data files).
@@ -24,6 +29,12 @@ class Data(object):
     label_fmt : method, optional
         formatting label with label_fmt(name, unit) (default is None)
         If it is None, label_fmt = lambda name, unit: f'{name} ({unit})'
+    loader : method, optional
+        loader() returns the value. If it is not None, the value is not stored
+        at initialization but loaded on first access (default is None)
+    on_load : method, optional
+        on_load(data) is called each time the value is loaded with loader.
+        It can be used to evict other values with .unload() (default is None)
 
     Attributes
     ----------
@@ -38,22 +49,71 @@ class Data(object):
     label_fmt : method
         formatting label with label_fmt(name, unit) (default is None)
         If it is None, label_fmt = lambda name, unit: f'{name} ({unit})'
+    loaded : bool
+        False if the value has to be loaded with loader on next access
+
+    The value is stored without copy (np.asanyarray): an array given at
+    initialization (e.g. memory-mapped data) is shared, not duplicated.
+
+    Methods
+    ----------
+    unload()
+        free the stored value if it can be loaded again with loader
+    view()
+        return a read-only view of the value (no copy)
     """
 
+    __slots__ = ('name', '_value', 'unit', 'metadata', 'label_fmt', 'loader', 'on_load', '__weakref__')
     params = ['name', 'value', 'unit', 'metadata'],
 
-    def __init__(self, name, value, unit=None, metadata={}, label_fmt=None, *args,
-                 **kwargs):
+    def __init__(self, name, value, unit=None, metadata={}, label_fmt=None, loader=None,
+                 on_load=None, *args, **kwargs):
         self.name = str(name)
-        self.value = np.array(value)
+        self.loader = loader
+        self.on_load = on_load
+        if loader is None:
+            self.value = np.asanyarray(value)
+        else:
+            self._value = None
         if unit is None or unit == '':
             unit = default_unit
         self.unit = str(unit)
         if label_fmt is None:
-            label_fmt = lambda name, unit: f'{name} ({unit})'
+            label_fmt = default_label_fmt
         self.label_fmt = label_fmt
         self.metadata = metadata
 
+    @property
+    def value(self):
+        if self._value is None and self.loader is not None:
+            self._value = np.asanyarray(self.loader())
+            if self.on_load is not None:
+                self.on_load(self)
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    @property
+    def loaded(self):
+        return self._value is not None or self.loader is None
+
+    def unload(self):
+        if self.loader is not None:
+            self._value = None
+
+    def view(self):
+        value = self.value.view()
+        value.flags.writeable = False
+        return value
+
+    @property
+    def _shape_str(self):
+        if not self.loaded:
+            return 'not loaded'
+        return str(self.value.shape)
+
     def parameters(self):
         dict_ = {}
         for param in self.params:
@@ -112,21 +172,23 @@ class Variable(Data):
 
     Methods
     ----------
-    get_value()
-        return a copy of the value
+    get_value(copy=True)
+        return a copy of the value (a read-only view if copy is False)
 
     """
+    __slots__ = ()
     params = ['name', 'value', 'unit', 'metadata']
 
     def __init__(self, name, value, unit=None, metadata={}, **kwargs):
         super().__init__(name, value, unit, metadata, **kwargs)
 
-    def get_value(self):
-        value = deepcopy(self.value)
-        return value
+    def get_value(self, copy=True):
+        if not copy:
+            return self.view()
+        return self.value.copy()
 
     def __str__(self):
-        return f'name: {self.name} - unit: {self.unit} - shape: {self.value.shape}'
+        return f'name: {self.name} - unit: {self.unit} - shape: {self._shape_str}'
 
 
 class Coord(Data):
@@ -173,30 +235,37 @@ class Coord(Data):
         formatting label with label_fmt(name, unit) (default is None)
         If it is None, label_fmt = lambda name, unit: f'{name} ({unit})'
     valueo : not defined
-        value with offset
+        value with offset, computed on access (a new writable array, use
+        get_value(use_offset=True, copy=False) for a view if the offset is 0)
 
     Methods
     ----------
-    get_value(use_offset=False)
+    get_value(use_offset=False, copy=True)
         return a copy of the value with or without the offset
+        (a read-only view if copy is False and there is no offset to add)
     """
 
+    __slots__ = ('dim', 'offset')
     params = ['name', 'value', 'unit', 'offset', 'dim', 'metadata']
 
     def __init__(self, name, value, dim, unit=None, offset=0, metadata={}, **kwargs):
         super().__init__(name, value, unit, metadata, **kwargs)
         self.dim = int(dim)
         self.offset = np.array(offset)
-        self.valueo = self.get_value(use_offset=True)
 
-    def get_value(self, use_offset=False):
-        value = deepcopy(self.value)
-        if use_offset:
-            value += self.offset
-        return value
+    @property
+    def valueo(self):
+        return self.get_value(use_offset=True)
+
+    def get_value(self, use_offset=False, copy=True):
+        if use_offset and np.any(self.offset != 0):
+            return self.value + self.offset
+        if not copy:
+            return self.view()
+        return self.value.copy()
 
     def __str__(self):
-        return f'name: {self.name} - unit: {self.unit} - shape: {self.value.shape} - dim: {self.dim}'
+        return f'name: {self.name} - unit: {self.unit} - shape: {self._shape_str} - dim: {self.dim}'
 
 
 class InputVariable(Data):
@@ -246,6 +315,7 @@ class InputVariable(Data):
         return a copy of the value
     """
 
+    __slots__ = ('comment',)
     params = ['name', 'value', 'unit', 'comment', 'metadata']
     var_char = ''
     com_char = ''
@@ -48,7 +48,15 @@ def pattern_in_text(text, input_pattern):
     return False
 
 
-def generate_command(args):
+def generate_command(args, argv=False):
+    """
+    Return the command line of a list of (argument, value) pairs.
+    Empty arguments are skipped, empty values are omitted.
+
+    If argv is True, return the list of arguments to execute without a shell
+    instead of a string: the quoted values (see _path) are single arguments
+    without the quotes, the other ones are split on whitespace.
+    """
     cmd = []
     for case in args:
         arg, value = case
@@ -56,10 +64,19 @@ def generate_command(args):
         if not _a:
             continue
         elif _a and not _v:
-            cmdi = f"{arg}"
+            cmdi = [arg]
+        else:
+            cmdi = [arg, value]
+        if argv:
+            for item in map(str, cmdi):
+                if len(item) > 1 and item[0] == item[-1] == '"':
+                    cmd.append(item[1:-1])
+                else:
+                    cmd.extend(item.split())
         else:
-            cmdi = f"{arg} {value}"
-        cmd.append(cmdi)
+            cmd.append(' '.join(f"{item}" for item in cmdi))
+    if argv:
+        return cmd
     cmd = ' '.join(cmd)
     return cmd
 
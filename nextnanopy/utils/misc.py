@@ -38,7 +38,8 @@ def get_folder(fullpath):
 def get_path_files(path):
     if path == '':
         path = '.'
-    files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+    with os.scandir(path) as entries:
+        files = [entry.name for entry in entries if entry.is_file()]
     return files
 
 
@@ -76,9 +77,9 @@ def find_unused_in_folder(fullpath, overwrite=False):
     #folder, name = os.path.split(fullpath)
     name = os.path.basename(fullpath)
     folder = os.path.dirname(fullpath)
-    ext = get_file_extension(name)
-    cwd_files = get_path_files(folder)
-    if not overwrite:
+    if not overwrite:  # the folder is listed only if needed
+        ext = get_file_extension(name)
+        cwd_files = get_path_files(folder)
         name = find_unused_name(name, cwd_files, ext)
     return os.path.join(folder, name)
 
@@ -19,47 +19,88 @@ class DictList(OrderedDict):
         >>> 3
         >>> 't'
 
+        The list of keys and their indexes are kept up to date when items are
+        added, so that the access by integer index and get_indx are O(1).
+        They are rebuilt once after a key is removed or moved.
+        Each iteration has its own iterator (nested loops over the same
+        DictList are possible).
 
     """
     def __init__(self, *args, **kwargs):
+        self._keys = []  # keys in order, None if it has to be rebuilt
+        self._indexes = {}  # {key: index}
         super().__init__(*args, **kwargs)
 
+    def _index(self):
+        """Return the list of keys and the dict {key: index}, rebuilt if needed"""
+        if self._keys is None or len(self._keys) != len(self):
+            self._keys = list(self.keys())
+            self._indexes = {key: i for i, key in enumerate(self._keys)}
+        return self._keys, self._indexes
+
+    def _reset_index(self):
+        self._keys = None
+        self._indexes = None
+
     @property
     def _idxs(self):
-        return OrderedDict(enumerate(self.keys()))
+        return OrderedDict(enumerate(self._index()[0]))
 
     def get_indx(self, key):
-        for i, _key in enumerate(self.keys()):
-            if _key == key:
-                return i
-        raise KeyError('No such key in the DictList')
+        try:
+            return self._index()[1][key]
+        except KeyError:
+            raise KeyError('No such key in the DictList')
 
     def __getitem__(self, key):
         if isinstance(key, int):
-            if key < 0:
-                key = len(self) + key
-            key = self._idxs[key]
+            keys = self._index()[0]
+            if not -len(keys) <= key < len(keys):
+                raise KeyError(key)
+            key = keys[key]
         item = super().__getitem__(key)
         return item
 
+    def __setitem__(self, key, value):
+        new = key not in self
+        super().__setitem__(key, value)
+        if new and self._keys is not None:
+            self._indexes[key] = len(self._keys)
+            self._keys.append(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._reset_index()
+
+    def pop(self, *args, **kwargs):
+        self._reset_index()
+        return super().pop(*args, **kwargs)
+
+    def popitem(self, *args, **kwargs):
+        self._reset_index()
+        return super().popitem(*args, **kwargs)
+
+    def clear(self):
+        self._reset_index()
+        super().clear()
+
+    def move_to_end(self, *args, **kwargs):
+        self._reset_index()
+        super().move_to_end(*args, **kwargs)
+
+    def __reduce__(self):
+        state = {key: value for key, value in vars(self).items() if key not in ('_keys', '_indexes')}
+        return self.__class__, (), state or None, None, iter(self.items())
+
     def __repr__(self):
         return self.__str__()
 
     def __str__(self):
         cname = self.__class__.__name__
-        args = [f"(index: {idx} - key: '{key}' - {value})" for idx, key, value in
-                zip(self._idxs.keys(), self.keys(), self.values())]
+        args = [f"(index: {idx} - key: '{key}' - {value})" for idx, (key, value) in
+                enumerate(self.items())]
         args = ',\n'.join(args)
         return f"{cname}([\n{args}\n])"
 
     def __iter__(self):
-        self._iter_index = 0
-        return self
-
-    def __next__(self):
-        try:
-            result = self.__getitem__(self._iter_index)
-        except (IndexError, KeyError):
-            raise StopIteration
-        self._iter_index += 1
-        return result
+        return iter(self.values())
@@ -13,12 +13,14 @@ extras = {
     "matplotlib": ("matplotlib", "3.2", "conda"),
     "cycler": ("cycler", "0.10", "conda"),
     "shapely": ("shapely", "1.7", "conda"),
+    "pyvista": ("pyvista", "0.27", "pip"),
+    "h5py": ("h5py", "3.0", "pip"),
+    "zarr": ("zarr", "2.10", "pip"),
 }
 extras_require = {k: ">=".join(v[0:2]) for k, v in extras.items()}
 
 install_requires = [
     "numpy>=1.18",
-    "pyvista>=0.27",
 ]
 
 setuptools.setup(
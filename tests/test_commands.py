@@ -1,7 +1,13 @@
 import unittest
+import os
+import sys
+import time
+import asyncio
+import tempfile
 from pathlib import Path
 from nextnanopy import commands
 from nextnanopy.utils.formatting import _path, _bool
+from tests import write_solver
 
 folder_nnp = Path("tests") / "datafiles" / "nextnano++"
 folder_nn3 = Path("tests") / "datafiles" / "nextnano3"
@@ -36,6 +42,9 @@ class TestCommands(unittest.TestCase):
 
         self.assertEqual(command_nnp(**kwargs), cmd)
         self.assertEqual(commands.command(**kwargs), cmd)
+        argv = [str(exe), runmode, "--license", str(license), "--database", str(database), "--threads", "4",
+                "--outputdirectory", str(outputdirectory), "--noautooutdir", "--autosave", "--logfile", str(inputfile)]
+        self.assertEqual(commands.command(**kwargs, argv=True), argv)
 
     def test_commands_nn3(self):
         self.maxDiff = None
@@ -141,6 +150,108 @@ class TestCommands(unittest.TestCase):
             outputdirectory="",
         )
 
+    @unittest.skipUnless(os.name == "posix", "the stand-in solver is a shell script")
+    def test_execute_solver(self):
+        with tempfile.TemporaryDirectory() as folder:
+            folder = Path(folder) / "with space"
+            folder.mkdir()
+            solver = write_solver(folder / "solver", 'echo args: "$@"; echo error 1>&2')
+            kwargs = dict(
+                inputfile=folder_nnp / "example.in",
+                exe=solver,
+                license="",
+                database=folder / "database $HOME.in",
+                outputdirectory=folder / "outputs",
+                show_log=False,
+            )
+            info = commands.execute(**kwargs)
+            self.assertIsInstance(info["process"].args, list)  # no shell
+            self.assertEqual(info["process"].returncode, 0)
+            self.assertIsNone(info["log_thread"])
+            self.assertEqual([info[key] for key in ["queue", "tout", "terr"]], [None] * 3)
+            with open(info["logfile"]) as f:
+                log = f.read()
+            self.assertIn(f"--database {folder / 'database $HOME.in'} --threads", log)
+            self.assertIn("error\n", log)
+
+            info = commands.execute(parallel=True, **kwargs)
+            self.assertIs(info["tout"], info["log_thread"])
+            info["terr"].join()
+            self.assertEqual(info["process"].wait(), 0)
+            with open(info["logfile"]) as f:
+                self.assertEqual(f.read(), log)
+
+    def test_pump_log(self):
+        import subprocess
+
+        script = (
+            "import sys, time\n"
+            "for i in range(200):\n"
+            "    sys.stdout.write(f'out {i} \u00e9\\n'); sys.stdout.flush()\n"
+            "    sys.stderr.write(f'err {i}\\n'); sys.stderr.flush()\n"
+            "sys.stdout.buffer.write('no newline \u00e9'.encode()[:-1])\n"
+            "sys.stdout.buffer.flush(); time.sleep(0.1)\n"
+            "sys.stdout.buffer.write('no newline \u00e9'.encode()[-1:])\n"
+        )
+        process = commands.send([sys.executable, "-c", script])
+        with tempfile.TemporaryDirectory() as folder:
+            logfile = Path(folder) / "test.log"
+            commands.pump_log(process, logfile, show=False)
+            self.assertEqual(process.wait(), 0)
+            with open(logfile, encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        self.assertEqual(len(lines), 401)
+        self.assertEqual([l for l in lines if l.startswith("out")], [f"out {i} \u00e9" for i in range(200)])
+        self.assertEqual([l for l in lines if l.startswith("err")], [f"err {i}" for i in range(200)])
+        self.assertEqual(lines[-1], "no newline \u00e9")
+
+    @unittest.skipUnless(os.name == "posix", "the stand-in solver is a shell script")
+    def test_execute_async(self):
+        with tempfile.TemporaryDirectory() as folder:
+            folder = Path(folder)
+            solver = write_solver(folder / "solver", "echo args: \"$@\"; echo error 1>&2")
+            slow_solver = write_solver(folder / "slow solver", "exec sleep 10")
+            kwargs = dict(
+                inputfile=folder_nnp / "example.in",
+                license="",
+                database=folder / "database.in",
+                outputdirectory=folder / "outputs",
+                show_log=False,
+            )
+            info = asyncio.run(commands.execute_async(exe=solver, **kwargs))
+            self.assertEqual(info["returncode"], 0)
+            self.assertEqual(info["outputdirectory"], folder / "outputs" / "example")
+            with open(info["logfile"]) as f:
+                log = f.read()
+            self.assertIn(f"--database {folder / 'database.in'} --threads", log)
+            self.assertIn(str((folder_nnp / "example.in").resolve()), log)
+            self.assertIn("error", log)
+
+            # a line longer than the limit of asyncio.StreamReader (64 KiB)
+            long_solver = write_solver(
+                folder / "long solver", "head -c 200000 /dev/zero | tr '\\0' '#'; echo; echo end"
+            )
+            info = asyncio.run(commands.execute_async(exe=long_solver, **kwargs))
+            self.assertEqual(info["returncode"], 0)
+            with open(info["logfile"]) as f:
+                self.assertEqual(f.read(), "#" * 200000 + "\nend\n")
+
+            start = time.perf_counter()
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(commands.execute_async(exe=slow_solver, timeout=0.2, **kwargs))
+            self.assertLess(time.perf_counter() - start, 5)
+
+            async def cancel():
+                task = asyncio.ensure_future(commands.execute_async(exe=slow_solver, **kwargs))
+                await asyncio.sleep(0.2)
+                task.cancel()
+                await task
+
+            start = time.perf_counter()
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(cancel())
+            self.assertLess(time.perf_counter() - start, 5)
+
     def test_bool(self):
         self.assertEqual(_bool(""), False)
         self.assertEqual(_bool(None), False)
@@ -30,6 +30,51 @@ class TestDatasets(unittest.TestCase):
         self.assertEqual(ds.get_value(use_offset=True), ds.value + ds.offset)
         self.assertEqual(ds.get_value(use_offset=False), ds.value)
 
+    def test_loader(self):
+        calls = []
+        ds = Variable(name='test', value=None, loader=lambda: [1, 2, 3], on_load=calls.append)
+        self.assertFalse(ds.loaded)
+        self.assertIn('not loaded', str(ds))
+        np.testing.assert_array_equal(ds.value, [1, 2, 3])
+        self.assertTrue(ds.loaded)
+        self.assertEqual(calls, [ds])
+        ds.value
+        self.assertEqual(len(calls), 1)
+        ds.unload()
+        self.assertFalse(ds.loaded)
+        np.testing.assert_array_equal(ds.value, [1, 2, 3])
+        self.assertEqual(len(calls), 2)
+
+        ds = Coord(name='test', value=None, dim=0, offset=1, loader=lambda: [1, 2])
+        self.assertFalse(ds.loaded)
+        np.testing.assert_array_equal(ds.valueo, [2, 3])
+
+        ds = Variable(name='test', value=2)
+        ds.unload()
+        self.assertTrue(ds.loaded)
+        self.assertEqual(ds.value, np.array(2))
+
+    def test_no_copy(self):
+        value = np.arange(6.)
+        ds = Variable(name='test', value=value)
+        self.assertIs(ds.value, value)
+        self.assertFalse(hasattr(ds, '__dict__'))
+        view = ds.get_value(copy=False)
+        self.assertTrue(np.shares_memory(view, value))
+        self.assertFalse(view.flags.writeable)
+        copy = ds.get_value()
+        self.assertFalse(np.shares_memory(copy, value))
+
+        ds = Coord(name='test', value=value, dim=0)
+        self.assertFalse(np.shares_memory(ds.valueo, value))
+        ds.valueo[0] = -1
+        np.testing.assert_array_equal(ds.value, np.arange(6.))
+        self.assertTrue(np.shares_memory(ds.get_value(use_offset=True, copy=False), value))
+        ds.offset = np.array(1)
+        np.testing.assert_array_equal(ds.valueo, value + 1)
+        np.testing.assert_array_equal(ds.value, np.arange(6.))
+
+
 
 if __name__ == '__main__':
     unittest.main()
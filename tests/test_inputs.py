@@ -1,8 +1,16 @@
 import unittest
 import os
+import sys
+import json
+import asyncio
+import time
+import subprocess
 import tempfile
 from pathlib import Path
-from nextnanopy.inputs import InputFile, Sweep
+from nextnanopy.inputs import InputFile, Sweep, ExecutionQueue, thread_plan
+from nextnanopy.commands import start_log
+from nextnanopy.backends import get_backend, LocalBackend, ManagerBackend, BatchBackend
+from tests import write_solver
 
 
 def delete_files(start, directory=Path.cwd(), exceptions=None):
@@ -193,6 +201,30 @@ class Test_nnp(unittest.TestCase):
         file.save()
         self.assertTrue(Path("only_variables_0.in").is_file())
 
+    def test_compile(self):
+        fullpath = folder_nnp / "example.in"
+        file = InputFile(fullpath)
+        template = file.compile()
+        self.assertEqual(template.render(), file.text)
+
+        text = template.render({"BIAS": 0.5, "ALLOY": 0.2}, comment="SWEPT")
+        changed = [
+            (old, new)
+            for old, new in zip(file.text.split("\n"), text.split("\n"))
+            if old != new
+        ]
+        self.assertEqual(changed, [
+            ("$BIAS = 0.0 # Gate voltage(V)", "$BIAS = 0.5 # SWEPT"),
+            ("$ALLOY = 0.3 # Al content of AlGaAs layer", "$ALLOY = 0.2 # SWEPT"),
+        ])
+        self.assertRaises(KeyError, template.render, {"NOT_A_VARIABLE": 1})
+
+        copy = template.input_file({"BIAS": 0.5}, fullpath="copy.in", comment="SWEPT")
+        self.assertEqual(copy.text, template.render({"BIAS": 0.5}, comment="SWEPT"))
+        self.assertEqual(copy.fullpath, "copy.in")
+        self.assertEqual(file.variables["BIAS"].text, "$BIAS = 0.0 # Gate voltage(V)")
+        self.assertEqual(Path(file.fullpath), fullpath)
+
     ###content tests
 
     def test_content_get(self):
@@ -954,6 +986,141 @@ class TestSweep(unittest.TestCase):
             combination = list(combination.values())
             combination[0] > 0.2
 
+    @unittest.skipUnless(os.name == "posix", "the stand-in solver is a shell script")
+    def test_execute_sweep_async(self):
+        self.addCleanup(
+            delete_files,
+            "only_variables",
+            directory=folder_nnp,
+            exceptions=["only_variables.in"],
+        )
+        fullpath = folder_nnp / "only_variables.in"
+        sweep = Sweep({"float": [0.5, 1.5, 2.5]}, fullpath)
+        sweep.save_sweep()
+        with tempfile.TemporaryDirectory() as folder:
+            solver = write_solver(Path(folder) / "solver")
+
+            async def execute():
+                finished = []
+                async for inputfile, info in sweep.execute_sweep_async(
+                    parallel_limit=2, show_log=False, exe=solver, license="", database="",
+                    outputdirectory=Path(folder) / "outputs", convergenceCheck=True,
+                ):
+                    self.assertEqual(info["returncode"], 0)
+                    self.assertTrue(Path(info["logfile"]).is_file())
+                    finished.append(inputfile)
+                return finished
+
+            finished = asyncio.run(execute())
+            self.assertCountEqual(finished, sweep.input_files)
+            with open(Path(sweep.sweep_output_directory) / "sweep_infodict.json") as f:
+                infodict = json.load(f)
+            self.assertEqual(sorted(v["float"] for v in infodict.values()), [0.5, 1.5, 2.5])
+
+            # input() would block the event loop
+            async def pause():
+                runs = sweep.execute_sweep_async(convergenceCheck=True, convergence_check_mode="pause")
+                await runs.__anext__()
+
+            self.assertRaises(ValueError, asyncio.run, pause())
+            coroutine = sweep.input_files[0].execute_async(convergenceCheck=True, convergence_check_mode="pause")
+            self.assertRaises(ValueError, asyncio.run, coroutine)
+
+    def execute_sweep_backend(self, backend, folder, delete_input_files=False):
+        self.addCleanup(
+            delete_files,
+            "only_variables",
+            directory=folder_nnp,
+            exceptions=["only_variables.in"],
+        )
+        sweep = Sweep({"float": [0.5, 1.5, 2.5]}, folder_nnp / "only_variables.in")
+        sweep.save_sweep()
+        solver = write_solver(Path(folder) / "solver")
+        sweep.execute_sweep(
+            backend=backend, delete_input_files=delete_input_files, show_log=False,
+            exe=solver, license="", database="", outputdirectory=Path(folder) / "outputs",
+        )
+        with open(Path(sweep.sweep_output_directory) / "sweep_infodict.json") as f:
+            infodict = json.load(f)
+        self.assertEqual(sorted(v["float"] for v in infodict.values()), [0.5, 1.5, 2.5])
+        return sweep
+
+    def assert_executed(self, sweep):
+        for inputfile in sweep.input_files:
+            folder = Path(inputfile.folder_output)
+            self.assertEqual(folder.parent, Path(sweep.sweep_output_directory).resolve())
+            with open(folder / f"{folder.name}.log") as f:
+                self.assertIn(inputfile.filename, f.read())
+
+    def test_get_backend(self):
+        self.assertIsInstance(get_backend(), LocalBackend)
+        backend = get_backend("local", parallel_limit=2, cores=8)
+        self.assertEqual((backend.parallel_limit, backend.cores), (2, 8))
+        backend = BatchBackend()
+        self.assertIs(get_backend(backend), backend)
+        self.assertRaises(ValueError, get_backend, "ssh")
+        self.assertRaises(ValueError, BatchBackend, "lsf")
+
+    @unittest.skipUnless(os.name == "posix", "the stand-in solver is a shell script")
+    def test_backend_local(self):
+        with tempfile.TemporaryDirectory() as folder:
+            sweep = self.execute_sweep_backend(LocalBackend(parallel_limit=2), folder)
+            for inputfile in sweep.input_files:
+                self.assertEqual(inputfile.execute_info["process"].returncode, 0)
+                self.assertEqual(inputfile.execute_info["returncode"], 0)
+                self.assertIn(inputfile.filename, Path(inputfile.execute_info["logfile"]).read_text())
+
+    @unittest.skipUnless(os.name == "posix", "the stand-in solver is a shell script")
+    def test_backend_manager(self):
+        worker = [sys.executable, "-m", "nextnanopy.backends", "worker", "{address}"]
+        backend = ManagerBackend(workers=[worker, worker], address=("127.0.0.1", 0))
+        with tempfile.TemporaryDirectory() as folder:
+            folder = Path(folder).resolve()
+            sweep = self.execute_sweep_backend(backend, folder)
+            self.assertTrue(backend.worker_address.startswith("127.0.0.1:"))
+            for inputfile in sweep.input_files:
+                self.assertEqual(inputfile.execute_info["returncode"], 0)
+            self.assert_executed(sweep)
+
+    def test_backend_manager_error(self):
+        worker = [sys.executable, "-m", "nextnanopy.backends", "worker", "{address}"]
+        idle = [sys.executable, "-c", "import time; time.sleep(60)"]
+        backend = ManagerBackend(workers=[worker, idle])
+        self.assertEqual(backend.address, ("127.0.0.1", 0))
+        with tempfile.TemporaryDirectory() as folder:
+            input_files = [InputFile(folder_nnp / "only_variables.in")]
+            # the worker fails to execute the missing solver, the idle one is killed
+            self.assertRaises(
+                RuntimeError, backend.run, input_files, folder,
+                exe=str(Path(folder) / "missing"), license="", database="",
+            )
+            self.assertEqual([p.poll() is not None for p in backend.processes], [True, True])
+
+    @unittest.skipUnless(os.name == "posix", "the stand-in solver is a shell script")
+    def test_backend_batch(self):
+        with tempfile.TemporaryDirectory() as folder:
+            folder = Path(folder).resolve()
+            backend = BatchBackend(scheduler="local", submit=["sh"])
+            sweep = self.execute_sweep_backend(backend, folder, delete_input_files=True)
+            self.assertEqual(backend.script, Path(sweep.sweep_output_directory) / "sweep_local.sh")
+            infos = [f.execute_info for f in sweep.input_files]
+            self.assertEqual([info["task"] for info in infos], [0, 1, 2])
+            self.assertEqual([info["returncode"] for info in infos], [None] * 3)
+            self.assertFalse(any(Path(f.fullpath).exists() for f in sweep.input_files))
+            self.assert_executed(sweep)
+
+            backend = BatchBackend(scheduler="slurm", parallel_limit=2, name="test")
+            sweep = self.execute_sweep_backend(backend, folder)
+            with open(backend.script) as f:
+                script = f.read()
+            self.assertIn("#SBATCH --job-name=test\n#SBATCH --array=0-2%2\n", script)
+            self.assertIn("-m nextnanopy.backends run", script)
+            with open(Path(sweep.sweep_output_directory) / "sweep_jobs.json") as f:
+                jobs = json.load(f)
+            self.assertEqual([job["filename"] for job in jobs], [f.filename for f in sweep.input_files])
+            self.assertIn("float", jobs[0]["text"])
+            self.assertFalse(any(Path(f.folder_output).exists() for f in sweep.input_files))
+
     def test_conditional_sweep_multivar(self):
         self.addCleanup(
             delete_files,
@@ -977,6 +1144,110 @@ class TestSweep(unittest.TestCase):
             self.assertTrue(combination[1] > combination[0])
 
 
+class CountingPopen(subprocess.Popen):
+    """Popen counting the calls to poll()"""
+    polls = 0
+
+    def poll(self):
+        CountingPopen.polls += 1
+        return super().poll()
+
+
+class SleepInputFile(object):
+    """Stands in for an InputFile whose simulation sleeps for some seconds"""
+
+    def __init__(self, seconds, folder, threads=0):
+        self.seconds = seconds
+        self.folder = folder
+        self.fullpath = None
+        self.default_command_args = {"threads": threads}
+
+    def execute(self, **kwargs):
+        self.threads = kwargs.get("threads")
+        PIPE = subprocess.PIPE
+        cmd = [sys.executable, "-c", f"import time; time.sleep({self.seconds})"]
+        process = CountingPopen(cmd, stdout=PIPE, stderr=PIPE)
+        logfile = Path(self.folder) / f"{id(self)}.log"
+        log_thread = start_log(process, logfile, show=False, parallel=True)
+        return {"process": process, "log_thread": log_thread}
+
+
+class TestExecutionQueue(unittest.TestCase):
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as folder:
+            files = [SleepInputFile(0.5, folder) for _ in range(4)]
+            execution_queue = ExecutionQueue(limit_parallel=2, show_log=False)
+            execution_queue.add(*files)
+            CountingPopen.polls = 0
+            execution_queue.start()
+            execution_queue.join()
+
+            self.assertTrue(execution_queue.all_done())
+            infos = execution_queue.finished
+            self.assertEqual(len(infos), 4)
+            # the queue waits for the processes instead of polling them
+            self.assertEqual(CountingPopen.polls, 0)
+            # two slots: a job starts only once a running one has ended
+            for info in infos:
+                running = [other for other in infos
+                           if other["start_time"] <= info["start_time"] < other["end_time"]]
+                self.assertLessEqual(len(running), 2)
+            starts = sorted(info["start_time"] for info in infos)
+            ends = sorted(info["end_time"] for info in infos)
+            self.assertGreaterEqual(starts[2], ends[0])
+            self.assertGreaterEqual(starts[3], ends[1])
+
+            metrics = execution_queue.metrics()
+            self.assertEqual(metrics["finished"], 4)
+            self.assertEqual(metrics["running"], 0)
+            self.assertEqual(metrics["waiting"], 0)
+            self.assertAlmostEqual(metrics["throughput"], 4 / metrics["elapsed"])
+            self.assertGreaterEqual(metrics["mean_runtime"], 0.5)
+            self.assertGreaterEqual(metrics["mean_wait"], 0)
+            self.assertGreater(metrics["utilization"], 0)
+            self.assertLessEqual(metrics["utilization"], 1)
+
+    def test_stop(self):
+        with tempfile.TemporaryDirectory() as folder:
+            execution_queue = ExecutionQueue(limit_parallel=2, terminate_empty=False, show_log=False)
+            execution_queue.start()
+            execution_queue.add(SleepInputFile(0.1, folder))
+            time.sleep(0.5)
+            self.assertTrue(execution_queue.is_alive())
+            execution_queue.add(SleepInputFile(0.1, folder))
+            execution_queue.stop()
+            execution_queue.join(timeout=10)
+            self.assertFalse(execution_queue.is_alive())
+            self.assertEqual(execution_queue.metrics()["finished"], 2)
+
+    def test_thread_plan(self):
+        self.assertEqual(thread_plan([0] * 6, 4, 16), [4, 4, 4, 4, 8, 8])
+        self.assertEqual(thread_plan([0] * 3, 8, 2), [1, 1, 2])
+        self.assertEqual(thread_plan([4, 4, 4, 0, 0], 8, 10), [5, 5, 5, 2, 3])
+        self.assertRaises(ValueError, thread_plan, [4], 2, 2)
+
+    def test_cores(self):
+        with tempfile.TemporaryDirectory() as folder:
+            files = [SleepInputFile(0.3, folder, threads=2) for _ in range(5)]
+            execution_queue = ExecutionQueue(limit_parallel=4, cores=6, show_log=False)
+            execution_queue.add(*files)
+            planned = [threads for _, threads in execution_queue.plan()]
+            self.assertEqual(planned, [2, 2, 2, 3, 3])
+            execution_queue.start()
+            execution_queue.join()
+
+            infos = execution_queue.finished
+            self.assertEqual(len(infos), 5)
+            self.assertEqual(sorted(f.threads for f in files), sorted(info["threads"] for info in infos))
+            self.assertTrue(all(f.threads >= 2 for f in files))
+            for info in infos:
+                running = [other["threads"] for other in infos
+                           if other["start_time"] <= info["start_time"] < other["end_time"]]
+                self.assertLessEqual(sum(running), 6)
+
+            self.assertRaises(ValueError, execution_queue.add, SleepInputFile(0.1, folder, threads=8))
+
+
 if __name__ == "__main__":
     unittest.main()
 
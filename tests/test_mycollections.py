@@ -1,3 +1,5 @@
+import copy
+import pickle
 import unittest
 from nextnanopy.utils.mycollections import DictList
 
@@ -20,6 +22,52 @@ class TestDictList(unittest.TestCase):
         for value, expected in zip(dl, dl.values()):
             self.assertEqual(value, expected)
 
+    def test_nested_loop(self):
+        dl = DictList(a=3, b='test')
+        pairs = [(x, y) for x in dl for y in dl]
+        self.assertEqual(pairs, [(3, 3), (3, 'test'), ('test', 3), ('test', 'test')])
+
+    def test_index_update(self):
+        dl = DictList(a=1, b=2, c=3)
+        self.assertEqual(dl[-1], 3)
+        self.assertEqual(dl.get_indx('c'), 2)
+        dl['d'] = 4
+        self.assertEqual(dl[3], 4)
+        del dl['a']
+        self.assertEqual(dl[0], 2)
+        self.assertEqual(dl.get_indx('d'), 2)
+        dl.move_to_end('b')
+        self.assertEqual(dl[-1], 2)
+        self.assertEqual(dl.pop('c'), 3)
+        self.assertEqual(list(dl), [4, 2])
+        self.assertRaises(KeyError, dl.__getitem__, 2)
+        self.assertRaises(KeyError, dl.get_indx, 'a')
+        for other in [pickle.loads(pickle.dumps(dl)), copy.deepcopy(dl), dl.copy()]:
+            self.assertEqual(other, dl)
+            self.assertEqual(other[1], 2)
+            self.assertEqual(other.get_indx('b'), 1)
+
+    def test_index_rebuilds(self):
+        # the list of keys is rebuilt (O(n), with .keys()) only after a removal:
+        # the integer access and get_indx are O(1), it took minutes when each access was O(n)
+        class CountingDictList(DictList):
+            rebuilds = 0
+
+            def keys(self):
+                CountingDictList.rebuilds += 1
+                return super().keys()
+
+        n = 20000
+        dl = CountingDictList((f'key_{i}', i) for i in range(n))
+        self.assertEqual(sum(dl[i] for i in range(n)), sum(range(n)))
+        self.assertEqual(sum(dl), sum(range(n)))
+        self.assertEqual(sum(dl.get_indx(f'key_{i}') for i in range(n)), sum(range(n)))
+        self.assertEqual(CountingDictList.rebuilds, 0)
+
+        del dl['key_0']
+        self.assertEqual(sum(dl[i] for i in range(n - 1)), sum(range(n)))
+        self.assertEqual(dl.get_indx('key_1'), 0)
+        self.assertEqual(CountingDictList.rebuilds, 1)
 
 if __name__ == '__main__':
     unittest.main()
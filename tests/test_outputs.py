@@ -1,8 +1,19 @@
+import builtins
+import importlib.util
+import json
+import os
+import re
+import shutil
+import tempfile
+import tracemalloc
 import unittest
 import warnings
+from unittest import mock
+
+import numpy as np
 
 import nextnanopy.outputs as outputs
-from nextnanopy.utils.datasets import default_unit
+from nextnanopy.utils.datasets import Coord, Variable, default_unit
 from pathlib import Path
 
 folder_nnp = Path("tests") / "datafiles" / "nextnano++"
@@ -244,7 +255,33 @@ class TestOutputs_nnp(unittest.TestCase):
         self.assertEqual(len(datafile.variables), 1)
     
     # TODO add tests for loading Origin like file
-    # TODO add tests for exporting binary data
+
+    def test_save_avs(self):
+        for file in ["bandedges_2d.fld", "potential.fld"]:
+            df = outputs.DataFile(folder_nnp / file, product="nextnano++")
+            with tempfile.TemporaryDirectory() as tmp:
+                for format in ["AvsBinary", "AvsBinary_one_file", "AvsAscii_one_file"]:
+                    filepath = os.path.join(tmp, f"{format}.fld")
+                    df.save(filepath, format=format)
+                    fld = outputs.DataFile(filepath, product="nextnano++")
+                    self.assertEqual(list(fld.variables.keys()), list(df.variables.keys()))
+                    for key in df.coords.keys():
+                        np.testing.assert_allclose(fld[key].value, df[key].value, atol=1e-8)
+                    if format != "AvsAscii_one_file":
+                        for key in df.variables.keys():
+                            np.testing.assert_array_equal(fld[key].value, df[key].value)
+
+    def test_save_avs_non_ascii(self):
+        df = outputs.DataFile(folder_nnp / "bandedges_2d.fld", product="nextnano++")
+        for var in df.variables.values():
+            var.unit = "\u00b5eV"
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "AvsBinary_one_file.fld")
+            df.save(filepath, format="AvsBinary_one_file")
+            fld = outputs.DataFile(filepath, product="nextnano++")
+            for key in df.variables.keys():
+                self.assertEqual(fld[key].unit, "\u00b5eV")
+                np.testing.assert_array_equal(fld[key].value, df[key].value)
 
 
 class TestOutputs_nn3(unittest.TestCase):
@@ -744,6 +781,544 @@ class TestOutput(unittest.TestCase):
             self.assertEqual(df.data[i], dfi)
 
 
+def count_opened_files(*args, **kwargs):
+    """Return DataFile(*args, **kwargs) and the list of paths opened while loading"""
+    opened = []
+    _open = builtins.open
+
+    def counting_open(file, *open_args, **open_kwargs):
+        opened.append(os.path.normpath(str(file)))
+        return _open(file, *open_args, **open_kwargs)
+
+    with mock.patch("builtins.open", counting_open):
+        df = outputs.DataFile(*args, **kwargs)
+    return df, opened
+
+
+class TestLoadPipeline(unittest.TestCase):
+
+    files = [
+        (folder_nnp / "bandedges_1d.dat", "nextnano++"),
+        (folder_nnp / "total_charges.txt", "nextnano++"),
+        (folder_nnp / "bandedges_2d.fld", "nextnano++"),
+        (folder_nnp / "bandedges_2d_old.fld", "nextnano++"),
+        (folder_nnp / "AvsBinaryAscii_mix" / "ldos_total_cbr_Gamma.fld", "nextnano++"),
+        (folder_nn3 / "BandEdges.fld", "nextnano3"),
+        (folder_negf / "ReducedRealSpaceModes.dat", "nextnano.NEGF"),
+        (folder_msb / "DOS_Lead_Source_position_resolved.avs.fld", "nextnano.MSB"),
+    ]
+
+    def test_each_file_opened_once(self):
+        for mmap in [True, False]:
+            for file, product in self.files:
+                df, opened = count_opened_files(file, product=product, mmap=mmap)
+                files = [os.path.normpath(f) for f in df.load_info["files"]]
+                self.assertEqual(sorted(opened), sorted(files), msg=str(file))
+
+    def test_load_info(self):
+        for file, product in self.files:
+            df = outputs.DataFile(file, product=product)
+            self.assertNotIn("load_info", df.metadata)
+            df = outputs.DataFile(file, product=product, instrument=True)
+            load_info = df.metadata["load_info"]
+            self.assertEqual(load_info, df.load_info)
+            self.assertEqual(set(load_info.keys()), {"loader", "files", "nbytes", "time"})
+            self.assertGreater(load_info["nbytes"], 0)
+            self.assertGreaterEqual(load_info["time"], 0)
+
+        df = outputs.DataFile(folder_nnp / "bandedges_2d_old.fld", product="nextnano++")
+        self.assertEqual(df.load_info["loader"], "AvsAscii")
+        self.assertEqual(len(df.load_info["files"]), 3)
+        df = outputs.DataFile(folder_nnp / "wf_occupation_1d.dat", product="nextnano++")
+        self.assertEqual(df.load_info["loader"], "Dat")
+
+
+class TestSniffLoader(unittest.TestCase):
+
+    def test_autodetection(self):
+        files = TestLoadPipeline.files + [
+            (folder_nnp / "variables_input.txt", "nextnano++"),
+            (folder_nnp / "overlap_integrals_k00000.txt", "nextnano++"),
+            (folder_nn3 / "variables_input.txt", "nextnano3"),
+            (folder_nn3 / "BandEdges.vtr", "nextnano3"),
+            (folder_nnp / "bandedges_2d_old.dat", "nextnano++"),
+            (folder_msb / "DOS_Lead_Source_position_resolved.avs.dat", "nextnano.MSB"),
+        ]
+        for file, product in files:
+            df_product = outputs.DataFile(file, product=product)
+            df = outputs.DataFile(file)
+            self.assertEqual(df.load_info["loader"], df_product.load_info["loader"])
+            self.assertEqual(list(df.coords.keys()), list(df_product.coords.keys()))
+            self.assertEqual(list(df.variables.keys()), list(df_product.variables.keys()))
+        self.assertEqual(len(outputs.DataFile(folder_nn3 / "variables_input.txt").variables), 3)
+
+        self.assertRaises(NotImplementedError, outputs.DataFile, folder_nnp / "materials.txt")
+        self.assertRaises(NotImplementedError, outputs.DataFile, folder_nnp / "example.in")
+
+    def test_header_only(self):
+        file = folder_nnp / "bandedges_1d.dat"
+        df, opened = count_opened_files(file)
+        self.assertEqual(opened, [os.path.normpath(file)] * 2)  # sniffing + loading
+
+        with mock.patch.object(outputs.Dat, "load") as load:
+            self.assertIs(outputs.sniff_loader(file), outputs.Dat)
+            load.assert_not_called()
+
+    def test_register_loader(self):
+        class MyLoader(outputs.Output):
+            pass
+
+        file = folder_nnp / "bandedges_1d.dat"
+        outputs.register_loader(MyLoader, [".dat"], lambda fullpath, header: b"Gamma" in header)
+        try:
+            self.assertIs(outputs.sniff_loader(file), MyLoader)
+            self.assertIs(outputs.sniff_loader(folder_nnp / "wf_occupation_1d.dat"), outputs.Dat)
+        finally:
+            outputs.unregister_loader(MyLoader)
+        self.assertIs(outputs.sniff_loader(file), outputs.Dat)
+
+
+class TestLazy(unittest.TestCase):
+
+    def test_avs(self):
+        file = folder_nnp / "bandedges_2d.fld"
+        calls = []
+        df = outputs.DataFile(file, product="nextnano++", lazy=True, on_load=calls.append)
+        df_eager = outputs.DataFile(file, product="nextnano++")
+        self.assertEqual(list(df.data.keys()), list(df_eager.data.keys()))
+        self.assertEqual(df.metadata["dims"], [164, 79])
+        self.assertFalse(any(data.loaded for data in df.data.values()))
+
+        np.testing.assert_array_equal(df["Gamma"].value, df_eager["Gamma"].value)
+        self.assertEqual(calls, [df["Gamma"]])
+        self.assertFalse(df["electron_Fermi_level"].loaded)
+        np.testing.assert_array_equal(df["y"].value, df_eager["y"].value)
+
+        df.unload()
+        self.assertFalse(any(data.loaded for data in df.data.values()))
+
+    def test_dat(self):
+        file = folder_nnp / "bandedges_1d.dat"
+        df = outputs.DataFile(file, product="nextnano++", lazy=True)
+        df_eager = outputs.DataFile(file, product="nextnano++")
+        self.assertEqual(list(df.coords.keys()), list(df_eager.coords.keys()))
+        self.assertEqual(list(df.variables.keys()), list(df_eager.variables.keys()))
+        self.assertFalse(any(data.loaded for data in df.data.values()))
+        with mock.patch.object(
+            outputs.Dat, "_read_columns", autospec=True, side_effect=outputs.Dat._read_columns
+        ) as read:
+            for key in df.data.keys():
+                np.testing.assert_array_equal(df[key].value, df_eager[key].value)
+                self.assertEqual(df[key].unit, df_eager[key].unit)
+            read.assert_called_once()
+
+
+class TestDatChunks(unittest.TestCase):
+
+    def test_iter_chunks(self):
+        file = folder_nnp / "bandedges_1d.dat"
+        dat = outputs.Dat(file, lazy=True)
+        df = outputs.DataFile(file, product="nextnano++")
+        blocks = list(dat.iter_chunks(chunk_size=100))
+        self.assertTrue(len(blocks) > 1)
+        self.assertTrue(all(len(block["x"]) <= 100 for block in blocks[:-1]))
+        self.assertEqual(list(blocks[0].keys()), list(df.data.keys()))
+        for key in df.data.keys():
+            values = np.concatenate([block[key] for block in blocks])
+            np.testing.assert_array_equal(values, df[key].value)
+
+    def test_read_columns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "data.dat")
+            values = np.random.rand(1000, 3) * np.array([1, -1e-10, 1e5])
+            np.savetxt(file, values, header="x[nm] a b[eV]", comments="")
+            df = outputs.DataFile(file, product="nextnano++")
+            np.testing.assert_array_equal(df["x"].value, values[:, 0])
+            np.testing.assert_array_equal(df["a"].value, values[:, 1])
+            np.testing.assert_array_equal(df["b"].value, values[:, 2])
+            self.assertEqual(df["b"].unit, "eV")
+            self.assertTrue(df["b"].value.flags["C_CONTIGUOUS"])
+
+            with open(file, "a") as f:
+                f.write("1 2\n")
+            self.assertRaises(ValueError, outputs.Dat, file)
+
+            # ragged rows with a total number of values divisible by the columns
+            with open(file, "w") as f:
+                f.write("x a b\n1 2 3\n4 5\n6 7 8 9\n")
+            self.assertRaises(ValueError, outputs.Dat, file)
+
+
+class TestCache(unittest.TestCase):
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = os.path.join(tmp, "cache")
+            file = os.path.join(tmp, "data.dat")
+            np.savetxt(file, np.random.rand(10, 2), header="x[nm] y[eV]", comments="")
+
+            df = outputs.DataFile(file, product="nextnano++", cache=cache)
+            self.assertFalse(df.load_info["cache"])
+            df_cached = outputs.DataFile(file, product="nextnano++", cache=cache)
+            self.assertTrue(df_cached.load_info["cache"])
+            self.assertEqual(df_cached.load_info["loader"], "Dat")
+            # the index is plain json, the values are .npy files
+            (entry,) = os.listdir(cache)
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(cache, entry))), ["0.npy", "1.npy", "index.json"]
+            )
+            with open(os.path.join(cache, entry, "index.json")) as f:
+                self.assertEqual(json.load(f)["version"], outputs.cache_version)
+            self.assertIsInstance(df_cached["y"].value, np.memmap)
+            self.assertIsInstance(df_cached["x"], outputs.Coord)
+            self.assertEqual(df_cached["y"].unit, "eV")
+            self.assertEqual(df_cached.metadata, df.metadata)
+            self.assertEqual(df_cached.metadata[0], {"name": "x", "unit": "nm"})
+            np.testing.assert_array_equal(df_cached["y"].value, df["y"].value)
+
+            df_other = outputs.DataFile(
+                file, product="nextnano++", cache=cache, FirstVarIsCoordFlag=False
+            )
+            self.assertFalse(df_other.load_info["cache"])
+
+            values = np.random.rand(12, 2)
+            np.savetxt(file, values, header="x[nm] y[eV]", comments="")
+            os.utime(file, ns=(0, 0))
+            df_modified = outputs.DataFile(file, product="nextnano++", cache=cache)
+            self.assertFalse(df_modified.load_info["cache"])
+            np.testing.assert_array_equal(df_modified["y"].value, values[:, 1])
+
+            outputs.clear_cache(cache)
+            self.assertFalse(os.path.exists(cache))
+            df = outputs.DataFile(file, product="nextnano++")
+            self.assertNotIn("cache", df.load_info)
+
+    def test_avs(self):
+        file = folder_nnp / "bandedges_2d.fld"
+        with tempfile.TemporaryDirectory() as tmp:
+            df = outputs.DataFile(file, product="nextnano++", cache=tmp)
+            df_cached = outputs.DataFile(file, product="nextnano++", cache=tmp)
+            self.assertTrue(df_cached.load_info["cache"])
+            self.assertEqual(df_cached.source_files(), df.source_files())
+            self.assertEqual(df_cached.metadata, df.metadata)
+            for key in df.data.keys():
+                np.testing.assert_array_equal(df_cached[key].value, df[key].value)
+                self.assertEqual(df_cached[key].metadata, df[key].metadata)
+
+    def test_metadata(self):
+        metadata = {
+            0: {"name": "x", "unit": "nm"},
+            "dims": (3, np.int64(4)),
+            "dict": ["not", "a", "tag"],
+            "values": np.arange(3, dtype=np.float32),
+            "path": Path("a") / "b",
+        }
+        data = json.loads(json.dumps(outputs.encode_metadata(metadata)))
+        decoded = outputs.decode_metadata(data)
+        self.assertEqual(list(decoded.keys()), list(metadata.keys()))
+        self.assertEqual(decoded[0], metadata[0])
+        self.assertEqual(decoded["dims"], (3, 4))
+        self.assertEqual(decoded["dict"], ["not", "a", "tag"])
+        self.assertEqual(decoded["values"].dtype, np.float32)
+        np.testing.assert_array_equal(decoded["values"], metadata["values"])
+        self.assertEqual(decoded["path"], str(metadata["path"]))
+        self.assertRaises(TypeError, outputs.encode_metadata, {"a": object()})
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("h5py") and importlib.util.find_spec("zarr"),
+    "h5py and zarr are required",
+)
+class TestArchive(unittest.TestCase):
+    def test_save(self):
+        for file in [folder_nnp / "bandedges_1d.dat", folder_nnp / "potential.vtr"]:
+            df = outputs.DataFile(file, product="nextnano++")
+            with tempfile.TemporaryDirectory() as tmp:
+                for format, ext in [("hdf5", ".h5"), ("zarr", ".zarr")]:
+                    filepath = os.path.join(tmp, f"archive{ext}")
+                    df.save(filepath, format=format, compress=True)
+                    df_archive = outputs.DataFile(filepath, product="nextnano++")
+                    self.assertEqual(df_archive.load_info["loader"], "Archive")
+                    self.assertEqual(list(df_archive.data.keys()), list(df.data.keys()))
+                    self.assertEqual(df_archive.metadata, df.metadata)
+                    for key in df.data.keys():
+                        np.testing.assert_array_equal(df_archive[key].value, df[key].value)
+                        self.assertEqual(df_archive[key].unit, df[key].unit)
+                        self.assertEqual(df_archive[key].metadata, df[key].metadata)
+
+    def test_folder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "output")
+            os.makedirs(os.path.join(output, "sweep_1"))
+            for file in ["bandedges_1d.dat", "bandedges_2d_old.fld", "bandedges_2d_old.dat", "bandedges_2d_old.coord", "example.log"]:
+                shutil.copy(folder_nnp / file, os.path.join(output, "sweep_1", file))
+            with open(os.path.join(output, "sweep_infodict.json"), "w") as f:
+                json.dump({"sweep_1": {"x": 1}}, f)
+            folder = outputs.DataFolder(output)
+            for ext in [".h5", ".zarr"]:
+                archive = folder.to_archive(os.path.join(tmp, f"output{ext}"), product="nextnano++")
+                self.assertIsInstance(outputs.DataFolder(archive.fullpath), outputs.ArchiveFolder)
+                self.assertEqual(archive.read_sweep_infodict(), {"sweep_1": {"x": 1}})
+                # the .dat and .coord files of the AVS field are stored with the .fld file
+                self.assertEqual(
+                    archive.sweep_1.filenames(),
+                    ["bandedges_1d.dat", "bandedges_2d_old.fld", "example.log"],
+                )
+                self.assertEqual(archive.sweep_1.entries["example.log"], "file")
+                log = outputs.read_archive_file(archive.go_to("sweep_1", "example.log"))
+                with open(folder_nnp / "example.log", "rb") as f:
+                    self.assertEqual(log, f.read())
+                for file in ["bandedges_1d.dat", "bandedges_2d_old.fld"]:
+                    df = outputs.DataFile(os.path.join(output, "sweep_1", file), product="nextnano++")
+                    df_archive = outputs.DataFile(archive.go_to("sweep_1", file), lazy=True)
+                    self.assertFalse(any(data.loaded for data in df_archive.data.values()))
+                    self.assertEqual(df_archive.metadata, df.metadata)
+                    for key in df.data.keys():
+                        np.testing.assert_array_equal(df_archive[key].value, df[key].value)
+
+            # path of the folder instead of a DataFolder
+            filepath = os.path.join(tmp, "path.h5")
+            self.assertEqual(outputs.write_archive(output, filepath, product="nextnano++"), {})
+            archive = outputs.DataFolder(filepath)
+            self.assertEqual(
+                archive.sweep_1.filenames(),
+                ["bandedges_1d.dat", "bandedges_2d_old.fld", "example.log"],
+            )
+
+
+class TestMemory(unittest.TestCase):
+    """Peak memory of the loading of 3D AVS and VTK files compared to the size of their values"""
+
+    def peak_memory(self, filepath, **loader_kwargs):
+        tracemalloc.start()
+        try:
+            with mock.patch("sys.stdout"):
+                df = outputs.DataFile(filepath, product="nextnano++", **loader_kwargs)
+            df.coords["x"].valueo
+            df.variables["v0"].get_value(copy=False)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_load(self):
+        n = 60
+        coords = [Coord(name=name, value=np.linspace(0, 1, n), dim=i) for i, name in enumerate("xyz")]
+        variables = [Variable(name=f"v{i}", value=np.random.rand(n, n, n)) for i in range(2)]
+        nbytes = sum(var.value.nbytes for var in variables)
+        with tempfile.TemporaryDirectory() as tmp:
+            fld, vtr = os.path.join(tmp, "data.fld"), os.path.join(tmp, "data.vtr")
+            outputs.write_avsbinary(coords, variables, fld)
+            outputs.write_vtk_binary(coords, variables, vtr, appended=True)
+            self.assertLess(self.peak_memory(fld), 0.1 * nbytes)  # memory-mapped
+            self.assertLess(self.peak_memory(fld, mmap=False), 1.2 * nbytes)
+            self.assertLess(self.peak_memory(vtr), 1.2 * nbytes)
+
+
+def write_vtr(file, coords, values, data_format="binary", compress=False, byte_order="<"):
+    """Write a .vtr file with one point data array 'f[eV]' (binary data written by hand)"""
+    import base64
+    import zlib
+
+    arrays = [np.asarray(coord, dtype=byte_order + "f8") for coord in coords]
+    arrays.append(np.asarray(values, dtype=byte_order + "f8").ravel(order="F"))
+    header_dtype = byte_order + "u4"
+    encoded, appended = [], b""
+    for array in arrays:
+        data = array.tobytes()
+        if compress:
+            block = zlib.compress(data)
+            header = np.array([1, len(data), len(data), len(block)], dtype=header_dtype).tobytes()
+            chunks = [header, block]
+        else:
+            chunks = [np.array([len(data)], dtype=header_dtype).tobytes() + data]
+        if data_format == "binary":
+            encoded.append(b"".join(base64.b64encode(chunk) for chunk in chunks).decode())
+        else:
+            encoded.append(len(appended))
+            appended += b"".join(chunks)
+
+    def data_array(name, i):
+        if data_format == "binary":
+            return f'<DataArray type="Float64" Name="{name}" format="binary">\n{encoded[i]}\n</DataArray>\n'
+        return f'<DataArray type="Float64" Name="{name}" format="appended" offset="{encoded[i]}"/>\n'
+
+    extent = " ".join(f"0 {len(coord) - 1}" for coord in coords)
+    order = "BigEndian" if byte_order == ">" else "LittleEndian"
+    compressor = ' compressor="vtkZLibDataCompressor"' if compress else ""
+    text = f'<VTKFile type="RectilinearGrid" version="1.0" byte_order="{order}" header_type="UInt32"{compressor}>\n'
+    text += f'<RectilinearGrid WholeExtent="{extent}">\n<Piece Extent="{extent}">\n'
+    text += "<PointData>\n" + data_array("f[eV]", len(coords)) + "</PointData>\n"
+    text += "<Coordinates>\n"
+    text += "".join(data_array(f"{axis.upper()}_COORDINATES", i) for i, axis in enumerate("xyz"))
+    text += "</Coordinates>\n</Piece>\n</RectilinearGrid>\n"
+    content = text.encode()
+    if data_format == "appended":
+        content += b'<AppendedData encoding="raw">\n_' + appended + b"\n</AppendedData>\n"
+    with open(file, "wb") as f:
+        f.write(content + b"</VTKFile>\n")
+
+
+class TestVtk(unittest.TestCase):
+
+    def test_binary(self):
+        df = outputs.Vtk(folder_nnp / "potential.vtr")
+        self.assertFalse(hasattr(df, "vtk"))
+        coords = [df.coords[axis].value for axis in "xyz"]
+        values = df.variables["potential"].value
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "potential.vtr")
+            for data_format in ["binary", "appended"]:
+                for compress in [False, True]:
+                    for byte_order in "<>":
+                        write_vtr(file, coords, values, data_format, compress, byte_order)
+                        vtr = outputs.Vtk(file)
+                        self.assertEqual(list(vtr.coords.keys()), ["x", "y", "z"])
+                        np.testing.assert_array_equal(vtr.coords["z"].value, coords[2])
+                        np.testing.assert_array_equal(vtr.variables["f"].value, values)
+                        self.assertEqual(vtr.variables["f"].unit, "eV")
+
+    def test_save_binary(self):
+        for file in [folder_nnp / "potential.vtr", folder_nnp / "bandedges_2d.fld"]:
+            df = outputs.DataFile(file, product="nextnano++")
+            with tempfile.TemporaryDirectory() as tmp:
+                ascii_file = os.path.join(tmp, "ascii.vtr")
+                df.save(ascii_file, format="VTKAscii")
+                for format, encoding, compress in [
+                    ("VTKBinary", "raw", False),
+                    ("VTKBinary", "raw", True),
+                    ("VTKAppended", "raw", False),
+                    ("VTKAppended", "base64", False),
+                    ("VTKAppended", "raw", True),
+                ]:
+                    binary_file = os.path.join(tmp, f"{format}_{encoding}_{compress}.vtr")
+                    df.save(binary_file, format=format, encoding=encoding, compress=compress)
+                    vtr = outputs.DataFile(binary_file, product="nextnano++")
+                    self.assertEqual(list(vtr.coords.keys()), list(df.coords.keys()))
+                    for key in df.data.keys():
+                        np.testing.assert_array_equal(vtr[key].value, df[key].value)
+                    for key in df.variables.keys():
+                        self.assertEqual(vtr[key].unit, df[key].unit)
+                    if format == "VTKAppended" and encoding == "raw":
+                        self.assertLess(os.path.getsize(binary_file), os.path.getsize(ascii_file))
+
+    def test_layout(self):
+        for file in [folder_nnp / "potential.vtr", folder_nnp / "bandedges_2d.fld"]:
+            df = outputs.DataFile(file, product="nextnano++")
+            for key, var in df.variables.items():
+                self.assertTrue(var.value.flags.f_contiguous)
+            for layout, flag in [("C", "C_CONTIGUOUS"), ("F", "F_CONTIGUOUS")]:
+                df_layout = outputs.DataFile(file, product="nextnano++", layout=layout)
+                for key, var in df.variables.items():
+                    self.assertTrue(df_layout[key].value.flags[flag])
+                    np.testing.assert_array_equal(df_layout[key].value, var.value)
+        self.assertRaises(ValueError, outputs.as_layout, np.zeros(2), "K")
+
+        file = folder_nnp / "bandedges_1d.dat"
+        df = outputs.DataFile(file, product="nextnano++")
+        for layout in ["C", "F"]:
+            for kwargs in [dict(product="nextnano++"), dict(lazy=True), dict(pyvista=False)]:
+                df_layout = outputs.DataFile(file, layout=layout, **kwargs)
+                for key in df.data.keys():
+                    np.testing.assert_array_equal(df_layout[key].value, df[key].value)
+        self.assertRaises(ValueError, outputs.DataFile, file, layout="K")
+        folder = outputs.DataFolder(folder_nnp)
+        loaded = folder.load_all("bandedges", product="nextnano++", deep=False, layout="C")
+        self.assertIn(os.path.join(folder.fullpath, "bandedges_1d.dat"), loaded.keys())
+        self.assertEqual(folder.load_errors, {})
+
+        values = np.arange(24.0)
+        reshaped = outputs.reshape_values(values, 2, 3, 4)
+        self.assertTrue(np.shares_memory(reshaped, values))
+        self.assertEqual(reshaped[1, 0, 0], 1)
+        self.assertEqual(reshaped[0, 1, 0], 2)
+        self.assertTrue(outputs.reshape_values(values, 2, 3, 4, layout="C").flags.c_contiguous)
+
+    def test_pyvista(self):
+        file = folder_nnp / "bandedges.vtr"
+        df = outputs.Vtk(file)
+        df_pyvista = outputs.Vtk(file, pyvista=True)
+        self.assertTrue(hasattr(df_pyvista, "vtk"))
+        self.assertEqual(list(df.data.keys()), list(df_pyvista.data.keys()))
+        for key in df.data.keys():
+            np.testing.assert_array_equal(df[key].value, df_pyvista[key].value)
+
+
+class TestLoadValues(unittest.TestCase):
+
+    def test_avs_dtype(self):
+        self.assertEqual(outputs.avs_dtype("double"), np.dtype("=f8"))
+        self.assertEqual(outputs.avs_dtype("float"), np.dtype("=f4"))
+        self.assertEqual(outputs.avs_dtype("xdr_float"), np.dtype(">f4"))
+        self.assertEqual(outputs.avs_dtype("integer"), np.dtype("=i4"))
+        self.assertRaises(ValueError, outputs.avs_dtype, "complex")
+
+    def test_binary(self):
+        values = np.arange(20, dtype=">f4")
+        with tempfile.TemporaryDirectory() as folder:
+            file = os.path.join(folder, "values.v")
+            with open(file, "wb") as f:
+                f.write(b"header")
+                f.write(values.tobytes())
+            kwargs = dict(
+                file=file, filetype="binary", datatype="xdr_float", skip=6
+            )
+            for mmap in [True, False]:
+                loaded = outputs.load_values(
+                    offset=1, stride=3, size=5, mmap=mmap, **kwargs
+                )
+                np.testing.assert_array_equal(loaded, values[1:14:3])
+                loaded = outputs.load_values(mmap=mmap, **kwargs)
+                np.testing.assert_array_equal(loaded, values)
+
+            loaded = outputs.load_values(size=4, mmap=True, **kwargs)
+            self.assertIsInstance(loaded.base, np.memmap)
+            self.assertEqual(loaded.dtype, np.dtype(">f4"))
+            loaded = outputs.load_values(size=4, mmap=False, **kwargs)
+            self.assertEqual(loaded.dtype, np.dtype(float))
+            del loaded
+
+            # ascii header read up to the end of the file before the binary values
+            for mmap in [True, False]:
+                buffers = {}
+                outputs.get_buffer(buffers, file).read_lines()
+                loaded = outputs.load_values(mmap=mmap, buffers=buffers, **kwargs)
+                loaded[0] = -1
+                np.testing.assert_array_equal(loaded[1:], values[1:])
+                outputs.close_buffers(buffers)
+            del loaded
+
+    def test_ascii(self):
+        text = "header\n1 2 3\n4 5 6\n7 8 9\n\n10\n11\n"
+        with tempfile.TemporaryDirectory() as folder:
+            file = os.path.join(folder, "values.dat")
+            with open(file, "w") as f:
+                f.write(text)
+            buffers = {}
+            kwargs = dict(file=file, filetype="ascii", buffers=buffers)
+            for column in range(3):
+                loaded = outputs.load_values(
+                    skip=1, offset=column, stride=3, size=3, **kwargs
+                )
+                np.testing.assert_array_equal(loaded, [column + 1, column + 4, column + 7])
+            loaded = outputs.load_values(skip=5, size=2, **kwargs)
+            np.testing.assert_array_equal(loaded, [10, 11])
+            loaded = outputs.load_values(skip=5, **kwargs)
+            np.testing.assert_array_equal(loaded, [10, 11])
+
+            self.assertEqual(list(buffers.keys()), [("ascii", file)])
+            self.assertEqual(len(buffers[("ascii", file)]._blocks), 3)
+            outputs.close_buffers(buffers)
+
+    def test_binary_datafile(self):
+        file = folder_nnp / "AvsBinaryAscii_mix" / "ldos_total_cbr_Gamma.fld"
+        df_mmap = outputs.DataFile(file, product="nextnano++")
+        df_copy = outputs.DataFile(file, product="nextnano++", mmap=False)
+        np.testing.assert_array_equal(
+            df_mmap.variables[0].value, df_copy.variables[0].value
+        )
+        self.assertEqual(df_mmap.variables[0].value.shape, (101, 3000))
+
+
 class TestDataFolder(unittest.TestCase):
     def test_init(self):
         dummy_folder = Path("tests") / "dummy"
@@ -772,6 +1347,111 @@ class TestDataFolder(unittest.TestCase):
         self.assertEqual(len(datafolder.files), 3)
         
 
+    def test_load_all(self):
+        datafolder = outputs.DataFolder(folder_nnp)
+        for backend in ["thread", "process"]:
+            with warnings.catch_warnings(record=True):
+                warnings.simplefilter("always")
+                datafiles = datafolder.load_all(
+                    ["_1d", ".dat"], product="nextnano++", workers=2, backend=backend, deep=False
+                )
+            files = datafolder.find_multiple(["_1d", ".dat"])
+            self.assertEqual(list(datafiles.keys()), files)
+            self.assertEqual(datafolder.load_errors, {})
+            df = outputs.DataFile(folder_nnp / "bandedges_1d.dat", product="nextnano++")
+            loaded = datafiles[str(folder_nnp / "bandedges_1d.dat")]
+            np.testing.assert_array_equal(loaded["Gamma"].value, df["Gamma"].value)
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            datafiles = datafolder.load_all(".in", deep=False)
+        self.assertEqual(len(datafiles), 0)
+        self.assertIn(str(folder_nnp / "example.in"), datafolder.load_errors)
+        self.assertIsInstance(
+            datafolder.load_errors[str(folder_nnp / "example.in")], NotImplementedError
+        )
+        self.assertEqual(len(w), 1)
+        self.assertRaises(ValueError, datafolder.load_all, backend="mpi")
+
+    def write_sweep(self, tmp):
+        """Write a sweep output folder of bandedges_1d.dat with Gamma = 10 * a + b (point a=3, b=1 missing)"""
+        df = outputs.DataFile(folder_nnp / "bandedges_1d.dat", product="nextnano++")
+        gamma = df["Gamma"].value
+        infodict = {}
+        for a in [1, 2, 3]:
+            for b in [0, 1]:
+                if (a, b) == (3, 1):
+                    continue
+                folder = os.path.join(tmp, f"example__a_{a}_b_{b}_")
+                os.makedirs(folder)
+                df["Gamma"].value = gamma * 0 + 10 * a + b
+                df.save(os.path.join(folder, "bandedges.dat"))
+                infodict[os.path.join("moved", os.path.basename(folder))] = {"a": a, "b": b}
+        with open(os.path.join(tmp, "sweep_infodict.json"), "w") as f:
+            json.dump(infodict, f)
+        return df
+
+    def test_stack_sweep(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            df = self.write_sweep(tmp)
+            datafolder = outputs.DataFolder(tmp)
+            for backend in ["thread", "process"]:
+                with warnings.catch_warnings(record=True) as w:
+                    warnings.simplefilter("always")
+                    stacked = datafolder.stack_sweep("bandedges.dat", "Gamma", product="nextnano++", backend=backend)
+                self.assertEqual(len(w), 0)
+                self.assertEqual(stacked.sweep_variables, ["a", "b"])
+                self.assertEqual([coord.dim for coord in stacked.coords.values()], [0, 1, 2])
+                np.testing.assert_array_equal(stacked.coords["a"].value, [1, 2, 3])
+                np.testing.assert_array_equal(stacked.coords["x"].value, df["x"].value)
+                gamma = stacked["Gamma"].value
+                self.assertEqual(gamma.shape, (3, 2, df["x"].value.size))
+                np.testing.assert_array_equal(gamma[:, :, -1], [[10, 11], [20, 21], [30, np.nan]])
+                self.assertIsNone(stacked.metadata["folders"][2, 1])
+
+            os.remove(os.path.join(tmp, "example__a_1_b_0_", "bandedges.dat"))
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter("always")
+                stacked = datafolder.stack_sweep("bandedges.dat", "Gamma", product="nextnano++")
+            self.assertEqual(len(w), 1)
+            self.assertEqual(len(datafolder.load_errors), 1)
+            self.assertTrue(np.isnan(stacked["Gamma"].value[0, 0]).all())
+            self.assertEqual(stacked["Gamma"].value[1, 1, 0], 21)
+
+    @unittest.skipUnless(importlib.util.find_spec("xarray"), "xarray is required")
+    def test_stack_sweep_xarray(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.write_sweep(tmp)
+            datafolder = outputs.DataFolder(tmp)
+            gamma = datafolder.stack_sweep("bandedges.dat", "Gamma", product="nextnano++", xarray=True)
+            self.assertEqual(gamma.dims, ("a", "b", "x"))
+            self.assertEqual(gamma.attrs["unit"], "eV")
+            self.assertTrue((gamma.sel(a=2, b=1) == 21).all())
+
+    def test_lazy_listing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "sweep", "point_1"))
+            open(os.path.join(tmp, "sweep", "point_1", "file.dat"), "w").close()
+            datafolder = outputs.DataFolder(tmp)
+            self.assertTrue(datafolder.loaded)
+            sweep = datafolder.folders["sweep"]
+            self.assertFalse(sweep.loaded)
+            self.assertIs(datafolder.go_to("sweep"), sweep)
+
+            point = datafolder.sweep.point_1
+            self.assertTrue(sweep.loaded)
+            self.assertFalse(point.loaded)
+            self.assertEqual(point.filenames(), ["file.dat"])
+            self.assertEqual(point.entries["file.dat"].stat().st_size, 0)
+            self.assertRaises(AttributeError, getattr, sweep, "point_2")
+
+            os.makedirs(os.path.join(tmp, "sweep", "point_2"))
+            self.assertNotIn("point_2", sweep.folders)
+            sweep.refresh()
+            self.assertIn("point_2", sweep.folders)
+            self.assertIsInstance(sweep.point_2, outputs.DataFolder)
+            self.assertEqual(len(datafolder.find(".dat", deep=True)), 1)
+
     def test_navigation(self):
         tests_folder = "tests"
         datafolder = outputs.DataFolder(tests_folder)
@@ -958,6 +1638,42 @@ class TestDataFolder(unittest.TestCase):
         self.assertEqual(len(datafolder.find_multiple((".vtr",))), 2)
         self.assertEqual(len(datafolder.find_multiple((".vt", "r"))), 2)
 
+    def test_find_match(self):
+        datafolder = outputs.DataFolder(folder_nnp)
+        self.assertEqual(
+            datafolder.find("*.vtr", match="glob"), datafolder.find(".vtr")
+        )
+        self.assertEqual(
+            datafolder.find(".fld", match="extension"),
+            [str(folder_nnp / name) for name in ["bandedges_2d.fld", "bandedges_2d_old.fld", "potential.fld"]],
+        )
+        self.assertEqual(
+            datafolder.find(r"^bandedges_\dd\.", match="regex"),
+            datafolder.find(re.compile(r"^bandedges_\dd\.")),
+        )
+        self.assertEqual(len(datafolder.find(r"^bandedges_\dd\.", match="regex")), 2)
+        self.assertEqual(
+            datafolder.find_multiple(["bandedges", "2d"], match="token"),
+            datafolder.find_multiple(["bandedges_2d"]),
+        )
+        self.assertEqual(datafolder.find("bandedges", match="exact"), [])
+        self.assertEqual(len(datafolder.find("bandedges*", deep=True, match="glob")), 11)
+        self.assertRaises(ValueError, datafolder.find, "bandedges", match="fuzzy")
+
+        index = datafolder.index(deep=True)
+        self.assertIs(datafolder.index(deep=True), index)
+        datafolder.refresh()
+        self.assertIsNot(datafolder.index(deep=True), index)
+
+    def test_file_exact_match(self):
+        datafolder = outputs.DataFolder(folder_nnp)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual(
+                datafolder.file("bandedges_2d_old.fld"),
+                str(folder_nnp / "bandedges_2d_old.fld"),
+            )
+
     def test_go_to(self):
         tests_folder = "tests"
         datafolder = outputs.DataFolder(tests_folder)